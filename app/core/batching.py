@@ -0,0 +1,100 @@
+# app/core/batching.py
+"""
+Async Micro-batching Scheduler
+Concurrent single-item requests are queued and flushed as one batch when either
+the batch is full or the oldest request has waited `max_wait_ms`. The batch runs
+once in a worker thread and every caller's future is resolved with its own result.
+
+Tuning: a larger window/batch raises throughput under load at the cost of up to
+`max_wait_ms` extra latency per request; max_wait_ms=0 still groups whatever
+queued up while the previous batch was running.
+"""
+
+import asyncio
+import os
+import time
+from collections import Counter
+
+BATCH_MAX_SIZE = int(os.getenv("CLASSIFY_BATCH_MAX_SIZE", "64"))
+BATCH_MAX_WAIT_MS = float(os.getenv("CLASSIFY_BATCH_WAIT_MS", "5"))
+
+
+class MicroBatcher:
+    """Groups concurrent submit() calls into batched calls of `fn(list) -> list`."""
+
+    def __init__(self, fn, max_batch_size: int = BATCH_MAX_SIZE, max_wait_ms: float = BATCH_MAX_WAIT_MS):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._queue = None
+        self._worker = None
+        self._loop = None
+        self.batches = 0
+        self.items = 0
+        self.batch_sizes = Counter()
+        self.last_batch_seconds = 0.0
+
+    def _ensure_worker(self):
+        loop = asyncio.get_running_loop()
+        if self._worker is None or self._worker.done() or self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def submit(self, item):
+        """Queue one item and wait for its result."""
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _collect(self):
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.max_wait_ms / 1000
+        while len(batch) < self.max_batch_size:
+            # Drain anything already queued without waiting
+            while len(batch) < self.max_batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.max_batch_size or remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            batch = [(item, fut) for item, fut in batch if not fut.done()]
+            if not batch:
+                continue
+            start = time.perf_counter()
+            try:
+                results = await self._loop.run_in_executor(None, self.fn, [item for item, _ in batch])
+            except Exception as e:
+                for _, fut in batch:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            finally:
+                self.last_batch_seconds = time.perf_counter() - start
+                self.batches += 1
+                self.items += len(batch)
+                self.batch_sizes[len(batch)] += 1
+            for (_, fut), result in zip(batch, results):
+                if not fut.done():
+                    fut.set_result(result)
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait_ms,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "last_batch_seconds": round(self.last_batch_seconds, 4),
+            "batch_size_counts": dict(sorted(self.batch_sizes.items())),
+        }
@@ -1,45 +1,180 @@
 # app/core/classifier.py
 """
 Step 5 – Classifier Training for Transactly
-Trains a Logistic Regression model on sentence-transformer embeddings.
+Trains a Logistic Regression model on sentence-transformer embeddings, plus
+(when the normalized texts are given) the cheap char n-gram cascade tier.
 Provides train(), evaluate(), and predict() utilities.
+Trained models are saved as immutable versions under app/models/versions/ and
+published by atomically rewriting the app/models/CURRENT pointer. Each version
+also gets a .npz of its weights, which the API scores with plain NumPy
+(app/core/linear_model.py) instead of unpickling the sklearn estimator; the
+fast tier is only ever saved that way (<version>.fast.npz).
 """
 
 import os
-import joblib
+import time
+import uuid
 import numpy as np
-import pandas as pd
-from sklearn.linear_model import LogisticRegression
-from sklearn.metrics import accuracy_score, f1_score, confusion_matrix, classification_report
-from sklearn.model_selection import train_test_split
+from app.core.linear_model import LinearSoftmax, export_linear
+# joblib, pandas and scikit-learn are imported inside the functions that need
+# them, so importing this module (e.g. from the API) stays cheap
 
 MODEL_PATH = "app/models/classifier.pkl"
-
-def load_data(embeddings_path: str, csv_path: str):
-    """Load embeddings (X) and categories (y)."""
-    X = np.load(embeddings_path)
-    df = pd.read_csv(csv_path)
-    if "category" not in df.columns:
-        raise ValueError("Dataset must contain a 'category' column")
+FAST_MODEL_PATH = "app/models/fast_classifier.npz"
+# "numpy" serves the exported weights; "sklearn" the pickled estimator
+CLASSIFIER_RUNTIME = os.getenv("CLASSIFIER_RUNTIME", "numpy")
+VERSIONS_DIR = "app/models/versions"
+CURRENT_POINTER = "app/models/CURRENT"
+
+
+def _atomic_write(path: str, write):
+    """Write via a temp file in the same directory, then os.replace into place."""
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def linear_path(model_path: str) -> str:
+    """The exported-weights .npz that sits next to a .pkl model artifact."""
+    return os.path.splitext(model_path)[0] + ".npz"
+
+
+def save_model(clf, fast_model=None, X_check=None) -> str:
+    """
+    Save clf (and its fast cascade tier, if any) as a new immutable version and
+    point CURRENT at it. Readers never see a half-written file: the artifacts
+    and the pointer are written to temp files and renamed into place.
+    The weights are exported for NumPy inference after a parity check against
+    clf on X_check (e.g. the held-out rows).
+    """
+    import joblib
+    version = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+    os.makedirs(VERSIONS_DIR, exist_ok=True)
+    export_linear(clf, linear_path(os.path.join(VERSIONS_DIR, f"{version}.pkl")), X_check)
+    _atomic_write(os.path.join(VERSIONS_DIR, f"{version}.pkl"), lambda f: joblib.dump(clf, f))
+    if fast_model is not None:
+        fast_model.save(os.path.join(VERSIONS_DIR, f"{version}.fast.npz"))
+    # Keep the legacy single-file paths in sync for older tooling
+    _atomic_write(MODEL_PATH, lambda f: joblib.dump(clf, f))
+    export_linear(clf, linear_path(MODEL_PATH))
+    if fast_model is not None:
+        fast_model.save(FAST_MODEL_PATH)
+    elif os.path.exists(FAST_MODEL_PATH):
+        os.remove(FAST_MODEL_PATH)
+    _atomic_write(CURRENT_POINTER, lambda f: f.write(version.encode()))
+    return version
+
+
+def current_version():
+    """Version named by the CURRENT pointer, or None for a legacy-only install."""
+    if not os.path.exists(CURRENT_POINTER):
+        return None
+    with open(CURRENT_POINTER) as f:
+        return f.read().strip() or None
+
+
+def list_versions():
+    """All saved model versions, oldest first."""
+    if not os.path.isdir(VERSIONS_DIR):
+        return []
+    return sorted(f[:-4] for f in os.listdir(VERSIONS_DIR)
+                  if f.endswith(".pkl") and not f.endswith(".fast.pkl"))
+
+
+def model_path_for(version: str = None) -> str:
+    """Artifact path for a version (default: CURRENT, falling back to MODEL_PATH)."""
+    version = version or current_version()
+    return os.path.join(VERSIONS_DIR, f"{version}.pkl") if version else MODEL_PATH
+
+
+def fast_model_path_for(version: str = None) -> str:
+    """Fast-tier artifact path for a version (default: CURRENT)."""
+    version = version or current_version()
+    return os.path.join(VERSIONS_DIR, f"{version}.fast.npz") if version else FAST_MODEL_PATH
+
+def load_data(dataset_path: str = None, with_texts: bool = False):
+    """
+    Load embeddings (X) and categories (y) from the columnar dataset, reading
+    only those columns (plus normalized_text when with_texts is set).
+    """
+    from app.core.dataset import read_embeddings
+    columns = ["category", "normalized_text"] if with_texts else ["category"]
+    X, df = read_embeddings(dataset_path, columns=columns)
     y = df["category"].astype(str).values
+    if with_texts:
+        return X, y, df["normalized_text"].tolist()
     return X, y
 
 
-def train_classifier(X, y):
-    """Train Logistic Regression classifier."""
-    print("🔹 Splitting data (80 % train / 20 % test)...")
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=0.2, random_state=42, stratify=y
-    )
+def _split(y):
+    """Row indices of the 80 / 20 train / test split (stratified, fixed seed)."""
+    from sklearn.model_selection import train_test_split
+    return train_test_split(np.arange(len(y)), test_size=0.2, random_state=42, stratify=y)
 
-    print("🔹 Training Logistic Regression...")
-    clf = LogisticRegression(
+
+def _logistic_regression(warm: bool = False):
+    from sklearn.linear_model import LogisticRegression
+    # lbfgs fits a multinomial model for multi-class targets
+    return LogisticRegression(
         max_iter=1000,
         class_weight="balanced",
-        multi_class="multinomial",
-        solver="lbfgs"
+        solver="lbfgs",
+        warm_start=warm
+    )
+
+
+def cold_fit_seconds(X, y) -> float:
+    """Seconds a from-scratch fit takes on the training split train_classifier would use."""
+    y = np.asarray(y)
+    idx_train, _ = _split(y)
+    X_train = np.asarray(X)[idx_train]
+    start = time.perf_counter()
+    _logistic_regression().fit(X_train, y[idx_train])
+    return time.perf_counter() - start
+
+
+def train_classifier(X, y, init_model=None, texts=None, stats: dict = None):
+    """
+    Train Logistic Regression classifier.
+    If init_model (a previously trained classifier with the same classes and
+    feature size) is given, lbfgs is warm-started from its coefficients, which
+    converges in far fewer iterations when only a few rows changed.
+    If texts (the normalized text of each row) are given, the char n-gram fast
+    tier is trained on the same split and its threshold tuned on the test rows.
+    Fills `stats` with the fit time, iterations and whether it was warm-started.
+    """
+    from sklearn.metrics import accuracy_score, f1_score, confusion_matrix, classification_report
+
+    print("🔹 Splitting data (80 % train / 20 % test)...")
+    y = np.asarray(y)
+    idx_train, idx_test = _split(y)
+    X_train, X_test = np.asarray(X)[idx_train], np.asarray(X)[idx_test]
+    y_train, y_test = y[idx_train], y[idx_test]
+
+    warm = (
+        init_model is not None
+        and list(getattr(init_model, "classes_", [])) == sorted(set(y_train))
+        and init_model.coef_.shape[1] == np.shape(X_train)[1]
     )
+    print(f"🔹 Training Logistic Regression{' (warm start)' if warm else ''}...")
+    clf = _logistic_regression(warm)
+    if warm:
+        clf.coef_ = init_model.coef_.copy()
+        clf.intercept_ = init_model.intercept_.copy()
+    start = time.perf_counter()
     clf.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - start
+    print(f"🔹 Converged in {int(np.max(clf.n_iter_))} iterations")
+    if stats is not None:
+        stats.update({"fit_seconds": round(fit_seconds, 4), "iterations": int(np.max(clf.n_iter_)),
+                      "warm_start": bool(warm)})
 
     print("🔹 Evaluating...")
     y_pred = clf.predict(X_test)
@@ -50,35 +185,61 @@ def train_classifier(X, y):
     print("\nClassification Report:\n", classification_report(y_test, y_pred))
     print("Confusion Matrix:\n", confusion_matrix(y_test, y_pred))
 
+    fast_model = None
+    if texts is not None:
+        from app.core.fast_tier import CharNgramClassifier, print_tuning
+        texts = np.asarray(texts, dtype=object)
+        print("🔹 Training char n-gram fast tier...")
+        fast_model = CharNgramClassifier().fit(texts[idx_train], y_train)
+        fast_model.tune_threshold(texts[idx_test], y_test, y_pred)
+        print_tuning(fast_model, acc)
+
     # Save trained model
     os.makedirs(os.path.dirname(MODEL_PATH), exist_ok=True)
-    joblib.dump(clf, MODEL_PATH)
-    print(f"✅ Model saved → {MODEL_PATH}")
+    version = save_model(clf, fast_model, X_check=X_test)
+    print(f"✅ Model saved → {model_path_for(version)} (version {version})")
 
     return clf
 
 
-def load_model(model_path: str = MODEL_PATH):
-    """Load trained Logistic Regression model."""
+def load_model(model_path: str = None, runtime: str = CLASSIFIER_RUNTIME):
+    """
+    Load the trained classifier (default: the CURRENT version).
+    With the numpy runtime this is a LinearSoftmax over the exported weights;
+    a model saved before the export existed is unpickled and converted.
+    """
+    model_path = model_path or model_path_for()
+    if runtime == "numpy" and os.path.exists(linear_path(model_path)):
+        return LinearSoftmax.load(linear_path(model_path))
     if not os.path.exists(model_path):
         raise FileNotFoundError("Model not found. Train it first.")
-    return joblib.load(model_path)
+    import joblib
+    clf = joblib.load(model_path)
+    return LinearSoftmax.from_sklearn(clf) if runtime == "numpy" else clf
+
+
+def load_fast_model(version: str = None):
+    """Load a version's fast cascade tier (NumPy, no unpickling), or None if it was trained without one."""
+    from app.core.fast_tier import CharNgramClassifier
+    path = fast_model_path_for(version)
+    return CharNgramClassifier.load(path) if os.path.exists(path) else None
 
 
 def predict_category(model, text_embedding):
     """Predict category + confidence for one embedding vector."""
+    if isinstance(model, LinearSoftmax):
+        return model.predict_one(text_embedding)
     probs = model.predict_proba([text_embedding])[0]
     idx = np.argmax(probs)
     return model.classes_[idx], float(probs[idx])
 
 
 if __name__ == "__main__":
-    # Demo: Train model using processed embeddings
-    EMB_PATH = "data/processed/embeddings.npy"
-    CSV_PATH = "data/processed/transactions.csv"
+    # Demo: Train model using the processed dataset
+    from app.core.dataset import DATASET_PATH
 
-    if os.path.exists(EMB_PATH) and os.path.exists(CSV_PATH):
-        X, y = load_data(EMB_PATH, CSV_PATH)
-        model = train_classifier(X, y)
+    if os.path.exists(DATASET_PATH):
+        X, y, texts = load_data(DATASET_PATH, with_texts=True)
+        model = train_classifier(X, y, texts=texts)
     else:
         print("⚠️ Missing embeddings or dataset. Run embeddings step first.")
\ No newline at end of file
@@ -0,0 +1,173 @@
+# app/core/dataset.py
+"""
+Columnar Training Dataset
+One Parquet file holds everything the offline pipeline passes between steps,
+row-aligned by construction:
+
+    transaction_id     string
+    description        string   raw description as ingested
+    normalized_text    string   normalize_transaction(description)
+    category           string   label
+    amount             float64  null for feedback rows
+    embedding          fixed_size_list<float32>[dim]  (once embedded)
+
+The schema metadata records a dataset version, the schema version, the row
+count and the embedding model, so a reader can tell stale vectors from fresh
+ones without loading them. Reads are column-selective: training pulls only
+`embedding` + `category`, the explanation DB only `normalized_text` +
+`embedding`, and merging feedback only the source columns.
+
+Built by `python -m app.core.embeddings` from data/processed/transactions.csv;
+retrain.py writes the merged dataset next to it.
+"""
+
+import json
+import os
+import time
+import uuid
+
+import numpy as np
+# pyarrow is imported inside the functions that need it, so the API only pays
+# for it when it falls back to reading the dataset
+
+SCHEMA_VERSION = 1
+DATASET_PATH = "data/processed/transactions.parquet"
+RETRAINED_DATASET_PATH = "data/processed/transactions_retrained.parquet"
+SOURCE_COLUMNS = ["transaction_id", "description", "category", "amount"]
+ROW_GROUP_SIZE = 65536
+_META_KEY = b"transactly"
+
+
+def _schema(dim: int = None, meta: dict = None):
+    import pyarrow as pa
+    fields = [
+        pa.field("transaction_id", pa.string()),
+        pa.field("description", pa.string()),
+        pa.field("normalized_text", pa.string()),
+        pa.field("category", pa.string()),
+        pa.field("amount", pa.float64()),
+    ]
+    if dim is not None:
+        fields.append(pa.field("embedding", pa.list_(pa.float32(), dim)))
+    return pa.schema(fields, metadata={_META_KEY: json.dumps(meta).encode()} if meta else None)
+
+
+def current_dataset_path() -> str:
+    """The retrained dataset when one exists, else the base dataset."""
+    return RETRAINED_DATASET_PATH if os.path.exists(RETRAINED_DATASET_PATH) else DATASET_PATH
+
+
+def dataset_exists(path: str = None) -> bool:
+    return os.path.exists(path or current_dataset_path())
+
+
+def write_dataset(df, path: str = DATASET_PATH, embeddings=None, model_name: str = None,
+                  source: str = None) -> dict:
+    """
+    Write df (plus an optional row-aligned embeddings array, e.g. a memmap) as a
+    new dataset version. Row groups are streamed, so the embeddings are never
+    copied whole; the file is written to a temp path and renamed into place.
+    Returns the metadata.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if "normalized_text" not in df.columns:
+        raise ValueError("Dataset rows must have a 'normalized_text' column")
+    if embeddings is not None and len(embeddings) != len(df):
+        raise ValueError(f"Row mismatch: {len(embeddings)} vectors vs {len(df)} rows")
+    dim = int(embeddings.shape[1]) if embeddings is not None else None
+    if embeddings is not None and model_name is None:
+        from app.core.embedding_backends import backend_id
+        model_name = backend_id()
+
+    meta = {
+        "schema_version": SCHEMA_VERSION,
+        "version": time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6],
+        "created_at": time.time(),
+        "rows": int(len(df)),
+        "embedding_model": model_name,
+        "embedding_dim": dim,
+        "source": source,
+    }
+    schema = _schema(dim, meta)
+    frame = df.reindex(columns=[f.name for f in schema if f.name != "embedding"])
+    # Ids and descriptions may have been read back as numbers; labels are text
+    for column in ("transaction_id", "description", "normalized_text", "category"):
+        frame[column] = frame[column].map(lambda v: None if v is None or v != v else str(v))
+    frame["amount"] = frame["amount"].astype("float64")
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+    try:
+        with pq.ParquetWriter(tmp, schema) as writer:
+            for start in range(0, max(len(frame), 1), ROW_GROUP_SIZE):
+                part = frame.iloc[start:start + ROW_GROUP_SIZE]
+                arrays = [pa.array(part[f.name].to_numpy(dtype=object if f.type == pa.string() else None),
+                                   type=f.type, from_pandas=True)
+                          for f in schema if f.name != "embedding"]
+                if dim is not None:
+                    block = np.ascontiguousarray(embeddings[start:start + len(part)], dtype=np.float32)
+                    arrays.append(pa.FixedSizeListArray.from_arrays(pa.array(block.reshape(-1)), dim))
+                writer.write_batch(pa.record_batch(arrays, schema=schema))
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    print(f"✅ Saved dataset → {path} (version {meta['version']}, {meta['rows']} rows"
+          f"{', embeddings ' + str(model_name) if dim else ''})")
+    return meta
+
+
+def read_metadata(path: str = None) -> dict:
+    """Dataset metadata from the Parquet footer (no rows are read)."""
+    import pyarrow.parquet as pq
+    schema = pq.read_schema(path or current_dataset_path())
+    raw = (schema.metadata or {}).get(_META_KEY)
+    if raw is None:
+        raise ValueError(f"{path} is not a Transactly dataset (no metadata)")
+    meta = json.loads(raw)
+    if meta.get("schema_version") != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported dataset schema version {meta.get('schema_version')} at {path}")
+    meta["columns"] = schema.names
+    return meta
+
+
+def read_columns(columns, path: str = None):
+    """Read only the given (non-embedding) columns as a DataFrame."""
+    import pyarrow.parquet as pq
+    path = path or current_dataset_path()
+    read_metadata(path)
+    return pq.read_table(path, columns=list(columns), memory_map=True).to_pandas()
+
+
+def read_embeddings(path: str = None, columns=(), model_name: str = None):
+    """
+    Read the embedding column as a (rows, dim) float32 array, plus any other
+    `columns` from the same rows as a DataFrame: (embeddings, df).
+    Raises if the dataset has no embeddings or they come from another model.
+    """
+    import pyarrow.parquet as pq
+    path = path or current_dataset_path()
+    meta = read_metadata(path)
+    if "embedding" not in meta["columns"]:
+        raise ValueError(f"{path} has no embeddings. Run `python -m app.core.embeddings` first.")
+    if model_name is not None and meta["embedding_model"] != model_name:
+        raise ValueError(f"{path} was embedded with {meta['embedding_model']}, not {model_name}")
+
+    table = pq.read_table(path, columns=["embedding", *columns], memory_map=True)
+    vectors = table.column("embedding").combine_chunks()
+    if vectors.null_count:
+        raise ValueError(f"{path} has {vectors.null_count} rows without embeddings")
+    embeddings = vectors.flatten().to_numpy().reshape(len(table), meta["embedding_dim"])
+    if len(embeddings) != meta["rows"]:
+        raise ValueError(f"{path}: {len(embeddings)} vectors but metadata says {meta['rows']} rows")
+    return embeddings, table.drop_columns(["embedding"]).to_pandas()
+
+
+if __name__ == "__main__":
+    path = current_dataset_path()
+    if not dataset_exists(path):
+        print(f"⚠️ No dataset at {path}. Run `python -m app.core.embeddings` first.")
+    else:
+        print(json.dumps(read_metadata(path), indent=2))
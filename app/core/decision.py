@@ -3,89 +3,376 @@
 Step 7 – Decision Logic Layer
 Combines rule-based and model-based reasoning for final transaction categorisation.
 Implements confidence thresholds and explainability.
+
+Cascade: rules → char n-gram fast tier (app/core/fast_tier.py) → MiniLM +
+Logistic Regression. `method` reports the tier that answered: "rule",
+"fast_model", or "model"/"low_confidence" for the full model.
+
+Everything after the rules depends only on the normalized text and the
+serving models, so those results are kept in a DecisionCache keyed by
+(normalized text, model version, CONF_THRESHOLD). Rules are still checked on
+every call, so rule edits apply immediately.
 """
 
-import numpy as np
-from app.core.rules import apply_rules
-from app.core.preprocessing import normalize_transaction
-from app.core.classifier import load_model, predict_category
-from app.core.embeddings import load_model as load_embedder
-from sklearn.metrics.pairwise import cosine_similarity
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.rules import apply_rules, apply_rules_many
+from app.core.preprocessing import normalize_transaction, normalize_many
+from app.core.classifier import predict_category
+from app.core.embeddings import encode_cached
+from app.core.fast_tier import FAST_TIER_ENABLED, serving_threshold
+from app.core.metrics import DECISIONS, STAGE_SECONDS
+from app.core.registry import get_registry
+from app.core.similarity import get_index
 
 # Confidence threshold for model acceptance
 CONF_THRESHOLD = 0.75
 
+# Set DECISION_CACHE_SIZE=0 to disable the result cache
+DECISION_CACHE_SIZE = int(os.getenv("DECISION_CACHE_SIZE", "50000"))
+DECISION_CACHE_TTL = float(os.getenv("DECISION_CACHE_TTL", "3600"))
+
+
+class DecisionCache:
+    """
+    Bounded LRU + TTL cache of post-rules decision results.
+    Keys are (normalized text, model version, CONF_THRESHOLD, explained) so a
+    new model or threshold never serves old answers; the registry also clears
+    the cache whenever the model or explanation DB is replaced, and feedback
+    drops the corrected texts.
+    """
+
+    def __init__(self, max_items: int = DECISION_CACHE_SIZE, ttl: float = DECISION_CACHE_TTL):
+        self.max_items = max_items
+        self.ttl = ttl
+        self._mem = OrderedDict()      # key → (expires_at, result)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_items > 0
+
+    def get_many(self, keys) -> dict:
+        """{key: result copy} for every live entry."""
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                entry = self._mem.get(key)
+                if entry is None:
+                    self.misses += 1
+                elif entry[0] < now:
+                    del self._mem[key]
+                    self.expired += 1
+                    self.misses += 1
+                else:
+                    self._mem.move_to_end(key)
+                    found[key] = dict(entry[1])
+                    self.hits += 1
+        return found
+
+    def put_many(self, items):
+        """Store (key, result) pairs."""
+        expires = time.monotonic() + self.ttl
+        with self._lock:
+            for key, result in items:
+                self._mem[key] = (expires, dict(result))
+                self._mem.move_to_end(key)
+            while len(self._mem) > self.max_items:
+                self._mem.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_texts(self, norm_texts) -> int:
+        """Drop every entry for the given normalized texts (any version)."""
+        texts = set(norm_texts)
+        with self._lock:
+            stale = [k for k in self._mem if k[0] in texts]
+            for key in stale:
+                del self._mem[key]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self.invalidations += len(self._mem)
+            self._mem.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "size": len(self._mem),
+            "max_items": self.max_items,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+_result_cache = DecisionCache()
+get_registry().on_change(_result_cache.clear)
+
+
+def get_decision_cache() -> DecisionCache:
+    """Return the process-wide decision result cache."""
+    return _result_cache
+
+
+def invalidate_feedback(descriptions) -> int:
+    """Forget cached decisions for descriptions that just received feedback."""
+    if not _result_cache.enabled:
+        return 0
+    return _result_cache.invalidate_texts(normalize_many(descriptions))
+
+
+def _cache_key(norm_text, version, explained):
+    return (norm_text, version, CONF_THRESHOLD, explained)
+
 
 def explain_similarity(embedding, embeddings_db, texts_db, top_k=3):
     """
     Find top-k most similar transactions in the existing dataset.
     Returns list of (text, similarity_score).
     """
-    sims = cosine_similarity([embedding], embeddings_db)[0]
-    top_idx = np.argsort(sims)[::-1][:top_k]
-    return [(texts_db[i], float(sims[i])) for i in top_idx]
+    return get_index(embeddings_db, texts_db).search(embedding, top_k)
+
+
+def _record(result):
+    DECISIONS.inc(result["method"], result["final_category"])
+    return result
+
+
+def _rule_result(rule_cat, rule_pattern):
+    return {
+        "final_category": rule_cat,
+        "method": "rule",
+        "confidence": 1.0,
+        "explanation": f"Matched rule pattern: {rule_pattern}"
+    }
+
+
+def _fast_result(pred, conf):
+    return {
+        "final_category": pred,
+        "method": "fast_model",
+        "confidence": conf,
+        "explanation": f"Predicted by char n-gram model with confidence {conf:.2f} "
+                       "(no embedding computed, so no similar examples)",
+        "similar_examples": []
+    }
+
+
+def _fast_tier():
+    return get_registry().fast_classifier if FAST_TIER_ENABLED else None
+
+
+def _fast_decide(fast, norm_texts, mode):
+    """Fast-tier results for the texts it is confident about: {text: result}."""
+    with STAGE_SECONDS.time("fast", mode):
+        probs = fast.predict_proba(norm_texts)
+    best = probs.argmax(axis=1)
+    threshold = serving_threshold(fast)
+    return {
+        text: _fast_result(fast.classes_[b], float(row[b]))
+        for text, row, b in zip(norm_texts, probs, best)
+        if row[b] >= threshold
+    }
+
+
+def _model_result(pred, conf, top_similar):
+    if conf >= CONF_THRESHOLD:
+        return {
+            "final_category": pred,
+            "method": "model",
+            "confidence": conf,
+            "explanation": f"Predicted by model with confidence {conf:.2f}",
+            "similar_examples": top_similar
+        }
+    return {
+        "final_category": "Uncertain",
+        "method": "low_confidence",
+        "confidence": conf,
+        "explanation": "Below confidence threshold; needs user feedback",
+        "similar_examples": top_similar
+    }
+
 
+def decide_rules(description: str):
+    """The rule result for one description, or None when no rule matches."""
+    with STAGE_SECONDS.time("rules", "single"):
+        rule_cat, rule_pattern = apply_rules(description)
+    return _record(_rule_result(rule_cat, rule_pattern)) if rule_cat else None
 
-def decide_category(description: str, embeddings_db=None, texts_db=None):
+
+def decide_category(description: str, embeddings_db=None, texts_db=None, check_rules: bool = True):
     """
     End-to-end decision logic for a single transaction description.
     Returns a structured dict containing the final category, method, confidence, and explanation.
+    Models come from the process-wide registry, so they are loaded once, not per call.
+    check_rules=False skips the rules for a caller that already ran decide_rules.
     """
 
     # 1️⃣ Apply preprocessing + rules
-    rule_cat, rule_pattern = apply_rules(description)
-    if rule_cat:
-        return {
-            "final_category": rule_cat,
-            "method": "rule",
-            "confidence": 1.0,
-            "explanation": f"Matched rule pattern: {rule_pattern}"
-        }
+    if check_rules:
+        rule_result = decide_rules(description)
+        if rule_result is not None:
+            return rule_result
 
     # 2️⃣ Normalize & embed
-    norm_text = normalize_transaction(description)
-    emb_model = load_embedder()
-    emb = emb_model.encode([norm_text])[0]
+    with STAGE_SECONDS.time("normalize", "single"):
+        norm_text = normalize_transaction(description)
+
+    # Repeated merchants are answered from the result cache
+    explained = embeddings_db is not None and texts_db is not None
+    version = get_registry().model_version
+    key = _cache_key(norm_text, version, explained)
+    if _result_cache.enabled:
+        cached = _result_cache.get_many([key]).get(key)
+        if cached is not None:
+            return _record(cached)
+
+    result = _decide_normalized(norm_text, embeddings_db, texts_db)
+    # Not cached if the model changed underneath this call
+    if _result_cache.enabled and get_registry().model_version == version:
+        _result_cache.put_many([(key, result)])
+    return _record(result)
+
+
+def _decide_normalized(norm_text, embeddings_db=None, texts_db=None):
+    """Fast tier, then embedding + classifier, for one normalized text."""
+    # 2️⃣b Cheap tier: confident char n-gram predictions skip the transformer
+    fast = _fast_tier()
+    if fast is not None:
+        fast_hit = _fast_decide(fast, [norm_text], "single").get(norm_text)
+        if fast_hit is not None:
+            return fast_hit
+
+    registry = get_registry()
+    embedder = registry.embedder
+    with STAGE_SECONDS.time("embed", "single"):
+        emb = encode_cached(embedder, [norm_text])[0]
 
     # 3️⃣ Model inference
-    clf = load_model()
-    pred, conf = predict_category(clf, emb)
+    clf = registry.classifier
+    with STAGE_SECONDS.time("predict", "single"):
+        pred, conf = predict_category(clf, emb)
 
     # 4️⃣ Explainability (optional)
     top_similar = []
     if embeddings_db is not None and texts_db is not None:
-        top_similar = explain_similarity(emb, embeddings_db, texts_db)
+        with STAGE_SECONDS.time("explain", "single"):
+            top_similar = explain_similarity(emb, embeddings_db, texts_db)
 
     # 5️⃣ Decision logic
-    if conf >= CONF_THRESHOLD:
-        return {
-            "final_category": pred,
-            "method": "model",
-            "confidence": conf,
-            "explanation": f"Predicted by model with confidence {conf:.2f}",
-            "similar_examples": top_similar
-        }
+    return _model_result(pred, conf, top_similar)
+
+
+def explain_similarity_many(embeddings, embeddings_db, texts_db, top_k=3):
+    """
+    Batched explain_similarity: one similarity matrix for all query rows.
+    Returns one list of (text, similarity_score) per query.
+    """
+    return get_index(embeddings_db, texts_db).search_many(embeddings, top_k)
+
+
+def decide_many(descriptions, embeddings_db=None, texts_db=None, check_rules: bool = True):
+    """
+    Vectorized decide_category for a batch of descriptions.
+    Each stage runs once for the whole batch: rules, normalization of the
+    unique descriptions, one fast-tier pass over the unique normalized texts,
+    a single encode() over the escalated texts not already cached,
+    one predict_proba matrix and one batched similarity search.
+    Returns results in input order, identical in shape to decide_category.
+    check_rules=False skips the rules for descriptions known to miss them.
+    """
+    results = [None] * len(descriptions)
+
+    # 1️⃣ Rules over the batch
+    pending = {}
+    if check_rules:
+        with STAGE_SECONDS.time("rules", "batch"):
+            rule_hits = apply_rules_many(descriptions)
     else:
-        return {
-            "final_category": "Uncertain",
-            "method": "low_confidence",
-            "confidence": conf,
-            "explanation": "Below confidence threshold; needs user feedback",
-            "similar_examples": top_similar
-        }
+        rule_hits = [(None, None)] * len(descriptions)
+    for i, (description, (rule_cat, rule_pattern)) in enumerate(zip(descriptions, rule_hits)):
+        if rule_cat:
+            results[i] = _record(_rule_result(rule_cat, rule_pattern))
+        else:
+            pending.setdefault(description, []).append(i)
+    if not pending:
+        return results
+
+    # 2️⃣ Normalize once per distinct description, embed once per distinct text
+    with STAGE_SECONDS.time("normalize", "batch"):
+        norm_of = dict(zip(pending, normalize_many(pending)))
+    unique_texts = list(dict.fromkeys(norm_of.values()))
+
+    # Texts answered recently come from the result cache
+    decided = {}
+    explained = embeddings_db is not None and texts_db is not None
+    version = get_registry().model_version
+    if _result_cache.enabled:
+        hits = _result_cache.get_many([_cache_key(t, version, explained) for t in unique_texts])
+        decided = {key[0]: result for key, result in hits.items()}
+        unique_texts = [t for t in unique_texts if t not in decided]
+
+    # Cheap tier first; only texts it is unsure about are embedded
+    fresh = {}
+    fast = _fast_tier() if unique_texts else None
+    if fast is not None:
+        fresh = _fast_decide(fast, unique_texts, "batch")
+        unique_texts = [t for t in unique_texts if t not in fresh]
+
+    if unique_texts:
+        registry = get_registry()
+        embedder = registry.embedder
+        with STAGE_SECONDS.time("embed", "batch"):
+            embs = encode_cached(embedder, unique_texts, batch_size=64)
+
+        # 3️⃣ One probability matrix for all escalated texts
+        clf = registry.classifier
+        with STAGE_SECONDS.time("predict", "batch"):
+            probs = clf.predict_proba(embs)
+            best = probs.argmax(axis=1)
+
+        # 4️⃣ Batched explainability
+        similar = [[] for _ in unique_texts]
+        if embeddings_db is not None and texts_db is not None:
+            with STAGE_SECONDS.time("explain", "batch"):
+                similar = explain_similarity_many(embs, embeddings_db, texts_db)
+
+        for j, text in enumerate(unique_texts):
+            fresh[text] = _model_result(clf.classes_[best[j]], float(probs[j, best[j]]), similar[j])
+
+    if fresh and _result_cache.enabled and get_registry().model_version == version:
+        _result_cache.put_many((_cache_key(t, version, explained), r) for t, r in fresh.items())
+    decided.update(fresh)
+
+    # 5️⃣ Fan results back out to every input position
+    for description, positions in pending.items():
+        result = decided[norm_of[description]]
+        DECISIONS.inc(result["method"], result["final_category"], amount=len(positions))
+        for i in positions:
+            results[i] = dict(result)
+    return results
 
 
 # 🧪 Demo
 if __name__ == "__main__":
-    import numpy as np
-    import os
-
     # Load embeddings for explainability (optional)
-    emb_path = "data/processed/embeddings.npy"
-    text_path = "data/processed/texts.npy"
-
-    embeddings_db = np.load(emb_path) if os.path.exists(emb_path) else None
-    texts_db = np.load(text_path, allow_pickle=True) if os.path.exists(text_path) else None
+    embeddings_db, texts_db = get_registry().explanation_db
 
     samples = [
         "IRCTC Train Booking #7845",
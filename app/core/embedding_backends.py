@@ -0,0 +1,156 @@
+# app/core/embedding_backends.py
+"""
+Embedding Backends
+Every backend exposes the same minimal interface the pipeline relies on:
+
+    backend.name                                  cache / store tag (vectors from
+                                                  different backends never mix)
+    backend.dim                                   vector size
+    backend.encode(texts, batch_size=32, ...)     → float32 (n, dim), L2-normalized
+
+Selected with EMBEDDING_BACKEND:
+  • sentence-transformers  PyTorch all-MiniLM-L6-v2 (default)
+  • onnx                   ONNX Runtime export of the same model, optionally int8
+                           quantized (see scripts/export_onnx.py); needs only
+                           onnxruntime + tokenizers, no torch
+  • hashing                dependency-free feature hashing, for tests/benchmarks
+
+A classifier must be trained on the backend it serves with; check how close
+onnx/int8 stays to the reference with scripts/embedding_parity.py.
+"""
+
+import os
+import zlib
+
+import numpy as np
+
+MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
+EMBED_DIM = 384
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "sentence-transformers")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "app/models/onnx/all-MiniLM-L6-v2")
+ONNX_QUANTIZED = os.getenv("ONNX_QUANTIZED", "1") != "0"
+ONNX_THREADS = int(os.getenv("ONNX_THREADS", "0"))      # 0 = onnxruntime default
+ONNX_MAX_LENGTH = 256                                      # all-MiniLM-L6-v2 max_seq_length
+BACKENDS = ("sentence-transformers", "onnx", "hashing")
+
+
+def onnx_model_file(quantized: bool = ONNX_QUANTIZED) -> str:
+    return "model_int8.onnx" if quantized else "model.onnx"
+
+
+def backend_id(backend: str = EMBEDDING_BACKEND, quantized: bool = ONNX_QUANTIZED) -> str:
+    """Tag identifying the vectors a backend produces, without loading it."""
+    if backend == "sentence-transformers":
+        return MODEL_NAME
+    if backend == "onnx":
+        return f"{MODEL_NAME}:onnx{'-int8' if quantized else ''}"
+    if backend == "hashing":
+        return f"hashing-{EMBED_DIM}"
+    raise ValueError(f"Unknown embedding backend: {backend} (choose from {BACKENDS})")
+
+
+class SentenceTransformerBackend:
+    """The reference PyTorch model."""
+
+    def __init__(self, model_name: str = MODEL_NAME):
+        # Imported here so the other backends never pull in torch
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_name)
+        self.name = backend_id("sentence-transformers")
+        self.dim = self.model.get_sentence_embedding_dimension()
+
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False, **kwargs):
+        return np.asarray(
+            self.model.encode(list(texts), batch_size=batch_size, show_progress_bar=show_progress_bar, **kwargs),
+            dtype=np.float32,
+        )
+
+
+class OnnxBackend:
+    """
+    all-MiniLM-L6-v2 on ONNX Runtime: tokenizer → transformer → mean pooling →
+    L2 normalization, the same steps as the sentence-transformers pipeline.
+    Batches are formed from length-sorted texts so padding stays minimal.
+    """
+
+    def __init__(self, model_dir: str = ONNX_MODEL_DIR, quantized: bool = ONNX_QUANTIZED,
+                 threads: int = ONNX_THREADS):
+        try:
+            import onnxruntime as ort
+            from tokenizers import Tokenizer
+        except ImportError as e:
+            raise ImportError("The onnx embedding backend needs `pip install onnxruntime tokenizers`") from e
+        model_path = os.path.join(model_dir, onnx_model_file(quantized))
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"{model_path} not found. Run `python scripts/export_onnx.py` first.")
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=ONNX_MAX_LENGTH)
+        self.tokenizer.enable_padding()
+        self.name = backend_id("onnx", quantized)
+        self.dim = EMBED_DIM
+
+    def _encode_batch(self, texts) -> np.ndarray:
+        encoded = self.tokenizer.encode_batch(texts)
+        mask = np.array([e.attention_mask for e in encoded], dtype=np.int64)
+        feeds = {"input_ids": np.array([e.ids for e in encoded], dtype=np.int64), "attention_mask": mask}
+        if "token_type_ids" in self._inputs:
+            feeds["token_type_ids"] = np.array([e.type_ids for e in encoded], dtype=np.int64)
+        hidden = self.session.run(None, feeds)[0]
+        weights = mask[..., None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return pooled / norms
+
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False, **_):
+        texts = [str(t) for t in texts]
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        order = np.argsort([len(t) for t in texts], kind="stable")
+        for start in range(0, len(texts), batch_size):
+            idx = order[start:start + batch_size]
+            out[idx] = self._encode_batch([texts[i] for i in idx])
+        return out
+
+
+class HashingBackend:
+    """
+    Deterministic, dependency-free embedder: word and character-trigram
+    features hashed (crc32, stable across processes) into a signed vector.
+    Similar merchant strings land close together; meaning is not captured.
+    """
+
+    def __init__(self, dim: int = EMBED_DIM):
+        self.dim = dim
+        self.name = backend_id("hashing") if dim == EMBED_DIM else f"hashing-{dim}"
+
+    def _vector(self, text: str) -> np.ndarray:
+        v = np.zeros(self.dim, dtype=np.float32)
+        padded = f" {text} "
+        features = text.split() + [padded[i:i + 3] for i in range(len(padded) - 2)]
+        for feat in features:
+            h = zlib.crc32(feat.encode("utf-8"))
+            v[h % self.dim] += 1.0 if (h >> 16) & 1 else -1.0
+        norm = np.linalg.norm(v)
+        return v / norm if norm else v
+
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False, **_):
+        if not len(texts):
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack([self._vector(str(t)) for t in texts])
+
+
+def load_backend(backend: str = EMBEDDING_BACKEND):
+    """Instantiate the configured embedding backend."""
+    if backend == "sentence-transformers":
+        return SentenceTransformerBackend()
+    if backend == "onnx":
+        return OnnxBackend()
+    if backend == "hashing":
+        return HashingBackend()
+    raise ValueError(f"Unknown embedding backend: {backend} (choose from {BACKENDS})")
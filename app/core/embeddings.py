@@ -2,61 +2,210 @@
 """
 Step 4 - Feature Extraction
 Generates text embeddings for transaction descriptions using all-MiniLM-L6-v2.
+The model runs on a pluggable backend (see app/core/embedding_backends.py).
+Vectors are stored with their rows in the columnar dataset (app/core/dataset.py).
 """
 
 import os
+import sqlite3
+import threading
+from collections import OrderedDict
 import numpy as np
-import pandas as pd
-from sentence_transformers import SentenceTransformer
-from app.core.preprocessing import normalize_transaction
+from app.core.embedding_backends import EMBED_DIM, EMBEDDING_BACKEND, backend_id, load_backend
+from app.core.dataset import DATASET_PATH, write_dataset
+from app.core.store import write_store
 
+CSV_PATH = "data/processed/transactions.csv"
 
-MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
-EMBED_DIM = 384
-EMBED_SAVE_PATH = "data/processed/embeddings.npy"
-TEXT_SAVE_PATH = "data/processed/texts.npy"
+# Embedding cache: in-memory LRU + optional on-disk (SQLite) tier.
+# Set EMBED_CACHE_PATH="" to disable the disk tier.
+DEFAULT_EMBED_CACHE_PATH = "data/processed/embedding_cache.sqlite"
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "50000"))
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", DEFAULT_EMBED_CACHE_PATH)
 
 
-def load_model():
-    """Load MiniLM model once."""
-    print(f"🔹 Loading embedding model: {MODEL_NAME}")
-    model = SentenceTransformer(MODEL_NAME)
-    return model
+def load_model(backend: str = EMBEDDING_BACKEND):
+    """Load the embedding model once, on the configured backend."""
+    print(f"🔹 Loading embedding model: {backend_id(backend)} ({backend})")
+    return load_backend(backend)
 
 
-def generate_embeddings(csv_path: str, model=None):
+class EmbeddingCache:
     """
-    Generate embeddings for transaction descriptions.
-    Returns: np.ndarray of shape (n_samples, EMBED_DIM)
+    Bounded LRU cache of text → embedding vector, tagged with the model name.
+    normalize_transaction collapses most descriptions to a few merchant strings,
+    so almost every lookup after warm-up is a hit. An optional SQLite tier keeps
+    vectors across restarts and is shared with the offline scripts.
     """
-    if model is None:
-        model = load_model()
 
-    df = pd.read_csv(csv_path)
+    def __init__(self, max_items: int = EMBED_CACHE_SIZE, disk_path: str = EMBED_CACHE_PATH,
+                 model_name: str = None):
+        self.max_items = max_items
+        self.model_name = model_name or backend_id()
+        self._mem = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if disk_path:
+            os.makedirs(os.path.dirname(disk_path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(disk_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                " model TEXT NOT NULL, text TEXT NOT NULL, vec BLOB NOT NULL,"
+                " PRIMARY KEY (model, text))"
+            )
+            self._db.commit()
+
+    def _remember(self, text, vec):
+        self._mem[text] = vec
+        self._mem.move_to_end(text)
+        while len(self._mem) > self.max_items:
+            self._mem.popitem(last=False)
+
+    def get_many(self, texts):
+        """Return {text: vector} for every text found in memory or on disk."""
+        found = {}
+        with self._lock:
+            missing = []
+            for t in dict.fromkeys(texts):
+                vec = self._mem.get(t)
+                if vec is not None:
+                    self._mem.move_to_end(t)
+                    found[t] = vec
+                else:
+                    missing.append(t)
+            self.hits += len(found)
+            self.misses += len(missing)
+            if missing and self._db is not None:
+                for start in range(0, len(missing), 500):
+                    batch = missing[start:start + 500]
+                    rows = self._db.execute(
+                        f"SELECT text, vec FROM embeddings WHERE model = ? AND text IN ({','.join('?' * len(batch))})",
+                        [self.model_name, *batch],
+                    ).fetchall()
+                    for t, blob in rows:
+                        vec = np.frombuffer(blob, dtype=np.float32)
+                        self._remember(t, vec)
+                        found[t] = vec
+                        self.disk_hits += 1
+                        self.misses -= 1
+        return found
+
+    def put_many(self, texts, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            for t, vec in zip(texts, vectors):
+                self._remember(t, vec)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, text, vec) VALUES (?, ?, ?)",
+                    [(self.model_name, t, vec.tobytes()) for t, vec in zip(texts, vectors)],
+                )
+                self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "model": self.model_name,
+            "size": len(self._mem),
+            "max_items": self.max_items,
+            "memory_hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "disk_tier": self._db is not None,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> EmbeddingCache:
+    """Return the process-wide embedding cache (created on first use)."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = EmbeddingCache()
+    return _cache
+
+
+def encode_cached(model, texts, cache: EmbeddingCache = None, batch_size: int = 32,
+                  show_progress_bar: bool = False):
+    """
+    Encode texts through the embedding cache; only unseen texts reach the model.
+    Returns np.ndarray of shape (len(texts), EMBED_DIM) in input order.
+    """
+    cache = cache or get_embedding_cache()
+    texts = list(texts)
+    found = cache.get_many(texts)
+    todo = [t for t in dict.fromkeys(texts) if t not in found]
+    if todo:
+        vectors = model.encode(todo, batch_size=batch_size, show_progress_bar=show_progress_bar)
+        cache.put_many(todo, vectors)
+        found.update(zip(todo, np.asarray(vectors, dtype=np.float32)))
+    if not texts:
+        return np.zeros((0, getattr(model, "dim", EMBED_DIM)), dtype=np.float32)
+    return np.stack([found[t] for t in texts])
+
+
+def build_dataset(df, path: str = DATASET_PATH, model=None, workers: int = None,
+                  cache_path: str = EMBED_CACHE_PATH, stats: dict = None, source: str = None):
+    """
+    Normalize and embed df["description"], then write df with its normalized
+    texts and embeddings as a new dataset version at `path`.
+    Rows are encoded in shards (see app/core/parallel_embed.py) on a process
+    pool of `workers` (default EMBED_WORKERS, 0 = auto), or in this process
+    with `model` when one is passed. Interrupted runs resume.
+    Returns (embeddings of shape (n_samples, dim), dataset metadata).
+    """
+    from app.core.parallel_embed import EMBED_WORKERS, embed_dataset
+
     if "description" not in df.columns:
-        raise ValueError("Input CSV must contain a 'description' column")
+        raise ValueError("Dataset must contain a 'description' column")
+    if workers is None:
+        workers = 1 if model is not None else EMBED_WORKERS
 
-    # Normalize merchant text before embedding
-    print("🔹 Normalizing descriptions...")
-    df["normalized_text"] = df["description"].apply(normalize_transaction)
+    # Scratch memmap the shards write into; the dataset is the durable copy
+    scratch = f"{path}.embeddings.npy"
+    embeddings, texts = embed_dataset(df["description"].tolist(), scratch, workers=workers,
+                                      model=model, cache_path=cache_path, stats=stats)
+    df["normalized_text"] = texts
+    meta = write_dataset(df, path, embeddings=embeddings,
+                         model_name=getattr(model, "name", None), source=source)
+    embeddings = np.array(embeddings)
+    os.remove(scratch)
+    return embeddings, meta
 
-    print("🔹 Generating embeddings...")
-    embeddings = model.encode(df["normalized_text"].tolist(), batch_size=32, show_progress_bar=True)
 
-    os.makedirs(os.path.dirname(EMBED_SAVE_PATH), exist_ok=True)
-    np.save(EMBED_SAVE_PATH, embeddings)
-    np.save(TEXT_SAVE_PATH, df["normalized_text"].to_numpy())
+def generate_embeddings(csv_path: str = CSV_PATH, model=None, workers: int = None):
+    """
+    Generate embeddings for transaction descriptions and build the dataset.
+    Returns: (np.ndarray of shape (n_samples, EMBED_DIM), DataFrame)
+    """
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    print("🔹 Normalizing descriptions and generating embeddings...")
+    embeddings, meta = build_dataset(df, DATASET_PATH, model=model, workers=workers, source=csv_path)
+    # Tagged like the dataset, with the embedder that produced the vectors
+    write_store(embeddings, df["normalized_text"].tolist(), labels=df["category"].tolist(),
+                model_name=meta["embedding_model"])
 
-    print(f"✅ Saved embeddings → {EMBED_SAVE_PATH}")
     print(f"✅ Shape: {embeddings.shape}")
     return embeddings, df
 
 
 if __name__ == "__main__":
     # quick demo: run directly to generate embeddings for processed dataset
-    csv_path = "data/processed/transactions.csv"
-    if os.path.exists(csv_path):
-        model = load_model()
-        generate_embeddings(csv_path, model)
+    if os.path.exists(CSV_PATH):
+        generate_embeddings(CSV_PATH)
     else:
         print("⚠️ Dataset not found at data/processed/transactions.csv. Run prepare_data.py first.")
\ No newline at end of file
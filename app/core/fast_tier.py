@@ -0,0 +1,176 @@
+# app/core/fast_tier.py
+"""
+Cheap-first Cascade Tier
+A linear model over the character n-grams of the normalized merchant text.
+It sits between the rules and the MiniLM + Logistic Regression path: when it is
+confident (probability ≥ threshold) its answer is returned without computing a
+transformer embedding; otherwise the input escalates to the full model.
+
+Training fits sklearn's LogisticRegression on l2-normalized n-gram counts; the
+n-gram vocabulary and weights are then exported to a .npz, like the full
+model's (app/core/linear_model.py), and scored here with NumPy, so serving
+imports neither sklearn nor scipy. N-grams outside the vocabulary are ignored.
+
+The threshold is tuned on the same held-out split train_classifier evaluates
+on, picking the lowest threshold whose answered rows reach the target accuracy.
+FAST_TIER_THRESHOLD overrides it at serving time; FAST_TIER=0 disables the tier.
+"""
+
+import json
+import os
+import re
+import uuid
+
+import numpy as np
+
+from app.core.linear_model import PARITY_ATOL, LinearSoftmax
+
+FAST_TIER_ENABLED = os.getenv("FAST_TIER", "1") != "0"
+FAST_TIER_THRESHOLD = os.getenv("FAST_TIER_THRESHOLD")          # None → tuned value
+FAST_TIER_TARGET_ACCURACY = float(os.getenv("FAST_TIER_TARGET_ACCURACY", "0.99"))
+NGRAM_RANGE = (2, 4)
+# Starts at decision.CONF_THRESHOLD: the fast tier never accepts what the full model would not
+THRESHOLD_GRID = (0.75, 0.8, 0.85, 0.9, 0.95, 0.97, 0.99, 0.995, 0.999)
+_WHITESPACE = re.compile(r"\s\s+")
+
+
+def char_ngrams(text: str, ngram_range=NGRAM_RANGE) -> list:
+    """Character n-grams inside word boundaries, words padded with spaces (sklearn's char_wb)."""
+    min_n, max_n = ngram_range
+    ngrams = []
+    for w in _WHITESPACE.sub(" ", str(text).lower()).split():
+        w = f" {w} "
+        for n in range(min_n, max_n + 1):
+            if len(w) <= n:
+                # A short word is counted once, whole
+                ngrams.append(w)
+                break
+            ngrams.extend(w[i:i + n] for i in range(len(w) - n + 1))
+    return ngrams
+
+
+class CharNgramClassifier:
+    """Char n-gram counts over a fitted vocabulary → multinomial Logistic Regression."""
+
+    def __init__(self, ngram_range=NGRAM_RANGE):
+        self.ngram_range = tuple(ngram_range)
+        self.vocabulary = {}
+        self.linear = None
+        # Disabled until tuned; see tune_threshold
+        self.threshold = 1.01
+        self.tuning = []
+
+    @property
+    def classes_(self):
+        return self.linear.classes_
+
+    def _features(self, texts):
+        """(rows, columns, values) of the l2-normalized n-gram counts, in vocabulary columns."""
+        rows, cols, vals = [], [], []
+        for i, text in enumerate(texts):
+            counts = {}
+            for gram in char_ngrams(text, self.ngram_range):
+                col = self.vocabulary.get(gram)
+                if col is not None:
+                    counts[col] = counts.get(col, 0) + 1
+            if counts:
+                v = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+                rows.extend([i] * len(counts))
+                cols.extend(counts)
+                vals.append(v / np.linalg.norm(v))
+        vals = np.concatenate(vals) if vals else np.zeros(0, dtype=np.float32)
+        return np.asarray(rows, dtype=np.int64), np.asarray(cols, dtype=np.int64), vals
+
+    def fit(self, texts, y):
+        from scipy.sparse import csr_matrix
+        from sklearn.linear_model import LogisticRegression
+        self.vocabulary = {}
+        for text in texts:
+            for gram in char_ngrams(text, self.ngram_range):
+                self.vocabulary.setdefault(gram, len(self.vocabulary))
+        rows, cols, vals = self._features(texts)
+        X = csr_matrix((vals, (rows, cols)), shape=(len(texts), len(self.vocabulary)))
+        model = LogisticRegression(max_iter=1000, class_weight="balanced").fit(X, y)
+        self.linear = LinearSoftmax.from_sklearn(model)
+        # Same check export_linear runs for the full model
+        sample = np.arange(min(len(texts), 1000))
+        diff = float(np.max(np.abs(model.predict_proba(X[sample]) - self.predict_proba(
+            [texts[i] for i in sample])))) if len(sample) else 0.0
+        if diff > PARITY_ATOL:
+            raise ValueError(f"NumPy fast tier diverges from sklearn (max prob diff {diff:.2e})")
+        return self
+
+    def predict_proba(self, texts) -> np.ndarray:
+        rows, cols, vals = self._features(texts)
+        weights = self.linear._weights
+        scores = np.tile(self.linear._bias, (len(texts), 1))
+        # Only the few vocabulary columns each text hits contribute
+        np.add.at(scores, rows, vals[:, None] * weights[cols])
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def save(self, path: str):
+        """Write the vocabulary, weights and threshold as an .npz (atomically, via a temp file)."""
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp.npz"
+        try:
+            np.savez(tmp, ngrams=np.asarray(list(self.vocabulary), dtype=str),
+                     ngram_range=np.asarray(self.ngram_range), coef=self.linear.coef_,
+                     intercept=self.linear.intercept_, classes=self.linear.classes_.astype(str),
+                     threshold=np.float64(self.threshold), tuning=json.dumps(self.tuning))
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    @classmethod
+    def load(cls, path: str) -> "CharNgramClassifier":
+        with np.load(path, allow_pickle=False) as data:
+            model = cls(tuple(int(n) for n in data["ngram_range"]))
+            model.vocabulary = {str(g): i for i, g in enumerate(data["ngrams"])}
+            model.linear = LinearSoftmax(data["coef"], data["intercept"], data["classes"])
+            model.threshold = float(data["threshold"])
+            model.tuning = json.loads(str(data["tuning"]))
+        return model
+
+    def tune_threshold(self, texts, y_true, full_pred, target_accuracy: float = FAST_TIER_TARGET_ACCURACY):
+        """
+        Sweep THRESHOLD_GRID on held-out rows. For each threshold record the share
+        of rows the fast tier answers, its accuracy on them, and the accuracy of the
+        whole cascade (fast answers + full-model predictions for the rest).
+        """
+        y_true, full_pred = np.asarray(y_true), np.asarray(full_pred)
+        probs = self.predict_proba(texts)
+        pred = self.classes_[probs.argmax(axis=1)]
+        conf = probs.max(axis=1)
+        self.tuning = []
+        chosen = None
+        for t in THRESHOLD_GRID:
+            answered = conf >= t
+            fast_acc = float(np.mean(pred[answered] == y_true[answered])) if answered.any() else 1.0
+            cascade = np.where(answered, pred, full_pred)
+            self.tuning.append({
+                "threshold": t,
+                "coverage": round(float(answered.mean()), 4),
+                "fast_accuracy": round(fast_acc, 4),
+                "cascade_accuracy": round(float(np.mean(cascade == y_true)), 4),
+            })
+            if chosen is None and answered.any() and fast_acc >= target_accuracy:
+                chosen = t
+        self.threshold = chosen if chosen is not None else 1.01
+        return self.threshold
+
+
+def serving_threshold(fast_model) -> float:
+    """Threshold in effect: the FAST_TIER_THRESHOLD override, else the tuned one."""
+    return float(FAST_TIER_THRESHOLD) if FAST_TIER_THRESHOLD else fast_model.threshold
+
+
+def print_tuning(fast_model, full_accuracy: float):
+    print(f"🔹 Fast tier thresholds (full model accuracy {full_accuracy:.4f}):")
+    print(f"{'threshold':>10} {'coverage':>9} {'fast acc':>9} {'cascade acc':>12}")
+    for row in fast_model.tuning:
+        mark = "  ←" if row["threshold"] == fast_model.threshold else ""
+        print(f"{row['threshold']:>10} {row['coverage']:>9.2%} {row['fast_accuracy']:>9.4f} "
+              f"{row['cascade_accuracy']:>12.4f}{mark}")
@@ -0,0 +1,147 @@
+# app/core/feedback_store.py
+"""
+Append-only Feedback Store
+User corrections live in a SQLite database in WAL mode: each submission is one
+O(1) INSERT, concurrent writers (threads or uvicorn workers) are serialized by
+SQLite instead of overwriting each other, and readers such as the retrain
+script fetch only rows newer than a checkpoint id.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+FEEDBACK_DB_PATH = os.getenv("FEEDBACK_DB_PATH", "data/feedback.sqlite")
+LEGACY_CSV_PATH = "data/feedback.csv"
+# Id of the last feedback row merged into the training set (written by retrain)
+CHECKPOINT_PATH = "data/processed/feedback_checkpoint.json"
+FIELDS = ["description", "predicted_category", "corrected_category", "method", "confidence"]
+_INSERT = f"INSERT INTO feedback ({', '.join(FIELDS)}, created_at) VALUES (?, ?, ?, ?, ?, ?)"
+
+
+class FeedbackStore:
+    """Thread-safe, append-only store of feedback rows with monotonically increasing ids."""
+
+    def __init__(self, path: str = FEEDBACK_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS feedback ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " description TEXT NOT NULL,"
+            " predicted_category TEXT,"
+            " corrected_category TEXT NOT NULL,"
+            " method TEXT,"
+            " confidence REAL,"
+            " created_at REAL NOT NULL)"
+        )
+        conn.commit()
+        self._import_legacy_csv()
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _import_legacy_csv(self):
+        """
+        One-time import of the old data/feedback.csv into an empty store.
+        The emptiness check and the insert share one BEGIN IMMEDIATE transaction:
+        of several workers starting at once, one imports and the others wait for
+        its write lock, then find the store filled.
+        """
+        if not os.path.exists(LEGACY_CSV_PATH) or self.count() > 0:
+            return
+        import pandas as pd
+        df = pd.read_csv(LEGACY_CSV_PATH)
+        if not len(df):
+            return
+        now = time.time()
+        rows = [[item.get(f) for f in FIELDS] + [now] for item in df.reindex(columns=FIELDS).to_dict("records")]
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            empty = conn.execute("SELECT COUNT(*) FROM feedback").fetchone()[0] == 0
+            if empty:
+                conn.executemany(_INSERT, rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if empty:
+            print(f"🔹 Imported {len(rows)} feedback rows from {LEGACY_CSV_PATH}")
+
+    def add(self, item: dict) -> int:
+        """Append one feedback row; returns its id."""
+        conn = self._conn()
+        with conn:
+            cur = conn.execute(_INSERT, [item.get(f) for f in FIELDS] + [time.time()])
+        return cur.lastrowid
+
+    def add_many(self, items) -> int:
+        """Append many rows in one transaction; returns how many were written."""
+        now = time.time()
+        rows = [[item.get(f) for f in FIELDS] + [now] for item in items]
+        conn = self._conn()
+        with conn:
+            conn.executemany(_INSERT, rows)
+        return len(rows)
+
+    def count(self) -> int:
+        return self._conn().execute("SELECT COUNT(*) FROM feedback").fetchone()[0]
+
+    def last_id(self) -> int:
+        return self._conn().execute("SELECT COALESCE(MAX(id), 0) FROM feedback").fetchone()[0]
+
+    def read_since(self, after_id: int = 0):
+        """All rows with id > after_id, oldest first, as a DataFrame."""
+        import pandas as pd
+        return pd.read_sql_query(
+            f"SELECT id, {', '.join(FIELDS)} FROM feedback WHERE id > ? ORDER BY id",
+            self._conn(), params=(after_id,),
+        )
+
+
+def read_checkpoint(path: str = CHECKPOINT_PATH) -> int:
+    if not os.path.exists(path):
+        return 0
+    with open(path) as f:
+        return int(json.load(f).get("last_feedback_id", 0))
+
+
+def merged_checkpoint(path: str = CHECKPOINT_PATH) -> int:
+    """
+    Id of the last feedback row merged into the retrained dataset. 0 when that
+    dataset is gone: the checkpoint then no longer describes any training data.
+    """
+    from app.core.dataset import RETRAINED_DATASET_PATH
+    return read_checkpoint(path) if os.path.exists(RETRAINED_DATASET_PATH) else 0
+
+
+def write_checkpoint(last_id: int, path: str = CHECKPOINT_PATH):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump({"last_feedback_id": int(last_id)}, f)
+    os.replace(tmp, path)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_feedback_store() -> FeedbackStore:
+    """Return the process-wide feedback store (created on first use)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = FeedbackStore()
+    return _store
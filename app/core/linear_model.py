@@ -0,0 +1,114 @@
+# app/core/linear_model.py
+"""
+NumPy Inference for the Linear Classifier
+The serving path only needs the trained LogisticRegression's coef_, intercept_
+and classes_. They are exported next to each model version as a small .npz,
+and scored here with one matmul + softmax:
+
+  • no sklearn import or joblib unpickling at load time
+  • no per-call input validation / dispatch overhead
+  • the same object answers single rows, batches and top-k queries
+
+Every export is checked against sklearn's predict_proba before it is written
+(see export_linear); scripts/bench_classifier.py compares the two for speed.
+"""
+
+import os
+import uuid
+
+import numpy as np
+
+# Max absolute probability difference accepted between NumPy and sklearn
+PARITY_ATOL = 1e-5
+
+
+class LinearSoftmax:
+    """Multinomial logistic regression scorer over exported weights."""
+
+    def __init__(self, coef, intercept, classes):
+        # Same shapes as sklearn's, so they can warm-start the next fit
+        self.coef_ = np.asarray(coef, dtype=np.float32)
+        self.intercept_ = np.asarray(intercept, dtype=np.float32)
+        self.classes_ = np.asarray(classes)
+        coef, intercept = self.coef_, self.intercept_
+        if coef.shape[0] == 1:
+            # Binary sklearn models keep one row (positive class); softmax over
+            # [0, d] equals its sigmoid
+            coef = np.vstack([np.zeros_like(coef), coef])
+            intercept = np.concatenate([np.zeros(1, dtype=np.float32), intercept])
+        # Pre-transposed, contiguous weights for X @ W
+        self._weights = np.ascontiguousarray(coef.T)
+        self._bias = intercept
+
+    @classmethod
+    def from_sklearn(cls, clf) -> "LinearSoftmax":
+        return cls(clf.coef_, clf.intercept_, clf.classes_)
+
+    @property
+    def n_features_in_(self) -> int:
+        return self._weights.shape[0]
+
+    def decision_function(self, X) -> np.ndarray:
+        return np.asarray(X, dtype=np.float32) @ self._weights + self._bias
+
+    def predict_proba(self, X) -> np.ndarray:
+        """Class probabilities for a (n, dim) batch (or one (dim,) row → (1, n_classes))."""
+        scores = np.atleast_2d(self.decision_function(X))
+        scores -= scores.max(axis=1, keepdims=True)
+        np.exp(scores, out=scores)
+        scores /= scores.sum(axis=1, keepdims=True)
+        return scores
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_[np.atleast_2d(self.decision_function(X)).argmax(axis=1)]
+
+    def predict_one(self, x):
+        """(category, probability) of the most likely class for one vector."""
+        probs = self.predict_proba(x)[0]
+        best = int(probs.argmax())
+        return self.classes_[best], float(probs[best])
+
+    def top_k(self, X, k: int = 3):
+        """Per row, the k most likely (category, probability) pairs, best first."""
+        probs = self.predict_proba(X)
+        k = min(k, probs.shape[1])
+        idx = np.argpartition(-probs, k - 1, axis=1)[:, :k]
+        order = np.take_along_axis(probs, idx, axis=1).argsort(axis=1)[:, ::-1]
+        idx = np.take_along_axis(idx, order, axis=1)
+        return [[(self.classes_[j], float(row[j])) for j in cols] for row, cols in zip(probs, idx)]
+
+    def save(self, path: str):
+        """Write the weights as an .npz (atomically, via a temp file)."""
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp.npz"
+        try:
+            np.savez(tmp, coef=self.coef_, intercept=self.intercept_,
+                     classes=self.classes_.astype(str))
+            os.replace(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    @classmethod
+    def load(cls, path: str) -> "LinearSoftmax":
+        with np.load(path, allow_pickle=False) as data:
+            return cls(data["coef"], data["intercept"], data["classes"])
+
+
+def check_parity(clf, linear: LinearSoftmax, X) -> float:
+    """Max |p_sklearn - p_numpy| on X; raises if it exceeds PARITY_ATOL or labels disagree."""
+    X = np.asarray(X)
+    expected = clf.predict_proba(X)
+    actual = linear.predict_proba(X)
+    diff = float(np.max(np.abs(expected - actual))) if len(X) else 0.0
+    if diff > PARITY_ATOL or [str(c) for c in linear.classes_] != [str(c) for c in clf.classes_]:
+        raise ValueError(f"NumPy inference diverges from sklearn (max prob diff {diff:.2e})")
+    return diff
+
+
+def export_linear(clf, path: str, X_check=None) -> LinearSoftmax:
+    """Export clf's weights to path, after a parity check on X_check (if given)."""
+    linear = LinearSoftmax.from_sklearn(clf)
+    if X_check is not None:
+        check_parity(clf, linear, X_check)
+    linear.save(path)
+    return linear
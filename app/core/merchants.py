@@ -0,0 +1,284 @@
+# app/core/merchants.py
+"""
+Merchant Dictionary
+Canonical merchant names and their aliases, loaded from merchants.csv
+(`merchant,aliases` with aliases separated by "|"), plus the two lookups
+canonicalize_merchant uses:
+
+  • match_alias   exact abbreviations ("amzn" → amazon): single-word aliases
+                  resolve through a dict, multi-word ones through compiled
+                  regexes; when a text holds several, the first alias listed
+                  in the file wins
+  • lookup        fuzzy match against every name and alias
+
+Small dictionaries are scanned linearly, exactly as before. Large ones (a
+merchant master of 100k+ names) go through a character trigram inverted index:
+
+  • every name / alias is stored in token-sorted form (what token_sort_ratio
+    compares) and split into padded trigrams
+  • a query reads only the posting lists of its rarest trigrams (enough that
+    any entry within the score cutoff must appear in one), drops entries
+    whose length rules out the cutoff, and keeps the MERCHANT_CANDIDATES
+    entries with the most shared trigrams
+  • only those candidates are scored with rapidfuzz
+
+The built index (CSR postings as .npy arrays) is saved next to the data and
+reused while the source file is unchanged, so a restart does not rebuild it.
+"""
+
+import csv
+import hashlib
+import os
+import re
+import threading
+import time
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+MERCHANTS_PATH = os.getenv("MERCHANTS_PATH", os.path.join(os.path.dirname(__file__), "merchants.csv"))
+MERCHANT_INDEX_PATH = os.getenv("MERCHANT_INDEX_PATH", "data/processed/merchant_index.npz")
+# Below this many names + aliases a linear scan is as fast as the index
+INDEX_MIN_ENTRIES = int(os.getenv("MERCHANT_INDEX_MIN_ENTRIES", "2000"))
+MERCHANT_CANDIDATES = int(os.getenv("MERCHANT_CANDIDATES", "256"))
+INDEX_VERSION = 2
+
+
+def _sorted_tokens(text: str) -> str:
+    return " ".join(sorted(text.split()))
+
+
+def _trigrams(text: str):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def load_merchants_file(path: str = MERCHANTS_PATH):
+    """Ordered list of (merchant, [aliases]) from a merchants CSV."""
+    entries = []
+    with open(path, encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            name = (row.get("merchant") or "").strip().lower()
+            if not name:
+                continue
+            aliases = [a.strip().lower() for a in (row.get("aliases") or "").split("|") if a.strip()]
+            entries.append((name, aliases))
+    return entries
+
+
+def _file_digest(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class MerchantIndex:
+    """Fuzzy merchant lookup over names + aliases, trigram-pruned when large."""
+
+    def __init__(self, entries, digest: str = None, min_indexed: int = INDEX_MIN_ENTRIES):
+        self.merchants = []
+        surfaces, owners = [], []
+        self.aliases = []
+        for merchant_id, (name, aliases) in enumerate(entries):
+            self.merchants.append(name)
+            self.aliases.extend((alias, merchant_id) for alias in aliases)
+            # The name first, so ties resolve to it, as with a plain list scan
+            for surface in dict.fromkeys([name, *aliases]):
+                surfaces.append(surface)
+                owners.append(merchant_id)
+        self.surfaces = surfaces
+        self.owners = np.asarray(owners, dtype=np.int32)
+        self.digest = digest
+        self._build_aliases()
+        self.indexed = len(surfaces) >= min_indexed
+        self._vocab = {}
+        self._offsets = self._postings = self._lengths = None
+        if self.indexed:
+            self._build()
+
+    def __len__(self):
+        return len(self.surfaces)
+
+    def _build(self):
+        keyed = [_sorted_tokens(s) for s in self.surfaces]
+        postings = {}
+        for i, surface in enumerate(keyed):
+            for gram in _trigrams(surface):
+                postings.setdefault(gram, []).append(i)
+        grams = sorted(postings)
+        self._vocab = {g: k for k, g in enumerate(grams)}
+        sizes = np.fromiter((len(postings[g]) for g in grams), dtype=np.int64, count=len(grams))
+        self._offsets = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+        self._postings = np.fromiter((i for g in grams for i in postings[g]), dtype=np.int32,
+                                     count=int(self._offsets[-1]))
+        self._lengths = np.fromiter((len(s) for s in keyed), dtype=np.int32, count=len(keyed))
+
+    def _build_aliases(self):
+        # Each alias keeps its position in the file, so the first one listed wins
+        self._alias_tokens, self._alias_phrases = {}, []
+        for priority, (alias, merchant_id) in enumerate(self.aliases):
+            canonical = self.merchants[merchant_id]
+            if " " in alias:
+                self._alias_phrases.append((priority, re.compile(rf"\b{re.escape(alias)}\b"), canonical))
+            else:
+                self._alias_tokens.setdefault(alias, (priority, canonical))
+
+    # ---- lookup ----------------------------------------------------------
+
+    def match_alias(self, text: str):
+        """Canonical name of the first alias (in file order) present in cleaned text, else None."""
+        best = None
+        for token in text.split():
+            hit = self._alias_tokens.get(token)
+            if hit is not None and (best is None or hit[0] < best[0]):
+                best = hit
+        for priority, rx, canonical in self._alias_phrases:
+            if best is not None and priority > best[0]:
+                break
+            if rx.search(text):
+                best = (priority, canonical)
+                break
+        return best[1] if best else None
+
+    def candidates(self, text: str, limit: int = MERCHANT_CANDIDATES, cutoff: float = 0):
+        """Surface ids likely to score ≥ cutoff against text, best trigram overlap first."""
+        key = _sorted_tokens(text)
+        grams = _trigrams(key)
+        lists = sorted((self._postings[self._offsets[k]:self._offsets[k + 1]]
+                        for k in (self._vocab.get(g) for g in grams) if k is not None), key=len)
+        if not lists:
+            return np.zeros(0, dtype=np.int64)
+        c = cutoff / 100.0
+        lo, hi = len(key) * c / (2 - c) - 1e-9, len(key) * (2 - c) / c + 1e-9
+        # A match within the cutoff is at most `edits` insertions/deletions
+        # away, each removing at most 3 of the query's trigrams, so it shares
+        # at least `need` of them and appears in one of the rarest
+        # len(lists) - need + 1 postings: the long lists are skipped
+        edits = int((1 - c) * (len(key) + hi)) if cutoff else len(key)
+        need = max(1, len(grams) - 3 * edits)
+        lists = lists[:len(lists) - min(need, len(lists)) + 1]
+        ids, counts = np.unique(np.concatenate(lists), return_counts=True)
+        if cutoff:
+            # ratio = 2·matches / (len_a + len_b) ≥ cutoff bounds len_b to [lo, hi]
+            lengths = self._lengths[ids]
+            keep = (lengths >= lo) & (lengths <= hi)
+            ids, counts = ids[keep], counts[keep]
+        if len(ids) > limit:
+            ids = ids[np.argpartition(-counts, limit - 1)[:limit]]
+        # Dictionary order, so ties resolve as in a linear scan
+        return np.sort(ids)
+
+    def lookup(self, text: str, cutoff: float):
+        """(canonical merchant, score) of the best name/alias scoring ≥ cutoff, else None."""
+        if self.indexed:
+            ids = self.candidates(text, cutoff=cutoff)
+            choices = [self.surfaces[i] for i in ids]
+        else:
+            ids, choices = None, self.surfaces
+        if not choices:
+            return None
+        match = process.extractOne(text, choices, scorer=fuzz.token_sort_ratio, score_cutoff=cutoff)
+        if match is None:
+            return None
+        surface_id = match[2] if ids is None else int(ids[match[2]])
+        return self.merchants[self.owners[surface_id]], match[1]
+
+    def lookup_many(self, texts, cutoff: float):
+        """lookup() for many texts; a small dictionary is scored in one cdist call."""
+        texts = list(texts)
+        if self.indexed or not texts:
+            return [self.lookup(t, cutoff) for t in texts]
+        scores = process.cdist(texts, self.surfaces, scorer=fuzz.token_sort_ratio, workers=-1)
+        best = np.argmax(scores, axis=1)
+        return [(self.merchants[self.owners[j]], float(row[j])) if row[j] >= cutoff else None
+                for j, row in zip(best, scores)]
+
+    # ---- persistence -----------------------------------------------------
+
+    def save(self, path: str = MERCHANT_INDEX_PATH):
+        """Write the built index atomically (arrays only, no pickle)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = f"{path}.tmp.npz"
+        arrays = {
+            "meta": np.array([str(INDEX_VERSION), self.digest or ""]),
+            "merchants": np.array(self.merchants, dtype=str),
+            "surfaces": np.array(self.surfaces, dtype=str),
+            "owners": self.owners,
+            "aliases": np.array([a for a, _ in self.aliases], dtype=str),
+            "alias_owners": np.array([m for _, m in self.aliases], dtype=np.int32),
+        }
+        if self.indexed:
+            arrays.update(vocab=np.array(list(self._vocab), dtype=str), offsets=self._offsets,
+                          postings=self._postings, lengths=self._lengths)
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+        return path
+
+    @classmethod
+    def load(cls, path: str = MERCHANT_INDEX_PATH) -> "MerchantIndex":
+        with np.load(path, allow_pickle=False) as data:
+            if data["meta"][0] != str(INDEX_VERSION):
+                raise ValueError(f"Unsupported merchant index version at {path}")
+            index = cls.__new__(cls)
+            index.digest = str(data["meta"][1]) or None
+            index.merchants = data["merchants"].tolist()
+            index.surfaces = data["surfaces"].tolist()
+            index.owners = data["owners"]
+            index.aliases = list(zip(data["aliases"].tolist(), data["alias_owners"].tolist()))
+            index.indexed = "vocab" in data
+            index._vocab = {g: k for k, g in enumerate(data["vocab"].tolist())} if index.indexed else {}
+            index._offsets = data["offsets"] if index.indexed else None
+            index._postings = data["postings"] if index.indexed else None
+            index._lengths = data["lengths"] if index.indexed else None
+        index._build_aliases()
+        return index
+
+
+def build_index(path: str = MERCHANTS_PATH, index_path: str = MERCHANT_INDEX_PATH) -> MerchantIndex:
+    """
+    The index for a merchants file: reloaded from index_path when it was built
+    from the same file contents, otherwise built (and saved, if large).
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Merchant dictionary not found at {path} (set MERCHANTS_PATH)")
+    digest = _file_digest(path)
+    if index_path and os.path.exists(index_path):
+        try:
+            index = MerchantIndex.load(index_path)
+            if index.digest == digest:
+                return index
+        except (OSError, ValueError, KeyError):
+            pass
+    start = time.perf_counter()
+    index = MerchantIndex(load_merchants_file(path), digest=digest)
+    if index.indexed:
+        print(f"🔹 Built merchant index: {len(index.merchants)} merchants, {len(index)} names "
+              f"in {time.perf_counter() - start:.2f}s")
+        if index_path:
+            index.save(index_path)
+    return index
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_merchant_index() -> MerchantIndex:
+    """Return the process-wide merchant index (built or reloaded on first use)."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = build_index()
+    return _index
+
+
+# 🧪 Build / inspect
+if __name__ == "__main__":
+    start = time.perf_counter()
+    index = build_index()
+    mode = "trigram index" if index.indexed else "linear scan"
+    print(f"✅ {len(index.merchants)} merchants, {len(index)} names, {len(index.aliases)} aliases ({mode}) "
+          f"ready in {time.perf_counter() - start:.3f}s")
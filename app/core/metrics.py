@@ -0,0 +1,218 @@
+# app/core/metrics.py
+"""
+Lightweight In-process Metrics
+Counters and fixed-bucket latency histograms rendered in the Prometheus text
+exposition format on GET /metrics. An observation is one bisect plus a few
+additions under a lock, cheap enough to stay enabled under full load; set
+METRICS_ENABLED=0 to turn recording off entirely.
+
+Values that already live elsewhere (cache statistics, batcher queue depth)
+are read at scrape time through registered collector callbacks.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") != "0"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds; tuned for sub-millisecond rules up to multi-second bulk requests
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _fmt(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, optionally split by label values."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, doc: str, labelnames=()):
+        self.name, self.doc, self.labelnames = name, doc, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount: float = 1):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, k)} {_fmt(v)}" for k, v in items]
+
+
+class Histogram:
+    """Cumulative-bucket histogram of observed values (seconds)."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, doc: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name, self.doc, self.labelnames = name, doc, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}           # labels → [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels):
+        if not METRICS_ENABLED:
+            return
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[i] += 1
+            series[-1] += value
+
+    def time(self, *labels):
+        """Context manager that observes the elapsed time of its block."""
+        return _Timer(self, labels)
+
+    def render(self):
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = []
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_fmt(series[-1])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("hist", "labels", "start")
+
+    def __init__(self, hist, labels):
+        self.hist, self.labels = hist, labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.start, *self.labels)
+        return False
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, fn):
+        """fn() → iterable of (name, kind, doc, labelnames, {label values tuple: value})."""
+        self._collectors.append(fn)
+        return fn
+
+    def render(self) -> str:
+        lines = []
+        for m in self._metrics:
+            lines += [f"# HELP {m.name} {m.doc}", f"# TYPE {m.name} {m.kind}", *m.render()]
+        for fn in self._collectors:
+            for name, kind, doc, labelnames, values in fn():
+                lines += [f"# HELP {name} {doc}", f"# TYPE {name} {kind}"]
+                lines += [f"{name}{_labels(labelnames, k)} {_fmt(v)}" for k, v in values.items()]
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_metrics() -> MetricsRegistry:
+    """Return the process-wide metrics registry."""
+    return _registry
+
+
+# Pipeline metrics shared by the decision layer and the API
+STAGE_SECONDS = _registry.register(Histogram(
+    "transactly_stage_seconds", "Time spent in each decision pipeline stage.", ("stage", "mode")))
+DECISIONS = _registry.register(Counter(
+    "transactly_decisions_total", "Decisions by method and final category.", ("method", "category")))
+HTTP_SECONDS = _registry.register(Histogram(
+    "transactly_http_request_seconds", "HTTP request latency by route.", ("method", "route", "status")))
+
+
+def _cache_collector():
+    from app.core.decision import get_decision_cache
+    from app.core.embeddings import get_embedding_cache
+    from app.core.preprocessing import _canonicalize_clean
+    emb = get_embedding_cache().stats()
+    dec = get_decision_cache().stats()
+    norm = _canonicalize_clean.cache_info()
+    norm_lookups = norm.hits + norm.misses
+    yield ("transactly_cache_lookups_total", "counter", "Cache lookups by cache and result.",
+           ("cache", "result"), {
+               ("embedding", "memory_hit"): emb["memory_hits"],
+               ("embedding", "disk_hit"): emb["disk_hits"],
+               ("embedding", "miss"): emb["misses"],
+               ("normalize", "hit"): norm.hits,
+               ("normalize", "miss"): norm.misses,
+               ("decision", "hit"): dec["hits"],
+               ("decision", "miss"): dec["misses"],
+           })
+    yield ("transactly_cache_hit_ratio", "gauge", "Fraction of cache lookups served from cache.",
+           ("cache",), {
+               ("embedding",): emb["hit_ratio"],
+               ("normalize",): round(norm.hits / norm_lookups, 4) if norm_lookups else 0.0,
+               ("decision",): dec["hit_ratio"],
+           })
+    yield ("transactly_cache_size", "gauge", "Entries currently held by each cache.",
+           ("cache",), {("embedding",): emb["size"], ("normalize",): norm.currsize,
+                        ("decision",): dec["size"]})
+    yield ("transactly_decision_cache_invalidations_total", "counter",
+           "Decision cache entries dropped by model changes, feedback, expiry or eviction.",
+           ("reason",), {("invalidated",): dec["invalidations"], ("expired",): dec["expired"],
+                         ("evicted",): dec["evictions"]})
+
+
+_registry.add_collector(_cache_collector)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route; unknown paths share one label."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            return await self.app(scope, receive, send)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # No route has path parameters, so matched paths are a bounded label set
+            route = scope["path"] if "endpoint" in scope else "unmatched"
+            HTTP_SECONDS.observe(time.perf_counter() - start, scope["method"], route, str(status[0]))
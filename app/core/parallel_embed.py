@@ -0,0 +1,192 @@
+# app/core/parallel_embed.py
+"""
+Sharded, Multi-core Dataset Embedding
+Normalizes and encodes a whole dataset in fixed-size shards on a process pool:
+
+  • every worker loads the embedding backend once, with cpu_count / workers
+    threads, so cores are split between processes instead of oversubscribed
+  • shard results go straight into a preallocated .npy memmap at their row
+    offset; the parent never holds more than one shard of vectors
+  • a shard is marked done (with its normalized texts) only after its rows are
+    flushed, so an interrupted run resumes from the completed shards
+  • workers read the persistent embedding cache; newly encoded vectors are
+    written back by the parent (the only writer)
+
+In-progress state lives in `<out_path>.parts/` and is discarded if the input
+rows, shard size or backend change.
+"""
+
+import json
+import os
+import shutil
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import multiprocessing as mp
+
+import numpy as np
+
+from app.core.embedding_backends import EMBED_DIM, EMBEDDING_BACKEND, OnnxBackend, backend_id, load_backend
+from app.core.embeddings import EMBED_CACHE_PATH, EmbeddingCache
+from app.core.preprocessing import normalize_many
+
+EMBED_WORKERS = int(os.getenv("EMBED_WORKERS", "0"))          # 0 = auto
+EMBED_SHARD_SIZE = int(os.getenv("EMBED_SHARD_SIZE", "20000"))
+
+_worker = {}
+
+
+def _fingerprint(descriptions) -> int:
+    crc = 0
+    for d in descriptions:
+        crc = zlib.crc32(str(d).encode("utf-8") + b"\0", crc)
+    return crc
+
+
+def _auto_workers(n_shards: int) -> int:
+    return max(1, min((os.cpu_count() or 1) // 2, n_shards))
+
+
+def resolve_workers(n_rows: int, workers: int = EMBED_WORKERS, shard_size: int = EMBED_SHARD_SIZE) -> int:
+    """Worker processes embed_dataset will actually use for n_rows (1 = in this process)."""
+    n_shards = max(1, -(-n_rows // shard_size))
+    return min(workers or _auto_workers(n_shards), n_shards)
+
+
+def _init_worker(backend, threads, out_path, cache_path, model=None):
+    """Per-process state: backend (loaded once), output memmap, read side of the cache."""
+    if model is None:
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+            os.environ[var] = str(threads)
+        if backend == "onnx":
+            model = OnnxBackend(threads=threads)
+        else:
+            model = load_backend(backend)
+            if backend == "sentence-transformers":
+                import torch
+                torch.set_num_threads(threads)
+    _worker["model"] = model
+    _worker["out"] = np.load(out_path, mmap_mode="r+")
+    _worker["cache"] = (EmbeddingCache(max_items=1, disk_path=cache_path, model_name=model.name)
+                        if cache_path else None)
+
+
+def _run_shard(shard, start, descriptions, batch_size, marker_path):
+    """Normalize + encode one shard into its rows; returns newly encoded (texts, vectors)."""
+    norm = normalize_many(descriptions)
+    unique = list(dict.fromkeys(norm))
+    cache = _worker["cache"]
+    table = cache.get_many(unique) if cache is not None else {}
+    todo = [t for t in unique if t not in table]
+    vectors = np.zeros((0, _worker["out"].shape[1]), dtype=np.float32)
+    if todo:
+        vectors = np.asarray(_worker["model"].encode(todo, batch_size=batch_size), dtype=np.float32)
+        table.update(zip(todo, vectors))
+
+    out = _worker["out"]
+    out[start:start + len(norm)] = np.stack([table[t] for t in norm])
+    out.flush()
+    # Written last: its presence means the shard's rows are on disk
+    tmp = f"{marker_path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(norm, f)
+    os.replace(tmp, marker_path)
+    return shard, todo, vectors, len(unique) - len(todo)
+
+
+def embed_dataset(descriptions, out_path: str, workers: int = EMBED_WORKERS,
+                  shard_size: int = EMBED_SHARD_SIZE, batch_size: int = 32,
+                  cache_path: str = EMBED_CACHE_PATH, backend: str = EMBEDDING_BACKEND,
+                  model=None, stats: dict = None):
+    """
+    Normalize and embed every description, in order, into an .npy at out_path.
+    Returns (embeddings memmap of shape (rows, dim), normalized texts).
+    With one worker the shards run in this process (using `model` if given).
+    Fills `stats` with shard, reuse and timing counts.
+    """
+    descriptions = list(descriptions)
+    n = len(descriptions)
+    if n == 0:
+        raise ValueError("No rows to embed")
+    n_shards = max(1, -(-n // shard_size))
+    workers = resolve_workers(n, workers, shard_size)
+    tag = getattr(model, "name", None) or backend_id(backend)
+    dim = getattr(model, "dim", EMBED_DIM)
+
+    parts = f"{out_path}.parts"
+    manifest = {"rows": n, "shard_size": shard_size, "backend": tag, "fingerprint": _fingerprint(descriptions)}
+    manifest_path = os.path.join(parts, "manifest.json")
+    array_path = os.path.join(parts, "embeddings.npy")
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            previous = json.load(f)
+        if {k: previous.get(k) for k in manifest} != manifest:
+            print(f"🔹 Input changed since the interrupted run; discarding {parts}")
+            shutil.rmtree(parts)
+
+    if not os.path.exists(manifest_path):
+        os.makedirs(parts, exist_ok=True)
+        # Preallocated output; shards write into their own row range
+        np.lib.format.open_memmap(array_path, mode="w+", dtype=np.float32, shape=(n, dim)).flush()
+        with open(manifest_path, "w") as f:
+            json.dump({**manifest, "dim": dim}, f)
+
+    def marker(shard):
+        return os.path.join(parts, f"shard_{shard:06d}.json")
+
+    pending = [s for s in range(n_shards) if not os.path.exists(marker(s))]
+    done_before = n_shards - len(pending)
+    if done_before:
+        print(f"🔹 Resuming: {done_before}/{n_shards} shards already done")
+    print(f"🔹 Embedding {n} rows in {n_shards} shards of {shard_size} on {workers} worker(s)...")
+
+    writer = EmbeddingCache(disk_path=cache_path, model_name=tag) if cache_path else None
+    start_time = time.perf_counter()
+    encoded = reused = 0
+
+    def collect(result):
+        nonlocal encoded, reused
+        shard, todo, vectors, hits = result
+        if writer is not None and todo:
+            writer.put_many(todo, vectors)
+        encoded += len(todo)
+        reused += hits
+        finished = done_before + completed
+        elapsed = time.perf_counter() - start_time
+        print(f"  shard {shard + 1}/{n_shards} done ({finished}/{n_shards}, {elapsed:.1f}s)")
+
+    jobs = [(s, s * shard_size, descriptions[s * shard_size:(s + 1) * shard_size], batch_size, marker(s))
+            for s in pending]
+    completed = 0
+    if workers == 1:
+        _init_worker(backend, os.cpu_count() or 1, array_path, cache_path, model=model or load_backend(backend))
+        for job in jobs:
+            completed += 1
+            collect(_run_shard(*job))
+        _worker.clear()
+    elif jobs:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn"),
+                                 initializer=_init_worker,
+                                 initargs=(backend, threads, array_path, cache_path)) as pool:
+            futures = [pool.submit(_run_shard, *job) for job in jobs]
+            for future in as_completed(futures):
+                completed += 1
+                collect(future.result())
+
+    texts = []
+    for s in range(n_shards):
+        with open(marker(s)) as f:
+            texts.extend(json.load(f))
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    os.replace(array_path, out_path)
+    shutil.rmtree(parts, ignore_errors=True)
+
+    if stats is not None:
+        stats.update({
+            "rows": n, "shards": n_shards, "resumed_shards": done_before, "workers": workers,
+            "encoded": encoded, "reused": reused,
+            "encode_seconds": round(time.perf_counter() - start_time, 3),
+        })
+    return np.load(out_path, mmap_mode="r"), texts
@@ -2,43 +2,22 @@
 """
 Text normalization and merchant canonicalization for Transactly.
 Ensures messy transaction strings like 'AMZN PMT #9283' → 'amazon'.
+Merchants and their aliases come from the merchant dictionary
+(app/core/merchants.csv via app/core/merchants.py): aliases are matched
+exactly, then names fuzzily, with a trigram index once the dictionary grows
+large. Matches are memoized, and normalize_many() handles whole datasets with
+de-duplication and batch scoring.
 """
 
 import re
+from functools import lru_cache
 import unidecode
-from rapidfuzz import process, fuzz
-
-# Known abbreviations or common short forms
-MERCHANT_ALIASES = {
-    "amzn": "amazon",
-    "fpt": "flipkart",
-    "swg": "swiggy",
-    "zmt": "zomato",
-    "irctc": "irctc",
-    "bpcl": "bharatpetrol",
-    "ioc": "indianoil",
-    "io": "indianoil",
-    "bb": "bigbasket",
-    "appl": "apple",
-    "yt": "youtube",
-    "bms": "bookmyshow",
-    "pvr": "pvr cinemas",
-    "mtx": "myntra",
-    "rfr": "reliance fresh",
-    "hdfc": "hdfc bank",
-}
-
-# Canonical merchant names (from your dataset)
-CANONICAL_MERCHANTS = [
-    "amazon", "flipkart", "myntra", "ajio", "meesho",
-    "swiggy", "zomato", "dominos", "starbucks",
-    "irctc", "uber", "ola", "indianoil", "hp petrol", "bharatpetrol",
-    "airindia", "indigo", "tneb", "airtel", "bsnl", "jio fiber",
-    "apollo pharmacy", "1mg", "cult fit", "medplus",
-    "netflix", "hotstar", "spotify", "bookmyshow",
-    "youtube premium", "google one", "apple music", "canva pro",
-    "bigbasket", "dunzo", "reliance fresh", "more supermarket"
-]
+from app.core.merchants import get_merchant_index
+
+FUZZY_SCORE_CUTOFF = 80
+
+_SYMBOLS_RE = re.compile(r"[^A-Za-z0-9\s]")
+_SPACES_RE = re.compile(r"\s+")
 
 
 def clean_text(text: str) -> str:
@@ -46,35 +25,71 @@ def clean_text(text: str) -> str:
     if not isinstance(text, str):
         return ""
     text = unidecode.unidecode(text)  # remove accents
-    text = re.sub(r"[^A-Za-z0-9\s]", " ", text)  # remove symbols
-    text = re.sub(r"\s+", " ", text)  # normalize spaces
+    text = _SYMBOLS_RE.sub(" ", text)  # remove symbols
+    text = _SPACES_RE.sub(" ", text)  # normalize spaces
     return text.strip().lower()
 
 
-def canonicalize_merchant(text: str) -> str:
-    """Normalize and map to canonical merchant name."""
-    text = clean_text(text)
-
-    # Try direct alias match
-    for alias, canonical in MERCHANT_ALIASES.items():
-        if re.search(rf"\b{alias}\b", text):
-            return canonical
+def _merchants():
+    return get_merchant_index()
 
-    # Fuzzy match against canonical list
-    match, score, _ = process.extractOne(text, CANONICAL_MERCHANTS, scorer=fuzz.token_sort_ratio)
-    if score >= 80:
-        return match
 
-    # Fallback: first token as guess (e.g., "swiggy order" -> "swiggy")
+def _fallback(text: str) -> str:
+    # First token as guess (e.g., "swiggy order" -> "swiggy")
     parts = text.split()
     return parts[0] if parts else text
 
 
+@lru_cache(maxsize=65536)
+def _canonicalize_clean(text: str) -> str:
+    """Canonicalize already-cleaned text (memoized)."""
+    # Try direct alias match
+    alias = _merchants().match_alias(text)
+    if alias is not None:
+        return alias
+
+    # Fuzzy match against the merchant dictionary
+    match = _merchants().lookup(text, FUZZY_SCORE_CUTOFF)
+    if match is not None:
+        return match[0]
+    return _fallback(text)
+
+
+def canonicalize_merchant(text: str) -> str:
+    """Normalize and map to canonical merchant name."""
+    return _canonicalize_clean(clean_text(text))
+
+
 def normalize_transaction(description: str) -> str:
     """Full normalization pipeline."""
-    clean_desc = clean_text(description)
-    merchant = canonicalize_merchant(clean_desc)
-    return merchant
+    return _canonicalize_clean(clean_text(description))
+
+
+def normalize_many(descriptions) -> list:
+    """
+    Batch normalize_transaction with identical results.
+    Each distinct description is cleaned once, each distinct cleaned text is
+    canonicalized once, and the fuzzy lookups go to the merchant dictionary
+    together (one rapidfuzz cdist call while it is small).
+    """
+    descriptions = list(descriptions)
+    cleaned = {d: clean_text(d) for d in dict.fromkeys(descriptions)}
+
+    merchants = _merchants()
+    resolved = {}
+    fuzzy = []
+    for text in dict.fromkeys(cleaned.values()):
+        alias = merchants.match_alias(text)
+        if alias is not None:
+            resolved[text] = alias
+        else:
+            fuzzy.append(text)
+
+    if fuzzy:
+        for text, match in zip(fuzzy, merchants.lookup_many(fuzzy, FUZZY_SCORE_CUTOFF)):
+            resolved[text] = match[0] if match is not None else _fallback(text)
+
+    return [resolved[cleaned[d]] for d in descriptions]
 
 
 # Demo run
@@ -0,0 +1,303 @@
+# app/core/registry.py
+"""
+Process-wide Model Registry
+Loads the embedder, classifier and explanation DB once and shares the
+handles between the API, the decision layer and the retrain script.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+# Marks the fast tier as "not looked up yet" (None means the version has none)
+_UNLOADED = object()
+
+
+def _rss_mb() -> float:
+    """Resident set size of this process in MB (best effort)."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is bytes on macOS, KB on Linux
+        return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+
+class ModelRegistry:
+    """
+    Thread-safe holder for the warm model handles.
+    Each component is loaded at most once; concurrent callers wait on the lock
+    instead of deserializing the same model twice.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._embedder = None
+        self._classifier = None
+        self._fast = _UNLOADED
+        self._embeddings_db = None
+        self._texts_db = None
+        self._db_loaded = False
+        self.model_version = None
+        # Set while the serving classifier is not the one CURRENT names on purpose
+        # (registered in memory, or swapped to an explicit version); see ModelWatcher
+        self.pinned = False
+        self.stats = {}
+        # cold → warming → ready | failed (see warm / prewarm_in_background)
+        self.warm_state = "cold"
+        self.warm_error = None
+        self.warm_seconds = None
+        # Called after the serving model or explanation DB is replaced
+        self._listeners = []
+
+    def _timed_load(self, name, loader):
+        rss_before = _rss_mb()
+        start = time.perf_counter()
+        obj = loader()
+        self.stats[name] = {
+            "load_seconds": round(time.perf_counter() - start, 4),
+            "rss_delta_mb": round(_rss_mb() - rss_before, 2),
+        }
+        print(f"✅ Loaded {name} in {self.stats[name]['load_seconds']:.2f}s "
+              f"(+{self.stats[name]['rss_delta_mb']:.1f} MB)")
+        return obj
+
+    @property
+    def embedder(self):
+        if self._embedder is None:
+            with self._lock:
+                if self._embedder is None:
+                    from app.core.embeddings import load_model as load_embedder
+                    self._embedder = self._timed_load("embedder", load_embedder)
+        return self._embedder
+
+    @property
+    def classifier(self):
+        if self._classifier is None:
+            with self._lock:
+                if self._classifier is None:
+                    from app.core.classifier import current_version, load_model, model_path_for
+                    version = current_version()
+                    model = self._timed_load("classifier", lambda: load_model(model_path_for(version)))
+                    # Only a successful load publishes the version, as in swap_classifier
+                    self._classifier, self.model_version = model, version
+        return self._classifier
+
+    @property
+    def fast_classifier(self):
+        """The char n-gram cascade tier of the serving version, or None if it has none."""
+        if self._fast is _UNLOADED:
+            _ = self.classifier
+            with self._lock:
+                if self._fast is _UNLOADED:
+                    from app.core.classifier import load_fast_model
+                    version = self.model_version
+                    self._fast = self._timed_load("fast_classifier", lambda: load_fast_model(version))
+        return self._fast
+
+    def swap_classifier(self, version: str = None) -> dict:
+        """
+        Zero-downtime switch to another saved model version (default: CURRENT).
+        The new model is loaded and warmed next to the live one, then both the
+        handle and the version are replaced in one step under the lock.
+        Requests already running keep the reference they started with.
+        """
+        from app.core.classifier import (current_version, list_versions, load_fast_model,
+                                         load_model, model_path_for)
+        pinned = version is not None
+        version = version or current_version()
+        if version is not None and version not in list_versions():
+            raise FileNotFoundError(f"Unknown model version: {version}")
+        if version is not None and version == self.model_version and self._classifier is not None:
+            self.pinned = pinned
+            return {"model_version": version, "swapped": False}
+
+        new_model = self._timed_load(f"classifier@{version}", lambda: load_model(model_path_for(version)))
+        # Warm: run one prediction so lazy initialisation happens before traffic arrives
+        new_model.predict_proba(np.zeros((1, new_model.coef_.shape[1]), dtype=np.float32))
+        new_fast = load_fast_model(version)
+        if new_fast is not None:
+            new_fast.predict_proba([""])
+
+        with self._lock:
+            previous = self.model_version
+            self._classifier, self._fast, self.model_version = new_model, new_fast, version
+            self.pinned = pinned
+        self._notify()
+        print(f"🔁 Swapped classifier {previous} → {version}")
+        return {"model_version": version, "previous_version": previous, "swapped": True}
+
+    def _embedding_tag(self) -> str:
+        """Tag of the vectors the serving embedder produces (without loading it)."""
+        if self._embedder is not None:
+            return self._embedder.name
+        from app.core.embedding_backends import backend_id
+        return backend_id()
+
+    def _load_explanation_db(self):
+        """
+        The explanation store, else the dataset, as (embeddings_db, texts_db).
+        Vectors from another embedder than the serving one are refused: their
+        similarities to the query vectors would be meaningless.
+        """
+        from app.core.store import EmbeddingStore, compact, store_exists
+        tag = self._embedding_tag()
+        if store_exists():
+            try:
+                # Memory-mapped, shared through the page cache across workers
+                store = EmbeddingStore()
+                if store.meta.get("model") != tag:
+                    raise ValueError(f"{store.path} was embedded with {store.meta.get('model')}, not {tag}")
+                return store, store.texts
+            except ValueError as e:
+                print(f"⚠️ {e}; rebuild it with `python -m app.core.store`. Using the dataset.")
+        from app.core.dataset import dataset_exists, read_embeddings, read_metadata
+        if not dataset_exists() or "embedding" not in read_metadata()["columns"]:
+            return None, None
+        try:
+            # Only the two columns the explanation path needs, one row per distinct text
+            embeddings_db, df = read_embeddings(columns=["normalized_text"], model_name=tag)
+        except ValueError as e:
+            print(f"⚠️ {e}; re-embed it with `python -m app.core.embeddings`. Explanations disabled.")
+            return None, None
+        embeddings_db, texts_db = compact(embeddings_db, df["normalized_text"])[:2]
+        return embeddings_db, np.asarray(texts_db, dtype=object)
+
+    @property
+    def explanation_db(self):
+        """Return (embeddings_db, texts_db); either may be None if not generated yet."""
+        if not self._db_loaded:
+            with self._lock:
+                if not self._db_loaded:
+                    self._embeddings_db, self._texts_db = self._timed_load(
+                        "explanation_db", self._load_explanation_db
+                    )
+                    self._db_loaded = True
+        return self._embeddings_db, self._texts_db
+
+    def reload_explanation_db(self):
+        """Re-open the explanation DB (e.g. after a retrain rewrote it) and rebuild its index."""
+        embeddings_db, texts_db = self._timed_load("explanation_db", self._load_explanation_db)
+        if embeddings_db is not None and texts_db is not None:
+            from app.core.similarity import get_index
+            self._timed_load("similarity_index", lambda: get_index(embeddings_db, texts_db))
+        with self._lock:
+            self._embeddings_db, self._texts_db = embeddings_db, texts_db
+            self._db_loaded = True
+        self._notify()
+
+    def on_change(self, fn):
+        """Register fn() to run whenever the classifier or explanation DB is replaced."""
+        self._listeners.append(fn)
+        return fn
+
+    def _notify(self):
+        for fn in list(self._listeners):
+            fn()
+
+    def set_embedder(self, model):
+        """Register an already-loaded embedder (e.g. from retrain)."""
+        with self._lock:
+            self._embedder = model
+        self._notify()
+
+    def set_classifier(self, model, version: str = None):
+        """
+        Register a freshly trained classifier (its fast tier is looked up by version).
+        It stays pinned: the model watcher never replaces it with CURRENT.
+        """
+        with self._lock:
+            self._classifier, self._fast, self.model_version = model, _UNLOADED, version
+            self.pinned = True
+        self._notify()
+
+    def set_explanation_db(self, embeddings_db, texts_db):
+        """Register an in-memory explanation DB (e.g. from benchmarks)."""
+        with self._lock:
+            self._embeddings_db, self._texts_db = embeddings_db, texts_db
+            self._db_loaded = True
+        self._notify()
+
+    def warm(self):
+        """
+        Explicit prewarm stage: import the heavy dependencies, load every
+        component and run one tiny inference through each model, so the first
+        real request pays none of it. Sets warm_state for the readiness probe.
+        """
+        self.warm_state, self.warm_error = "warming", None
+        start = time.perf_counter()
+        try:
+            from app.core.rules import get_engine
+            get_engine()
+            self.embedder.encode(["warm up"])
+            clf = self.classifier
+            clf.predict_proba(np.zeros((1, clf.coef_.shape[1]), dtype=np.float32))
+            if self.fast_classifier is not None:
+                self.fast_classifier.predict_proba(["warm up"])
+            embeddings_db, texts_db = self.explanation_db
+            if embeddings_db is not None and texts_db is not None:
+                from app.core.similarity import get_index
+                self._timed_load("similarity_index", lambda: get_index(embeddings_db, texts_db))
+        except Exception as e:
+            self.warm_state, self.warm_error = "failed", f"{type(e).__name__}: {e}"
+            raise
+        self.warm_seconds = round(time.perf_counter() - start, 3)
+        self.warm_state = "ready"
+        print(f"✅ Models warm in {self.warm_seconds:.2f}s")
+        return self.status()
+
+    def prewarm_in_background(self) -> threading.Thread:
+        """Run warm() in a daemon thread so the server can answer liveness probes meanwhile."""
+        def run():
+            try:
+                self.warm()
+            except Exception as e:
+                print(f"⚠️ Prewarm failed: {e}")
+        thread = threading.Thread(target=run, name="prewarm", daemon=True)
+        thread.start()
+        return thread
+
+    @property
+    def classifier_loaded(self) -> bool:
+        return self._classifier is not None
+
+    @property
+    def ready(self) -> bool:
+        return self.warm_state == "ready"
+
+    def status(self) -> dict:
+        return {
+            "warm_state": self.warm_state,
+            "warm_error": self.warm_error,
+            "warm_seconds": self.warm_seconds,
+            "embedder_loaded": self._embedder is not None,
+            "embedding_backend": getattr(self._embedder, "name", None),
+            "classifier_loaded": self._classifier is not None,
+            "classifier_runtime": type(self._classifier).__name__ if self._classifier is not None else None,
+            "model_version": self.model_version,
+            "model_pinned": self.pinned,
+            "fast_tier_loaded": self._fast not in (None, _UNLOADED),
+            "explanation_db_loaded": self._db_loaded,
+            "explanation_db_rows": 0 if self._embeddings_db is None else int(len(self._embeddings_db)),
+            "rss_mb": round(_rss_mb(), 2),
+            "components": dict(self.stats),
+            "embedding_cache": self._embedding_cache_stats(),
+        }
+
+    def _embedding_cache_stats(self):
+        from app.core.embeddings import get_embedding_cache
+        return get_embedding_cache().stats()
+
+
+_registry = ModelRegistry()
+
+
+def get_registry() -> ModelRegistry:
+    """Return the process-wide registry."""
+    return _registry
@@ -0,0 +1,195 @@
+# app/core/retrain_trigger.py
+"""
+Background Retrain Trigger
+After RETRAIN_AFTER_FEEDBACK new feedback rows (0 = disabled), runs
+`python -m scripts.retrain` in a separate process so training never competes
+with the serving threads, then hot-swaps the newly published model version and
+explanation DB into the running API.
+
+Each uvicorn worker also runs a ModelWatcher that polls the CURRENT pointer
+every MODEL_POLL_SECONDS (0 = disabled), so a version published by another
+worker, the admin API or a manual `scripts/retrain.py` run reaches every worker.
+A process serving a pinned classifier (set_classifier, or an admin swap to an
+explicit version) is left alone until a swap back to CURRENT.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from app.core.feedback_store import get_feedback_store, merged_checkpoint
+from app.core.registry import get_registry
+
+RETRAIN_AFTER_FEEDBACK = int(os.getenv("RETRAIN_AFTER_FEEDBACK", "0"))
+MODEL_POLL_SECONDS = float(os.getenv("MODEL_POLL_SECONDS", "5"))
+RETRAIN_LOCK_PATH = "data/processed/retrain.lock"
+RETRAIN_LOG_PATH = "data/processed/retrain.log"
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+class RetrainTrigger:
+    """Starts at most one retrain process at a time (across workers, via a lock file)."""
+
+    def __init__(self, threshold: int = RETRAIN_AFTER_FEEDBACK):
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._proc = None
+        self.runs = 0
+        self.last_exit_code = None
+        self.last_started = None
+        self.last_finished = None
+        self.last_swap = None
+
+    @property
+    def running(self) -> bool:
+        return self._proc is not None and self._proc.poll() is None
+
+    def pending_feedback(self) -> int:
+        """Feedback rows not yet merged into the training set."""
+        return get_feedback_store().last_id() - merged_checkpoint()
+
+    def notify(self) -> bool:
+        """Call after feedback is written; starts a retrain once the threshold is reached."""
+        if self.threshold <= 0 or self.running:
+            return False
+        if self.pending_feedback() < self.threshold:
+            return False
+        return self.start()
+
+    def _acquire_lock_file(self) -> bool:
+        os.makedirs(os.path.dirname(RETRAIN_LOCK_PATH), exist_ok=True)
+        for _ in range(2):
+            try:
+                fd = os.open(RETRAIN_LOCK_PATH, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                try:
+                    with open(RETRAIN_LOCK_PATH) as f:
+                        pid = int(f.read().strip() or 0)
+                except (OSError, ValueError):
+                    pid = 0
+                if pid and _pid_alive(pid):
+                    return False
+                # Stale lock left by a crashed run
+                os.remove(RETRAIN_LOCK_PATH)
+                continue
+            with os.fdopen(fd, "w") as f:
+                f.write(str(os.getpid()))
+            return True
+        return False
+
+    def start(self) -> bool:
+        """Launch a retrain process now; False if one is already running."""
+        with self._lock:
+            if self.running or not self._acquire_lock_file():
+                return False
+            log = open(RETRAIN_LOG_PATH, "a")
+            self._proc = subprocess.Popen(
+                [sys.executable, "-m", "scripts.retrain"],
+                cwd=PROJECT_ROOT, stdout=log, stderr=subprocess.STDOUT,
+            )
+            with open(RETRAIN_LOCK_PATH, "w") as f:
+                f.write(str(self._proc.pid))
+            self.runs += 1
+            self.last_started = time.time()
+            print(f"🔹 Started background retrain (pid {self._proc.pid}); log → {RETRAIN_LOG_PATH}")
+            threading.Thread(target=self._watch, args=(self._proc, log), daemon=True).start()
+            return True
+
+    def _watch(self, proc, log):
+        code = None
+        try:
+            code = proc.wait()
+            if code != 0:
+                print(f"⚠️ Background retrain failed (exit {code}); keeping current model. See {RETRAIN_LOG_PATH}")
+                return
+            self.last_swap = _swap_to_current()
+        except Exception as e:
+            print(f"⚠️ Hot-swap after background retrain failed: {e}; keeping current model")
+        finally:
+            log.close()
+            try:
+                os.remove(RETRAIN_LOCK_PATH)
+            except OSError:
+                pass
+            self.last_exit_code = code
+            self.last_finished = time.time()
+
+    def status(self) -> dict:
+        return {
+            "threshold": self.threshold,
+            "running": self.running,
+            "pending_feedback": self.pending_feedback(),
+            "runs": self.runs,
+            "last_exit_code": self.last_exit_code,
+            "last_started": self.last_started,
+            "last_finished": self.last_finished,
+            "last_swap": self.last_swap,
+        }
+
+
+def _swap_to_current() -> dict:
+    """Swap in the CURRENT version and, if it changed, the explanation DB written with it."""
+    registry = get_registry()
+    swap = registry.swap_classifier()
+    if swap["swapped"]:
+        registry.reload_explanation_db()
+    return swap
+
+
+class ModelWatcher:
+    """Per-process thread that follows the CURRENT pointer (see module docstring)."""
+
+    def __init__(self, interval: float = MODEL_POLL_SECONDS):
+        self.interval = interval
+        self._thread = None
+        self.last_swap = None
+
+    def check(self):
+        """Swap if CURRENT names another version than the one this process serves."""
+        from app.core.classifier import current_version
+        registry = get_registry()
+        # Not loaded yet: the first request loads CURRENT anyway
+        if not registry.classifier_loaded or registry.pinned:
+            return None
+        version = current_version()
+        if version is None or version == registry.model_version:
+            return None
+        self.last_swap = _swap_to_current()
+        return self.last_swap
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                print(f"⚠️ Model watcher: {e}; keeping current model")
+
+    def start(self) -> bool:
+        if self.interval <= 0 or self._thread is not None:
+            return False
+        self._thread = threading.Thread(target=self._run, name="model-watcher", daemon=True)
+        self._thread.start()
+        return True
+
+
+_trigger = RetrainTrigger()
+_watcher = ModelWatcher()
+
+
+def get_retrain_trigger() -> RetrainTrigger:
+    return _trigger
+
+
+def get_model_watcher() -> ModelWatcher:
+    return _watcher
@@ -2,12 +2,28 @@
 """
 Step 6 – Rules & Precision Boosters
 Merchant-level or pattern-based rules to override or reinforce model predictions.
+
+Rules are loaded from rules.yaml (falling back to the built-in RULES below) and
+compiled into a single engine:
+  • keyword rules → one phrase lookup table, so matching cost depends on the
+    length of the text, not on how many merchants are configured
+  • free-form regex rules → one combined alternation used as a prefilter
+Priority is preserved: the first rule (in file order) that matches wins.
+The file is re-read automatically when it changes on disk.
 """
 
+import os
 import re
+import threading
+import time
+
+import yaml
 
-# ⚙️ Hardcoded rules: merchant patterns → canonical category
-# Keep these simple and readable (can later load from rules.yaml)
+RULES_PATH = os.getenv("RULES_PATH", os.path.join(os.path.dirname(__file__), "rules.yaml"))
+RELOAD_CHECK_SECONDS = 2.0
+
+# ⚙️ Built-in fallback rules: merchant patterns → canonical category
+# Used when rules.yaml is missing; keep in sync with the shipped rules.yaml.
 RULES = {
     r"\b(irctc|airindia|indigo|goair|spicejet|uber|ola)\b": "Travel & Transport",
     r"\b(indianoil|hpcl|hindustan petroleum|bharatpetrol|shell)\b": "Fuel",
@@ -20,17 +36,167 @@ RULES = {
     r"\b(google one|canva pro|dropbox|office 365|prime membership)\b": "Bills & Subscriptions",
 }
 
+_TOKEN_RE = re.compile(r"\w+")
+# Patterns of the form \b(word|two words|...)\b are plain keyword lists
+_KEYWORD_PATTERN_RE = re.compile(r"^\\b\(([\w ]+(?:\|[\w ]+)*)\)\\b$")
+
+
+def _tokens(text: str):
+    return tuple(_TOKEN_RE.findall(text))
+
+
+def keywords_to_pattern(keywords) -> str:
+    """The regex-equivalent of a keyword list (reported as the matched pattern)."""
+    return r"\b(" + "|".join(keywords) + r")\b"
+
+
+def load_rules_file(path: str = RULES_PATH):
+    """
+    Load an ordered list of (pattern, category, keywords) from a YAML file.
+    Each entry has a `category` and either `keywords` (list of merchant phrases)
+    or `pattern` (a regular expression).
+    """
+    with open(path, encoding="utf-8") as f:
+        data = yaml.safe_load(f) or {}
+    rules = []
+    for entry in data.get("rules", []):
+        category = entry["category"]
+        if "keywords" in entry:
+            keywords = [str(k).lower().strip() for k in entry["keywords"]]
+            rules.append((keywords_to_pattern(keywords), category, keywords))
+        elif "pattern" in entry:
+            rules.append((entry["pattern"], category, None))
+        else:
+            raise ValueError(f"Rule for '{category}' needs 'keywords' or 'pattern'")
+    return rules
+
+
+def _from_dict(rules: dict):
+    out = []
+    for pattern, category in rules.items():
+        m = _KEYWORD_PATTERN_RE.match(pattern)
+        out.append((pattern, category, m.group(1).split("|") if m else None))
+    return out
+
+
+class RuleEngine:
+    """Compiled, priority-preserving matcher over an ordered rule list."""
+
+    def __init__(self, rules):
+        self.rules = [(p, c) for p, c, _ in rules]
+        self._phrases = {}          # token tuple → lowest rule index
+        self._max_phrase_len = 0
+        self._regex_rules = []      # (index, compiled pattern)
+        for i, (pattern, _, keywords) in enumerate(rules):
+            if keywords is None:
+                self._regex_rules.append((i, re.compile(pattern)))
+                continue
+            for kw in keywords:
+                toks = _tokens(kw.lower())
+                if toks and toks not in self._phrases:
+                    self._phrases[toks] = i
+                    self._max_phrase_len = max(self._max_phrase_len, len(toks))
+        self._regex_prefilter = (
+            re.compile("|".join(f"(?:{p.pattern})" for _, p in self._regex_rules))
+            if self._regex_rules else None
+        )
+
+    def __len__(self):
+        return len(self.rules)
+
+    def match_index(self, text: str):
+        """Return the index of the highest-priority matching rule, or None."""
+        best = None
+        spans = [(m.group(), m.start(), m.end()) for m in _TOKEN_RE.finditer(text)]
+        toks = tuple(t for t, _, _ in spans)
+        # Multi-word phrases only match across a single space, exactly like the regex form
+        spaced = [text[spans[i][2]:spans[i + 1][1]] == " " for i in range(len(spans) - 1)]
+        phrases, max_len = self._phrases, self._max_phrase_len
+        for start in range(len(toks)):
+            for n in range(1, min(max_len, len(toks) - start) + 1):
+                if n > 1 and not spaced[start + n - 2]:
+                    break
+                idx = phrases.get(toks[start:start + n])
+                if idx is not None and (best is None or idx < best):
+                    best = idx
+                    if best == 0:
+                        return 0
+        if self._regex_prefilter is not None and self._regex_prefilter.search(text):
+            for idx, rx in self._regex_rules:
+                if best is not None and idx > best:
+                    break
+                if rx.search(text):
+                    return idx
+        return best
+
+    def apply(self, text: str):
+        idx = self.match_index(text.lower().strip())
+        if idx is None:
+            return None, None
+        pattern, category = self.rules[idx]
+        return category, pattern
+
+
+class _EngineHolder:
+    """Holds the current engine and swaps in a new one when rules.yaml changes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._engine = None
+        self._mtime = None
+        self._checked_at = 0.0
+
+    def _file_mtime(self):
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def get(self) -> RuleEngine:
+        now = time.monotonic()
+        if self._engine is not None and now - self._checked_at < RELOAD_CHECK_SECONDS:
+            return self._engine
+        with self._lock:
+            self._checked_at = now
+            mtime = self._file_mtime()
+            if self._engine is None or mtime != self._mtime:
+                try:
+                    rules = load_rules_file(self.path) if mtime is not None else _from_dict(RULES)
+                    engine = RuleEngine(rules)
+                except (OSError, ValueError, KeyError, re.error, yaml.YAMLError) as e:
+                    if self._engine is None:
+                        raise
+                    print(f"⚠️ Keeping previous rules; failed to reload {self.path}: {e}")
+                    self._mtime = mtime
+                    return self._engine
+                if self._engine is not None:
+                    print(f"🔹 Reloaded {len(engine)} rules from {self.path}")
+                self._engine = engine
+                self._mtime = mtime
+        return self._engine
+
+
+_holder = _EngineHolder(RULES_PATH)
+
+
+def get_engine() -> RuleEngine:
+    """Return the current compiled engine, reloading rules.yaml if it changed."""
+    return _holder.get()
+
 
 def apply_rules(text: str):
     """
     Check description against predefined rules.
     Returns (category, matched_pattern) if hit, else (None, None).
     """
-    text = text.lower().strip()
-    for pattern, category in RULES.items():
-        if re.search(pattern, text):
-            return category, pattern
-    return None, None
+    return get_engine().apply(text)
+
+
+def apply_rules_many(texts):
+    """Batch apply_rules: one engine lookup, one (category, pattern) per text."""
+    engine = get_engine()
+    return [engine.apply(t) for t in texts]
 
 
 # 🧪 Test demo
@@ -50,4 +216,4 @@ if __name__ == "__main__":
 
     for s in samples:
         cat, pat = apply_rules(s)
-        print(f"{s:35} → {cat or 'No rule match'}  ({pat or '-'})")
\ No newline at end of file
+        print(f"{s:35} → {cat or 'No rule match'}  ({pat or '-'})")
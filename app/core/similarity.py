@@ -0,0 +1,158 @@
+# app/core/similarity.py
+"""
+Top-k Similarity Index for the Explainability Layer
+Vectors are L2-normalized once at build time and stored as contiguous float32,
+so a query is a single matrix-vector product plus a partial top-k selection.
+A memory-mapped EmbeddingStore (app/core/store.py) can be searched in place;
+float16/int8 rows are dequantized block by block, never copied whole.
+For explanation DBs with millions of rows an approximate inverted-file (IVF)
+mode clusters the vectors with a small NumPy k-means and only scans the
+closest clusters.
+"""
+
+import os
+import threading
+import numpy as np
+
+SIMILARITY_MODE = os.getenv("SIMILARITY_MODE", "auto")   # auto | exact | ivf
+IVF_MIN_ROWS = 200_000        # "auto" switches to IVF above this many rows
+IVF_N_PROBE = 8
+_KMEANS_SAMPLE = 100_000
+_KMEANS_ITERS = 10
+_BLOCK = 65_536
+
+
+def _normalize(x) -> np.ndarray:
+    x = np.ascontiguousarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest scores, sorted descending (argpartition + small sort)."""
+    k = min(k, scores.shape[-1])
+    if k <= 0:
+        return np.zeros(scores.shape[:-1] + (0,), dtype=np.int64)
+    if k < scores.shape[-1]:
+        idx = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+    else:
+        idx = np.broadcast_to(np.arange(scores.shape[-1]), scores.shape).copy()
+    order = np.argsort(-np.take_along_axis(scores, idx, axis=-1), axis=-1, kind="stable")
+    return np.take_along_axis(idx, order, axis=-1)
+
+
+def _kmeans(index, n_clusters: int, seed: int = 42) -> np.ndarray:
+    """Spherical k-means on a sample of the index rows; returns normalized centroids."""
+    rng = np.random.default_rng(seed)
+    n = len(index)
+    sample = index._rows(np.sort(rng.choice(n, size=min(n, _KMEANS_SAMPLE), replace=False)))
+    centroids = sample[rng.choice(len(sample), size=n_clusters, replace=False)].copy()
+    for _ in range(_KMEANS_ITERS):
+        assign = (sample @ centroids.T).argmax(axis=1)
+        for c in range(n_clusters):
+            members = sample[assign == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+        centroids = _normalize(centroids)
+    return centroids
+
+
+class SimilarityIndex:
+    """Cosine top-k search over a fixed set of (vector, text) rows."""
+
+    def __init__(self, embeddings, texts, mode: str = SIMILARITY_MODE,
+                 n_lists: int = None, n_probe: int = IVF_N_PROBE):
+        if hasattr(embeddings, "rows"):
+            # EmbeddingStore: already normalized, searched in place (memory-mapped)
+            self._store = embeddings
+            self.vectors = embeddings.vectors
+        else:
+            self._store = None
+            self.vectors = _normalize(embeddings)
+        self._dense = self.vectors.dtype == np.float32
+        self.texts = texts
+        if mode == "auto":
+            mode = "ivf" if len(self.vectors) >= IVF_MIN_ROWS else "exact"
+        self.mode = mode
+        self.n_probe = n_probe
+        self.centroids = None
+        if mode == "ivf":
+            self._build_ivf(n_lists or max(1, int(np.sqrt(len(self.vectors)))))
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def _rows(self, idx) -> np.ndarray:
+        if self._store is not None and not self._dense:
+            return self._store.rows(idx)
+        return np.asarray(self.vectors[idx])
+
+    def _scores(self, q: np.ndarray) -> np.ndarray:
+        """Similarity of every row to q (d,) or (m, d); shape (n,) or (m, n)."""
+        if self._dense:
+            return q @ self.vectors.T
+        out = np.empty(q.shape[:-1] + (len(self.vectors),), dtype=np.float32)
+        for start in range(0, len(self.vectors), _BLOCK):
+            out[..., start:start + _BLOCK] = q @ self._rows(slice(start, start + _BLOCK)).T
+        return out
+
+    def _build_ivf(self, n_lists: int):
+        n_lists = min(n_lists, len(self.vectors))
+        self.centroids = _kmeans(self, n_lists)
+        assign = np.empty(len(self.vectors), dtype=np.int32)
+        for start in range(0, len(self.vectors), _BLOCK):
+            block = self._rows(slice(start, start + _BLOCK))
+            assign[start:start + _BLOCK] = (block @ self.centroids.T).argmax(axis=1)
+        # Reorder ids so each inverted list is one contiguous slice
+        self._order = np.argsort(assign, kind="stable")
+        self._bounds = np.searchsorted(assign[self._order], np.arange(n_lists + 1))
+
+    def _ivf_candidates(self, lists) -> np.ndarray:
+        return np.concatenate([self._order[self._bounds[c]:self._bounds[c + 1]] for c in lists])
+
+    def _ivf_search(self, q: np.ndarray, lists, top_k: int):
+        cand = np.sort(self._ivf_candidates(lists))
+        scores = self._rows(cand) @ q
+        best = _top_k(scores, top_k)
+        return self._pairs(cand[best], scores[best])
+
+    def _pairs(self, idx, scores):
+        return [(self.texts[i], float(s)) for i, s in zip(idx, scores)]
+
+    def search(self, embedding, top_k: int = 3):
+        """Top-k most similar rows for one query; list of (text, similarity)."""
+        q = _normalize(embedding)
+        if self.mode == "ivf":
+            return self._ivf_search(q, _top_k(self.centroids @ q, self.n_probe), top_k)
+        scores = self._scores(q)
+        best = _top_k(scores, top_k)
+        return self._pairs(best, scores[best])
+
+    def search_many(self, embeddings, top_k: int = 3):
+        """Batched search: one matrix multiply for the whole chunk in exact mode."""
+        q = _normalize(embeddings)
+        if self.mode == "ivf":
+            lists = _top_k(q @ self.centroids.T, self.n_probe)
+            return [self._ivf_search(row, l, top_k) for row, l in zip(q, lists)]
+        scores = self._scores(q)
+        best = _top_k(scores, top_k)
+        return [self._pairs(b, row[b]) for b, row in zip(best, scores)]
+
+
+_last = (None, None, None)
+_last_lock = threading.Lock()
+
+
+def get_index(embeddings_db, texts_db) -> SimilarityIndex:
+    """Index for the given arrays, reusing the last one built for the same objects."""
+    global _last
+    emb, txt, index = _last
+    if emb is embeddings_db and txt is texts_db:
+        return index
+    with _last_lock:
+        emb, txt, index = _last
+        if emb is not embeddings_db or txt is not texts_db:
+            index = SimilarityIndex(embeddings_db, texts_db)
+            _last = (embeddings_db, texts_db, index)
+    return index
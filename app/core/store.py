@@ -0,0 +1,275 @@
+# app/core/store.py
+"""
+Memory-mapped Explanation Store
+A read-only on-disk layout for the explanation DB that every uvicorn worker can
+np.load(mmap_mode="r") and share through the OS page cache:
+
+    meta.json          version, model, dtype, rows, dim, source_rows, labels
+    vectors.npy        L2-normalized vectors as float32 / float16 / int8
+    scales.npy         per-row dequantization scale (int8 only)
+    text_offsets.npy   int64 offsets into texts.bin (rows + 1)
+    texts.bin          UTF-8 texts packed back to back (no pickle)
+    counts.npy         training rows behind each text
+    label_counts.npy   (rows, labels) training label counts per text
+
+normalize_transaction collapses descriptions to merchants, so most training
+rows share a normalized text (and its vector). The store keeps one row per
+distinct text with its row count and label distribution: a similarity scan
+costs O(distinct merchants) and never returns the same merchant twice.
+
+Run `python -m app.core.store` to build it from the columnar dataset and
+print per-worker memory and top-k recall for each dtype.
+"""
+
+import json
+import os
+import shutil
+
+import numpy as np
+
+STORE_VERSION = 2
+STORE_PATH = os.getenv("EXPLAIN_STORE_PATH", "data/processed/explain_store")
+STORE_DTYPE = os.getenv("EXPLAIN_STORE_DTYPE", "float16")
+DTYPES = ("float32", "float16", "int8")
+
+
+class PackedTexts:
+    """Sequence of strings backed by an offsets array and a bytes buffer."""
+
+    def __init__(self, offsets, data):
+        self._offsets = offsets
+        self._data = data
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+        return bytes(self._data[start:end]).decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+def _pack_texts(texts):
+    encoded = [str(t).encode("utf-8") for t in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, b"".join(encoded)
+
+
+def compact(embeddings, texts, labels=None):
+    """
+    One row per distinct text, in first-seen order:
+    (vectors, texts, counts, label_names, label_counts).
+    Rows with the same normalized text have the same vector; the first is kept.
+    """
+    import pandas as pd
+    codes, unique = pd.factorize(pd.Series(texts, dtype=object).map(str), sort=False)
+    first = np.full(len(unique), len(codes), dtype=np.int64)
+    np.minimum.at(first, codes, np.arange(len(codes)))
+    vectors = np.asarray(embeddings[first], dtype=np.float32)
+    counts = np.bincount(codes, minlength=len(unique)).astype(np.int64)
+    if labels is None:
+        return vectors, list(unique), counts, [], None
+    label_codes, label_names = pd.factorize(pd.Series(labels, dtype=object).map(str), sort=True)
+    n_labels = len(label_names)
+    label_counts = np.bincount(codes * n_labels + label_codes, minlength=len(unique) * n_labels)
+    return vectors, list(unique), counts, list(label_names), \
+        label_counts.reshape(len(unique), n_labels).astype(np.int32)
+
+
+def quantize(vectors, dtype: str):
+    """L2-normalize then cast; returns (vectors, scales or None)."""
+    v = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(v, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    v = v / norms
+    if dtype == "float32":
+        return np.ascontiguousarray(v), None
+    if dtype == "float16":
+        return v.astype(np.float16), None
+    if dtype == "int8":
+        scales = np.abs(v).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        q = np.round(v / scales[:, None]).astype(np.int8)
+        return q, scales.astype(np.float32)
+    raise ValueError(f"Unsupported store dtype: {dtype} (choose from {DTYPES})")
+
+
+def write_store(embeddings, texts, path: str = STORE_PATH, dtype: str = STORE_DTYPE,
+                model_name: str = None, labels=None):
+    """
+    Write an explanation store atomically (build in a temp dir, then swap).
+    Row-aligned embeddings / texts / labels are compacted to one row per text.
+    """
+    if len(embeddings) != len(texts):
+        raise ValueError(f"Row mismatch: {len(embeddings)} vectors vs {len(texts)} texts")
+    if labels is not None and len(labels) != len(texts):
+        raise ValueError(f"Row mismatch: {len(labels)} labels vs {len(texts)} texts")
+    from app.core.embedding_backends import backend_id
+
+    source_rows = len(texts)
+    embeddings, texts, counts, label_names, label_counts = compact(embeddings, texts, labels)
+    tmp = f"{path}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    vectors, scales = quantize(embeddings, dtype)
+    np.save(os.path.join(tmp, "vectors.npy"), vectors)
+    if scales is not None:
+        np.save(os.path.join(tmp, "scales.npy"), scales)
+    offsets, data = _pack_texts(texts)
+    np.save(os.path.join(tmp, "text_offsets.npy"), offsets)
+    with open(os.path.join(tmp, "texts.bin"), "wb") as f:
+        f.write(data)
+    np.save(os.path.join(tmp, "counts.npy"), counts)
+    if label_counts is not None:
+        np.save(os.path.join(tmp, "label_counts.npy"), label_counts)
+    with open(os.path.join(tmp, "meta.json"), "w") as f:
+        json.dump({"version": STORE_VERSION, "model": model_name or backend_id(), "dtype": dtype,
+                   "rows": int(len(vectors)), "dim": int(vectors.shape[1]),
+                   "source_rows": int(source_rows), "labels": label_names}, f, indent=2)
+
+    old = f"{path}.old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(path):
+        os.replace(path, old)
+    os.replace(tmp, path)
+    shutil.rmtree(old, ignore_errors=True)
+    print(f"✅ Saved explanation store → {path} ({dtype}, {len(vectors)} distinct texts "
+          f"from {source_rows} rows)")
+    return path
+
+
+class EmbeddingStore:
+    """Read-only, memory-mapped view of an explanation store."""
+
+    def __init__(self, path: str = STORE_PATH):
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != STORE_VERSION:
+            raise ValueError(f"Unsupported store version {self.meta.get('version')} at {path}")
+        self.path = path
+        self.dtype = self.meta["dtype"]
+        self.vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        scales_path = os.path.join(path, "scales.npy")
+        self.scales = np.load(scales_path, mmap_mode="r") if os.path.exists(scales_path) else None
+        offsets = np.load(os.path.join(path, "text_offsets.npy"), mmap_mode="r")
+        data = np.memmap(os.path.join(path, "texts.bin"), dtype=np.uint8, mode="r") \
+            if offsets[-1] > 0 else np.zeros(0, dtype=np.uint8)
+        self.texts = PackedTexts(offsets, data)
+        self.counts = np.load(os.path.join(path, "counts.npy"), mmap_mode="r")
+        labels_path = os.path.join(path, "label_counts.npy")
+        self.labels = self.meta.get("labels") or []
+        self.label_counts = np.load(labels_path, mmap_mode="r") if os.path.exists(labels_path) else None
+        self._row_of = None
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def describe(self, text: str):
+        """Row count and label distribution behind a stored text, or None if absent."""
+        if self._row_of is None:
+            self._row_of = {t: i for i, t in enumerate(self.texts)}
+        i = self._row_of.get(text)
+        if i is None:
+            return None
+        out = {"text": text, "count": int(self.counts[i])}
+        if self.label_counts is not None:
+            row = np.asarray(self.label_counts[i])
+            # Most frequent label first
+            out["labels"] = {self.labels[j]: int(row[j]) for j in np.argsort(-row, kind="stable") if row[j]}
+        return out
+
+    def rows(self, idx) -> np.ndarray:
+        """Dequantized float32 rows for an index array or slice."""
+        v = np.asarray(self.vectors[idx], dtype=np.float32)
+        if self.scales is not None:
+            v *= np.asarray(self.scales[idx], dtype=np.float32)[..., None]
+        return v
+
+
+def store_exists(path: str = STORE_PATH) -> bool:
+    return os.path.exists(os.path.join(path, "meta.json"))
+
+
+def _memory_mb() -> dict:
+    """RSS and anonymous (non-shareable) memory of this process, in MB."""
+    out = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Anonymous"):
+                    out[key.lower()] = int(rest.split()[0]) / 1024
+    except OSError:
+        pass
+    return out
+
+
+# 🧪 Build + report
+if __name__ == "__main__":
+    import subprocess
+    import sys
+    from app.core.dataset import current_dataset_path, dataset_exists, read_embeddings, read_metadata
+
+    dataset_path = current_dataset_path()
+    if not dataset_exists(dataset_path):
+        print(f"⚠️ Missing {dataset_path}. Run `python -m app.core.embeddings` first.")
+        sys.exit(1)
+
+    embeddings, df = read_embeddings(dataset_path, columns=["normalized_text", "category"])
+    texts = df["normalized_text"].to_numpy(dtype=object)
+    labels = df["category"].to_numpy(dtype=object)
+    model_name = read_metadata(dataset_path)["embedding_model"]
+
+    # Full-precision reference results over the distinct texts
+    from app.core.similarity import SimilarityIndex
+    rng = np.random.default_rng(0)
+    queries = embeddings[rng.choice(len(embeddings), size=min(200, len(embeddings)), replace=False)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape).astype(np.float32)
+    k = 10
+    distinct_vectors, distinct_texts = compact(embeddings, texts)[:2]
+    print(f"🔹 {len(texts)} rows → {len(distinct_texts)} distinct texts")
+    exact = SimilarityIndex(distinct_vectors, distinct_texts, mode="exact")
+    reference = [{t for t, _ in hits} for hits in exact.search_many(queries, k)]
+
+    # Each memory probe runs in a fresh process, like a uvicorn worker would
+    probe_dataset = (
+        "from app.core.dataset import read_embeddings;"
+        "e, df = read_embeddings({path!r}, columns=['normalized_text']);"
+        "idx = SimilarityIndex(e, df['normalized_text'].to_numpy(dtype=object));"
+    )
+    probe_store = "s = EmbeddingStore({path!r}); idx = SimilarityIndex(s, s.texts);"
+    probe = (
+        "import sys, json; sys.path.insert(0, {root!r});"
+        "import numpy as np;"
+        "from app.core.store import EmbeddingStore, _memory_mb;"
+        "from app.core.similarity import SimilarityIndex;"
+        "{setup}"
+        "idx.search_many(np.random.rand(8, idx.vectors.shape[1]).astype(np.float32));"
+        "print(json.dumps(_memory_mb()))"
+    )
+
+    def worker_memory(setup):
+        code = probe.format(root=os.getcwd(), setup=setup)
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True).stdout
+        lines = out.strip().splitlines()
+        return json.loads(lines[-1]) if lines else {}
+
+    print(f"{'format':>12} {'on-disk MB':>10} {'worker RSS MB':>14} {'private MB':>11} {f'recall@{k}':>10}")
+    mem = worker_memory(probe_dataset.format(path=dataset_path))
+    size = os.path.getsize(dataset_path) / 1e6
+    print(f"{'parquet':>12} {size:>10.2f} {mem.get('rss', 0):>14.1f} {mem.get('anonymous', 0):>11.1f} {1.0:>10.4f}")
+    for dtype in DTYPES:
+        path = f"{STORE_PATH}_{dtype}"
+        write_store(embeddings, texts, path=path, dtype=dtype, model_name=model_name, labels=labels)
+        store = EmbeddingStore(path)
+        index = SimilarityIndex(store, store.texts)
+        found = [{t for t, _ in hits} for hits in index.search_many(queries, k)]
+        recall = np.mean([len(a & b) / max(len(a), 1) for a, b in zip(reference, found)])
+        size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 1e6
+        mem = worker_memory(probe_store.format(path=path))
+        print(f"{dtype:>12} {size:>10.2f} {mem.get('rss', 0):>14.1f} {mem.get('anonymous', 0):>11.1f} {recall:>10.4f}")
+        shutil.rmtree(path, ignore_errors=True)
+    write_store(embeddings, texts, path=STORE_PATH, dtype=STORE_DTYPE, model_name=model_name, labels=labels)
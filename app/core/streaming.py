@@ -0,0 +1,124 @@
+# app/core/streaming.py
+"""
+Streaming Statement Classification
+Reads statement rows (transaction_id, description, amount) in fixed-size chunks,
+classifies each chunk through the batched decision pipeline and emits results
+as they are produced, so memory stays flat regardless of file size.
+"""
+
+import csv
+import io
+import json
+import sys
+import time
+
+from app.core.decision import decide_many
+
+DEFAULT_CHUNK_SIZE = 2000
+OUTPUT_FIELDS = ["transaction_id", "description", "amount", "final_category", "method", "confidence"]
+
+
+class StreamProgress:
+    """Tracks rows processed and throughput for a running stream."""
+
+    def __init__(self, report_every: int = 50_000, out=sys.stderr):
+        self.rows = 0
+        self.chunks = 0
+        self.started = time.perf_counter()
+        self.report_every = report_every
+        self._next_report = report_every
+        self._out = out
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.elapsed if self.elapsed > 0 else 0.0
+
+    def update(self, n_rows: int):
+        self.rows += n_rows
+        self.chunks += 1
+        if self.report_every and self.rows >= self._next_report:
+            self._next_report += self.report_every
+            self.report()
+
+    def report(self, final: bool = False):
+        label = "✅ Done" if final else "🔹 Progress"
+        print(f"{label}: {self.rows:,} rows in {self.elapsed:.1f}s "
+              f"({self.rows_per_sec:,.0f} rows/s, {self.chunks} chunks)", file=self._out)
+
+    def summary(self) -> dict:
+        return {"rows": self.rows, "chunks": self.chunks,
+                "seconds": round(self.elapsed, 3), "rows_per_sec": round(self.rows_per_sec, 1)}
+
+
+def read_rows(lines, fmt: str = "csv"):
+    """
+    Lazily parse an iterable of text lines into row dicts.
+    fmt="csv" expects a header row; fmt="ndjson" expects one JSON object per line.
+    """
+    if fmt == "csv":
+        yield from csv.DictReader(lines)
+    elif fmt == "ndjson":
+        for line in lines:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+    else:
+        raise ValueError(f"Unsupported format: {fmt}")
+
+
+def iter_chunks(rows, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Group an iterable of rows into lists of at most chunk_size."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def classify_chunk(rows):
+    """
+    Classify one chunk of row dicts; returns output rows in the same order.
+    Similar examples are not part of the statement output, so the explanation
+    search is skipped entirely.
+    """
+    descriptions = [str(row.get("description") or "") for row in rows]
+    results = decide_many(descriptions)
+    return [
+        {
+            "transaction_id": row.get("transaction_id"),
+            "description": description,
+            "amount": row.get("amount"),
+            "final_category": result["final_category"],
+            "method": result["method"],
+            "confidence": round(result["confidence"], 3),
+        }
+        for row, description, result in zip(rows, descriptions, results)
+    ]
+
+
+def classify_stream(rows, chunk_size: int = DEFAULT_CHUNK_SIZE, progress: StreamProgress = None):
+    """Yield classified chunks (lists of output rows) as each input chunk completes."""
+    for chunk in iter_chunks(rows, chunk_size):
+        out = classify_chunk(chunk)
+        if progress is not None:
+            progress.update(len(out))
+        yield out
+
+
+def format_chunk(results, fmt: str = "ndjson", header: bool = False) -> str:
+    """Serialize one classified chunk to CSV or NDJSON text."""
+    if fmt == "ndjson":
+        return "".join(json.dumps(r) + "\n" for r in results)
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=OUTPUT_FIELDS)
+    if header:
+        writer.writeheader()
+    writer.writerows(results)
+    return buf.getvalue()
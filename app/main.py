@@ -2,13 +2,26 @@
 """
 Step 8a — FastAPI Backend Entry Point
 Exposes the Transactly AI engine via API routes.
+
+Importing this module stays cheap (no torch, scikit-learn or pandas); models
+are loaded in an explicit prewarm stage at startup. PREWARM selects how:
+  • background (default)  load in a thread; /health/ready turns 200 when done
+  • blocking              finish loading before the server accepts requests
+  • off                   load lazily on the first request
 """
 
+import os
+import time
 from fastapi import FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import classify,feedback
-
+from app.routers import classify,feedback,bulk,admin
+from app.core.metrics import CONTENT_TYPE, MetricsMiddleware, get_metrics
+from app.core.registry import get_registry
+from app.core.retrain_trigger import get_model_watcher
 
+PREWARM = os.getenv("PREWARM", "background")
+_STARTED_AT = time.time()
 
 app = FastAPI(
     title="Transactly AI API",
@@ -24,11 +37,58 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # Register routers
 app.include_router(classify.router, prefix="/api/classify", tags=["Classification"])
 app.include_router(feedback.router, prefix="/api/feedback", tags=["Feedback"])
+app.include_router(bulk.router, prefix="/api/bulk", tags=["Classification"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Admin"])
+
+@app.on_event("startup")
+def warm_models():
+    """Load embedder, classifier and explanation DB once per process."""
+    if PREWARM == "blocking":
+        get_registry().warm()
+    elif PREWARM == "background":
+        get_registry().prewarm_in_background()
+    # Follow versions published by other workers or processes
+    get_model_watcher().start()
+
+
+@app.get("/health/live")
+def liveness():
+    """The process is up and serving (models may still be loading)."""
+    return {"status": "alive", "uptime_seconds": round(time.time() - _STARTED_AT, 1)}
+
+
+@app.get("/health/ready")
+def readiness():
+    """200 once every model is warm; 503 while loading or if prewarm failed."""
+    registry = get_registry()
+    # With PREWARM=off models load on first use, so there is nothing to wait for
+    ready = registry.ready or PREWARM == "off"
+    body = {
+        "status": "ready" if ready else registry.warm_state,
+        "warm_error": registry.warm_error,
+        "warm_seconds": registry.warm_seconds,
+        "model_version": registry.model_version,
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
 
 @app.get("/")
 def root():
-    return {"message": "Welcome to Transactly AI API 🚀"}
\ No newline at end of file
+    return {"message": "Welcome to Transactly AI API 🚀"}
+
+
+@app.get("/models")
+def models_status():
+    """Report which models are loaded, their load time and memory."""
+    return get_registry().status()
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Per-stage latency histograms, decision counters and cache hit ratios (Prometheus text format)."""
+    return PlainTextResponse(get_metrics().render(), media_type=CONTENT_TYPE)
\ No newline at end of file
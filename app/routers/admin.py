@@ -0,0 +1,64 @@
+# app/routers/admin.py
+"""
+Admin API — model versions, zero-downtime hot-swap and background retraining.
+If ADMIN_TOKEN is set, requests must send it in the X-Admin-Token header.
+"""
+
+import os
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from app.core.classifier import current_version, list_versions
+from app.core.registry import get_registry
+from app.core.retrain_trigger import get_retrain_trigger
+
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None)):
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+
+router = APIRouter(dependencies=[Depends(require_admin)])
+
+
+class SwapRequest(BaseModel):
+    version: Optional[str] = None
+
+
+@router.get("/models")
+def model_versions():
+    """Saved versions, the published (CURRENT) one and the one being served."""
+    return {
+        "serving": get_registry().model_version,
+        "current": current_version(),
+        "versions": list_versions(),
+    }
+
+
+@router.post("/models/swap")
+async def swap_model(req: SwapRequest):
+    """
+    Load a model version (default: CURRENT) next to the live one, warm it and
+    switch over atomically. In-flight requests finish on the old model.
+    An explicit version stays served (every worker's CURRENT watcher skips it)
+    until a swap without one.
+    """
+    try:
+        return await run_in_threadpool(get_registry().swap_classifier, req.version)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@router.post("/retrain")
+def start_retrain():
+    """Start a background retrain process now (no-op if one is running)."""
+    started = get_retrain_trigger().start()
+    return {"started": started, **get_retrain_trigger().status()}
+
+
+@router.get("/retrain")
+def retrain_status():
+    return get_retrain_trigger().status()
@@ -0,0 +1,79 @@
+# app/routers/bulk.py
+"""
+Bulk Classification API — classifies thousands of transactions per request.
+Runs every pipeline stage once per batch instead of once per transaction.
+"""
+
+import io
+from typing import List
+from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from app.core.decision import decide_many
+from app.core.streaming import (
+    DEFAULT_CHUNK_SIZE, StreamProgress, classify_stream, format_chunk, read_rows,
+)
+from app.core.registry import get_registry
+from app.routers.classify import format_result
+
+router = APIRouter()
+
+MAX_BATCH_SIZE = 50_000
+
+
+class BulkInput(BaseModel):
+    descriptions: List[str]
+
+
+@router.post("/")
+def classify_bulk(input: BulkInput):
+    """
+    Classify a batch of transactions.
+    Each item in `results` has the same schema as /api/classify/.
+    """
+    if len(input.descriptions) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large ({len(input.descriptions)} > {MAX_BATCH_SIZE}); split it up.",
+        )
+    embeddings_db, texts_db = get_registry().explanation_db
+    results = decide_many(input.descriptions, embeddings_db, texts_db)
+    return {
+        "count": len(results),
+        "results": [format_result(d, r) for d, r in zip(input.descriptions, results)],
+    }
+
+
+
+def _stream_upload(upload: UploadFile, fmt, output_format, chunk_size):
+    """Sync generator: read the spooled upload lazily and emit each classified chunk."""
+    progress = StreamProgress()
+    lines = io.TextIOWrapper(upload.file, encoding="utf-8", newline="")
+    try:
+        first = True
+        for results in classify_stream(read_rows(lines, fmt), chunk_size, progress):
+            yield format_chunk(results, output_format, header=first)
+            first = False
+        progress.report(final=True)
+    finally:
+        lines.detach()
+
+
+@router.post("/stream")
+def classify_statement_stream(
+    file: UploadFile = File(...),
+    fmt: str = "csv",
+    output_format: str = "ndjson",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+):
+    """
+    Stream-classify an uploaded statement (CSV with transaction_id, description, amount,
+    or NDJSON). Rows are read and classified in chunks and results are streamed back
+    as CSV or NDJSON while the rest of the file is still being processed.
+    """
+    if fmt not in ("csv", "ndjson") or output_format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="fmt and output_format must be 'csv' or 'ndjson'")
+    if not 1 <= chunk_size <= MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"chunk_size must be between 1 and {MAX_BATCH_SIZE}")
+    media_type = "application/x-ndjson" if output_format == "ndjson" else "text/csv"
+    return StreamingResponse(_stream_upload(file, fmt, output_format, chunk_size), media_type=media_type)
@@ -1,37 +1,110 @@
 # app/routers/classify.py
 """
 Classification API endpoint — integrates Decision Logic.
+Rule hits are answered inline; model-path requests go through a micro-batcher
+so concurrent callers share one embedding + classifier call. The rules run once
+per request, and everything past them (models, explanation store lookups for
+the response) runs off the event loop.
 """
 
+import os
 from fastapi import APIRouter
 from pydantic import BaseModel
-from app.core.decision import decide_category
-import numpy as np
-import os
+from starlette.concurrency import run_in_threadpool
+from app.core.batching import MicroBatcher
+from app.core.decision import decide_category, decide_many, decide_rules, get_decision_cache
+from app.core.metrics import get_metrics
+from app.core.registry import get_registry
 
 router = APIRouter()
 
-# Load precomputed embeddings/texts for explainability
-EMB_PATH = "data/processed/embeddings.npy"
-TEXT_PATH = "data/processed/texts.npy"
-embeddings_db = np.load(EMB_PATH) if os.path.exists(EMB_PATH) else None
-texts_db = np.load(TEXT_PATH, allow_pickle=True) if os.path.exists(TEXT_PATH) else None
+# Set CLASSIFY_BATCHING=0 to run each model-path request on its own
+BATCHING_ENABLED = os.getenv("CLASSIFY_BATCHING", "1") != "0"
+
 
 class TransactionInput(BaseModel):
     description: str
 
 
-@router.post("/")
-def classify_transaction(input: TransactionInput):
-    """
-    Classify a single transaction and return explainable output.
-    """
-    result = decide_category(input.description, embeddings_db, texts_db)
-    return {
-        "description": input.description,
+def _similar_details(similar) -> list:
+    """How many training rows stand behind each similar example, and their labels."""
+    embeddings_db, _ = get_registry().explanation_db
+    describe = getattr(embeddings_db, "describe", None)
+    if describe is None:
+        return []
+    details = []
+    for text, score in similar:
+        info = describe(text)
+        if info is not None:
+            details.append({**info, "similarity": score})
+    return details
+
+
+def format_result(description: str, result: dict) -> dict:
+    """Shape a decision result into the public API response."""
+    response = {
+        "description": description,
         "final_category": result["final_category"],
         "method": result["method"],
         "confidence": round(result["confidence"], 3),
         "explanation": result.get("explanation"),
         "similar_examples": result.get("similar_examples", []),
-    }
\ No newline at end of file
+    }
+    if response["similar_examples"]:
+        response["similar_details"] = _similar_details(response["similar_examples"])
+    return response
+
+
+# The model path: descriptions already missed the rules, and the responses are
+# formatted here too, on the batcher's / threadpool's thread
+
+def _decide_batch(descriptions):
+    embeddings_db, texts_db = get_registry().explanation_db
+    results = decide_many(descriptions, embeddings_db, texts_db, check_rules=False)
+    return [format_result(d, r) for d, r in zip(descriptions, results)]
+
+
+def _decide_one(description):
+    embeddings_db, texts_db = get_registry().explanation_db
+    result = decide_category(description, embeddings_db, texts_db, check_rules=False)
+    return format_result(description, result)
+
+
+batcher = MicroBatcher(_decide_batch)
+
+
+@get_metrics().add_collector
+def _batcher_metrics():
+    stats = batcher.stats()
+    yield ("transactly_batcher_queue_depth", "gauge", "Requests waiting for the classify micro-batcher.",
+           (), {(): stats["queue_depth"]})
+    yield ("transactly_batcher_items_total", "counter", "Requests classified through the micro-batcher.",
+           (), {(): stats["items"]})
+    yield ("transactly_batcher_batches_total", "counter", "Batches run by the classify micro-batcher.",
+           (), {(): stats["batches"]})
+
+
+@router.post("/")
+async def classify_transaction(input: TransactionInput):
+    """
+    Classify a single transaction and return explainable output.
+    """
+    rule_result = decide_rules(input.description)
+    if rule_result is not None:
+        # Rule hits never touch the models; answer inline
+        return format_result(input.description, rule_result)
+    if BATCHING_ENABLED:
+        return await batcher.submit(input.description)
+    return await run_in_threadpool(_decide_one, input.description)
+
+
+@router.get("/batching")
+def batching_stats():
+    """Queue depth and batch-size distribution of the classify micro-batcher."""
+    return {"enabled": BATCHING_ENABLED, **batcher.stats()}
+
+
+@router.get("/cache")
+def cache_stats():
+    """Hit/miss statistics of the decision result cache."""
+    return get_decision_cache().stats()
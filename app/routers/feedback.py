@@ -1,17 +1,19 @@
 # app/routers/feedback.py
 """
 Feedback API — stores user corrections for model improvement.
+Rows are appended to the SQLite feedback store (one INSERT per submission);
+cached decisions for the corrected texts are dropped.
 """
 
+from typing import List
 from fastapi import APIRouter
 from pydantic import BaseModel
-import pandas as pd
-import os
+from app.core.decision import invalidate_feedback
+from app.core.feedback_store import get_feedback_store
+from app.core.retrain_trigger import get_retrain_trigger
 
 router = APIRouter()
 
-FEEDBACK_PATH = "data/feedback.csv"
-
 class FeedbackItem(BaseModel):
     description: str
     predicted_category: str
@@ -20,13 +22,12 @@ class FeedbackItem(BaseModel):
     confidence: float
 
 
-@router.post("/")
-def submit_feedback(item: FeedbackItem):
-    """
-    Receive feedback and store in feedback.csv
-    """
-    os.makedirs("data", exist_ok=True)
-    new_entry = {
+class BulkFeedback(BaseModel):
+    items: List[FeedbackItem]
+
+
+def _entry(item: FeedbackItem) -> dict:
+    return {
         "description": item.description,
         "predicted_category": item.predicted_category,
         "corrected_category": item.corrected_category,
@@ -34,12 +35,25 @@ def submit_feedback(item: FeedbackItem):
         "confidence": item.confidence
     }
 
-    # Append to CSV
-    if os.path.exists(FEEDBACK_PATH):
-        df = pd.read_csv(FEEDBACK_PATH)
-        df = pd.concat([df, pd.DataFrame([new_entry])], ignore_index=True)
-    else:
-        df = pd.DataFrame([new_entry])
-    df.to_csv(FEEDBACK_PATH, index=False)
 
-    return {"message": "✅ Feedback recorded successfully", "data": new_entry}
\ No newline at end of file
+@router.post("/")
+def submit_feedback(item: FeedbackItem):
+    """
+    Receive feedback and append it to the feedback store
+    """
+    new_entry = _entry(item)
+    feedback_id = get_feedback_store().add(new_entry)
+    invalidate_feedback([item.description])
+    get_retrain_trigger().notify()
+    return {"message": "✅ Feedback recorded successfully", "id": feedback_id, "data": new_entry}
+
+
+@router.post("/bulk")
+def submit_feedback_bulk(batch: BulkFeedback):
+    """
+    Receive many corrections at once; written in a single transaction
+    """
+    written = get_feedback_store().add_many([_entry(item) for item in batch.items])
+    invalidate_feedback([item.description for item in batch.items])
+    get_retrain_trigger().notify()
+    return {"message": f"✅ {written} feedback items recorded successfully", "count": written}
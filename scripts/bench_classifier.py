@@ -0,0 +1,147 @@
+# scripts/bench_classifier.py
+"""
+NumPy vs sklearn inference for the Logistic Regression classifier.
+Scores the same embeddings with the pickled sklearn estimator and with the
+exported weights (app/core/linear_model.py), then reports:
+  • parity    max |Δprob|, top-1 agreement and top-k agreement
+  • load      seconds to unpickle the .pkl vs load the .npz
+  • single    p50/p99 latency of one-row prediction (predict_category)
+  • batch     rows/sec of predict_proba at a few batch sizes
+
+Uses the current model and the embeddings of the columnar dataset; without
+them (or with --synthetic) it trains on random vectors of the same shape.
+
+Usage:
+    python scripts/bench_classifier.py
+    python scripts/bench_classifier.py --synthetic 20000 -o bench_classifier.json
+"""
+import sys, os
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+from app.core.classifier import linear_path, load_model, model_path_for, predict_category
+from app.core.dataset import dataset_exists, read_embeddings
+from app.core.embedding_backends import EMBED_DIM
+from app.core.linear_model import LinearSoftmax, check_parity
+
+BATCH_SIZES = (1, 32, 256, 4096)
+
+
+def _synthetic(n_rows: int, n_classes: int = 10, seed: int = 0):
+    from sklearn.linear_model import LogisticRegression
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_classes, EMBED_DIM)).astype(np.float32)
+    y = rng.integers(0, n_classes, size=n_rows)
+    X = centers[y] + 2.0 * rng.standard_normal((n_rows, EMBED_DIM)).astype(np.float32)
+    X /= np.linalg.norm(X, axis=1, keepdims=True)
+    labels = np.array([f"category_{i}" for i in range(n_classes)])[y]
+    return LogisticRegression(max_iter=300).fit(X, labels), X
+
+
+def _latency(fn, rows) -> dict:
+    times = np.empty(len(rows))
+    for i, row in enumerate(rows):
+        start = time.perf_counter()
+        fn(row)
+        times[i] = time.perf_counter() - start
+    times *= 1000
+    return {"p50_ms": round(float(np.percentile(times, 50)), 5),
+            "p99_ms": round(float(np.percentile(times, 99)), 5)}
+
+
+def _rows_per_sec(fn, X, batch_size: int, min_seconds: float = 0.2) -> float:
+    batches = [X[i:i + batch_size] for i in range(0, len(X), batch_size)][:max(1, 20000 // batch_size)]
+    fn(batches[0])   # warm-up
+    rows, start = 0, time.perf_counter()
+    while time.perf_counter() - start < min_seconds:
+        for batch in batches:
+            fn(batch)
+            rows += len(batch)
+    return round(rows / (time.perf_counter() - start), 1)
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    out = fn()
+    return out, round(time.perf_counter() - start, 4)
+
+
+def bench(clf, X, k: int = 3, queries: int = 2000) -> dict:
+    linear = LinearSoftmax.from_sklearn(clf)
+    X = np.asarray(X, dtype=np.float32)
+
+    try:
+        check_parity(clf, linear, X)
+        within = True
+    except ValueError:
+        within = False
+    expected = clf.predict_proba(X)
+    actual = linear.predict_proba(X)
+    top_sk = np.argsort(-expected, axis=1)[:, :k]
+    top_np = [[list(linear.classes_).index(c) for c, _ in row] for row in linear.top_k(X, k)]
+    report = {
+        "rows": int(len(X)),
+        "classes": int(len(linear.classes_)),
+        "parity": {
+            "max_abs_prob_diff": float(np.max(np.abs(expected - actual))),
+            "within_tolerance": within,
+            "top1_agreement": round(float(np.mean(expected.argmax(1) == actual.argmax(1))), 6),
+            f"top{k}_agreement": round(float(np.mean([set(a) == set(b) for a, b in zip(top_sk, top_np)])), 6),
+        },
+    }
+
+    sample = X[np.random.default_rng(0).integers(0, len(X), size=min(queries, len(X)))]
+    report["single"] = {
+        "sklearn": _latency(lambda x: predict_category(clf, x), sample),
+        "numpy": _latency(lambda x: predict_category(linear, x), sample),
+    }
+    report["batch_rows_per_sec"] = {
+        str(b): {"sklearn": _rows_per_sec(clf.predict_proba, X, b),
+                 "numpy": _rows_per_sec(linear.predict_proba, X, b)}
+        for b in BATCH_SIZES
+    }
+    report["speedup_single_p50"] = round(
+        report["single"]["sklearn"]["p50_ms"] / max(report["single"]["numpy"]["p50_ms"], 1e-9), 1)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark NumPy vs sklearn classifier inference.")
+    parser.add_argument("--synthetic", type=int, metavar="ROWS",
+                        help="Train on ROWS random vectors instead of the current model + dataset")
+    parser.add_argument("-k", type=int, default=3, help="k for the top-k parity check")
+    parser.add_argument("--queries", type=int, default=2000, help="Rows timed one at a time")
+    parser.add_argument("-o", "--output", help="Also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    model_path = model_path_for()
+    load = {}
+    if args.synthetic or not (dataset_exists() and os.path.exists(model_path)):
+        print(f"🔹 Training on {args.synthetic or 20000} synthetic rows...")
+        clf, X = _synthetic(args.synthetic or 20000)
+    else:
+        clf, load["pkl_seconds"] = _timed(lambda: load_model(model_path, runtime="sklearn"))
+        if os.path.exists(linear_path(model_path)):
+            _, load["npz_seconds"] = _timed(lambda: LinearSoftmax.load(linear_path(model_path)))
+        X, _ = read_embeddings()
+        print(f"🔹 Using {model_path} on {len(X)} dataset rows")
+
+    report = bench(clf, X, k=args.k, queries=args.queries)
+    if load:
+        report["load"] = load
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report saved → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
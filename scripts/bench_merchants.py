@@ -0,0 +1,159 @@
+# scripts/bench_merchants.py
+"""
+Benchmark fuzzy merchant lookup against dictionary size.
+Generates synthetic merchant dictionaries (names + aliases) and, for each
+size, compares the trigram-indexed lookup with a linear rapidfuzz scan:
+  • build / save / reload time and on-disk size of the persisted index
+  • p50/p99 latency per lookup, indexed vs linear
+  • agreement: share of queries where both return the same merchant
+
+Queries are dictionary names with one typo (should match) mixed with random
+strings (should not).
+
+Usage:
+    python scripts/bench_merchants.py --sizes 1000 10000 100000
+    python scripts/bench_merchants.py --sizes 300000 --linear-queries 50 -o bench_merchants.json
+"""
+import sys, os
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import json
+import random
+import string
+import tempfile
+import time
+
+import numpy as np
+
+from app.core.merchants import MerchantIndex
+from app.core.preprocessing import FUZZY_SCORE_CUTOFF
+
+CONSONANTS = "bcdfghjklmnprstvwyz"
+VOWELS = "aeiou"
+# Common words real merchant names share (worst case for trigram postings)
+COMMON_WORDS = ["store", "mart", "pay", "foods", "pharmacy", "fuel", "travels", "online", "india", "shop"]
+
+
+def _word(rng) -> str:
+    syllables = rng.randint(1, 3)
+    return "".join(rng.choice(CONSONANTS) + rng.choice(VOWELS) + rng.choice(("", "", rng.choice(CONSONANTS)))
+                   for _ in range(syllables))
+
+
+def synthetic_merchants(n: int, seed: int = 42):
+    """n distinct (name, aliases) entries: 1–3 words, some with a common suffix word."""
+    rng = random.Random(seed)
+    seen, entries = set(), []
+    while len(entries) < n:
+        words = [_word(rng) for _ in range(rng.choice((1, 1, 2, 2, 3)))]
+        if rng.random() < 0.3:
+            words.append(rng.choice(COMMON_WORDS))
+        name = " ".join(words)
+        if name in seen:
+            continue
+        seen.add(name)
+        aliases = [name.replace(" ", "")] if " " in name and rng.random() < 0.5 else []
+        entries.append((name, aliases))
+    return entries
+
+
+def _typo(text: str, rng) -> str:
+    i = rng.randrange(len(text))
+    op = rng.choice(("sub", "del", "ins"))
+    c = rng.choice(string.ascii_lowercase)
+    if op == "sub":
+        return text[:i] + c + text[i + 1:]
+    if op == "del" and len(text) > 3:
+        return text[:i] + text[i + 1:]
+    return text[:i] + c + text[i:]
+
+
+def queries_for(entries, n: int, seed: int = 0):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        if rng.random() < 0.7:
+            out.append(_typo(rng.choice(entries)[0], rng))
+        else:
+            out.append("".join(rng.choices(string.ascii_lowercase + " ", k=rng.randint(4, 16))).strip() or "x")
+    return out
+
+
+def _latency(fn, items) -> dict:
+    times = np.empty(len(items))
+    results = []
+    for i, item in enumerate(items):
+        start = time.perf_counter()
+        results.append(fn(item))
+        times[i] = time.perf_counter() - start
+    times *= 1000
+    return {"p50_ms": round(float(np.percentile(times, 50)), 4),
+            "p99_ms": round(float(np.percentile(times, 99)), 4)}, results
+
+
+def bench_size(n: int, args) -> dict:
+    entries = synthetic_merchants(n)
+    start = time.perf_counter()
+    indexed = MerchantIndex(entries, min_indexed=0)
+    build = time.perf_counter() - start
+    linear = MerchantIndex(entries, min_indexed=sys.maxsize)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "merchant_index.npz")
+        start = time.perf_counter()
+        indexed.save(path)
+        save = time.perf_counter() - start
+        size_mb = os.path.getsize(path) / 1e6
+        start = time.perf_counter()
+        indexed = MerchantIndex.load(path)
+        load = time.perf_counter() - start
+
+    queries = queries_for(entries, args.queries)
+    fast, fast_hits = _latency(lambda q: indexed.lookup(q, FUZZY_SCORE_CUTOFF), queries)
+    sample = queries[:args.linear_queries]
+    slow, slow_hits = _latency(lambda q: linear.lookup(q, FUZZY_SCORE_CUTOFF), sample)
+    same = [a == b or bool(a and b and a[1] == b[1]) for a, b in zip(fast_hits, slow_hits)]
+    return {
+        "merchants": n,
+        "names": len(indexed),
+        "build_seconds": round(build, 3),
+        "save_seconds": round(save, 3),
+        "load_seconds": round(load, 3),
+        "index_mb": round(size_mb, 2),
+        "indexed": fast,
+        "linear": slow,
+        "speedup_p50": round(slow["p50_ms"] / max(fast["p50_ms"], 1e-9), 1),
+        "matched": round(float(np.mean([h is not None for h in fast_hits])), 4),
+        # Same merchant, or an equally scored one (ties can break differently)
+        "agreement_with_linear": round(float(np.mean(same)), 4),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark indexed vs linear fuzzy merchant lookup.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--queries", type=int, default=2000, help="Indexed lookups timed per size")
+    parser.add_argument("--linear-queries", type=int, default=200, help="Linear-scan lookups timed per size")
+    parser.add_argument("-o", "--output", help="Also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = []
+    print(f"{'merchants':>10} {'build s':>8} {'load s':>7} {'index MB':>9} "
+          f"{'indexed p50':>12} {'linear p50':>11} {'speedup':>8} {'agree':>6}")
+    for n in args.sizes:
+        r = bench_size(n, args)
+        report.append(r)
+        print(f"{n:>10} {r['build_seconds']:>8.2f} {r['load_seconds']:>7.3f} {r['index_mb']:>9.2f} "
+              f"{r['indexed']['p50_ms']:>10.3f}ms {r['linear']['p50_ms']:>9.3f}ms "
+              f"{r['speedup_p50']:>7.1f}x {r['agreement_with_linear']:>6.3f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report saved → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
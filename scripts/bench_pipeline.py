@@ -0,0 +1,308 @@
+# scripts/bench_pipeline.py
+"""
+Offline benchmark suite for the classification pipeline.
+Runs every stage — rules, normalization, embedding, classifier, similarity
+search, the full decision and the HTTP layer — on synthetic data from
+prepare_data.generate_synthetic_data, with the deterministic hashing
+embedding backend so no model download (or torch) is needed.
+
+For each dataset size it reports:
+  • latency   p50/p99/mean per single item over a sample of queries
+  • throughput rows/sec of the batch APIs over the whole dataset, plus the
+    peak traced memory of one chunk
+Results are written as JSON. With --baseline, any stage whose p50 latency or
+throughput is worse than the baseline by more than --tolerance makes the
+script exit with status 1.
+
+Usage:
+    python scripts/bench_pipeline.py --sizes 1000 10000 100000
+    python scripts/bench_pipeline.py --save-baseline          # record a baseline
+    python scripts/bench_pipeline.py --baseline data/processed/benchmarks/baseline.json
+    python scripts/bench_pipeline.py --sizes 10000000 --stages rules normalize decide_many
+"""
+import sys, os
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+# Benchmarks must not read or grow the shared on-disk embedding cache
+os.environ["EMBED_CACHE_PATH"] = ""
+# ...nor have the HTTP stage's model replaced by the one CURRENT names
+os.environ["MODEL_POLL_SECONDS"] = "0"
+
+import argparse
+import json
+import platform
+import random
+import resource
+import time
+import tracemalloc
+
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from app.core.classifier import CLASSIFIER_RUNTIME, predict_category
+from app.core.linear_model import LinearSoftmax
+from app.core.decision import decide_category, decide_many, explain_similarity, get_decision_cache
+from app.core.embedding_backends import HashingBackend
+from app.core.embeddings import encode_cached, get_embedding_cache
+from app.core.preprocessing import _canonicalize_clean, normalize_many, normalize_transaction
+from app.core.registry import get_registry
+from app.core.rules import apply_rules, apply_rules_many
+from app.core.similarity import get_index
+from scripts.prepare_data import MERCHANT_TEMPLATES, generate_synthetic_data
+
+RESULTS_PATH = "data/processed/benchmarks/results.json"
+BASELINE_PATH = "data/processed/benchmarks/baseline.json"
+LATENCY_STAGES = ["rules", "normalize", "embed", "predict", "explain", "decide", "http"]
+THROUGHPUT_STAGES = ["rules", "normalize", "embed", "predict", "decide_many"]
+# Latency changes smaller than this are treated as timer noise
+MIN_DELTA_MS = 0.01
+
+
+def synthetic_dataset(n_rows: int, seed: int = 42):
+    """n_rows (description, category) pairs, generated in bounded chunks."""
+    random.seed(seed)
+    n_cats = len(MERCHANT_TEMPLATES)
+    descriptions, categories = [], []
+    while len(descriptions) < n_rows:
+        per_cat = min(10_000, -(-(n_rows - len(descriptions)) // n_cats))
+        df = generate_synthetic_data(n_per_cat=per_cat).sample(frac=1, random_state=seed)
+        descriptions.extend(df["description"].str.lower().tolist())
+        categories.extend(df["category"].tolist())
+    return descriptions[:n_rows], np.array(categories[:n_rows])
+
+
+def _embed_rows(embedder, norm_texts):
+    """Embeddings for many rows, encoding each distinct text once."""
+    unique, inverse = np.unique(np.asarray(norm_texts, dtype=object), return_inverse=True)
+    return embedder.encode(list(unique))[inverse], unique, inverse
+
+
+def _latency(fn, items) -> dict:
+    times = np.empty(len(items))
+    for i, item in enumerate(items):
+        start = time.perf_counter()
+        fn(item)
+        times[i] = time.perf_counter() - start
+    times *= 1000
+    return {
+        "n": len(items),
+        "p50_ms": round(float(np.percentile(times, 50)), 5),
+        "p99_ms": round(float(np.percentile(times, 99)), 5),
+        "mean_ms": round(float(times.mean()), 5),
+        "ops_per_sec": round(1000 / float(times.mean()), 1),
+    }
+
+
+def _throughput(fn, chunks, reset=None) -> dict:
+    """Run fn over every chunk; peak memory is traced on the first chunk only."""
+    if reset:
+        reset()
+    tracemalloc.start()
+    fn(chunks[0])
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    if reset:
+        reset()
+    rows = 0
+    start = time.perf_counter()
+    for chunk in chunks:
+        fn(chunk)
+        rows += len(chunk)
+    seconds = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 4),
+        "rows_per_sec": round(rows / seconds, 1) if seconds else 0.0,
+        "chunk_peak_mb": round(peak / 1e6, 3),
+    }
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS, KB on Linux
+    return round(peak / 1e6 if sys.platform == "darwin" else peak / 1e3, 1)
+
+
+def bench_size(n_rows: int, args) -> dict:
+    stages = set(args.stages)
+    setup = {"rows": n_rows}
+    embedder = HashingBackend()
+    cache = get_embedding_cache()
+
+    t0 = time.perf_counter()
+    descriptions, categories = synthetic_dataset(n_rows)
+    setup["generate_seconds"] = round(time.perf_counter() - t0, 3)
+
+    # Classifier trained on a bounded sample (training cost is not what we measure)
+    t0 = time.perf_counter()
+    n_train = min(n_rows, args.max_train_rows)
+    X_train, _, _ = _embed_rows(embedder, normalize_many(descriptions[:n_train]))
+    clf = LogisticRegression(max_iter=300).fit(X_train, categories[:n_train])
+    if CLASSIFIER_RUNTIME == "numpy":
+        # Score the way the API does (see app/core/linear_model.py)
+        clf = LinearSoftmax.from_sklearn(clf)
+    setup["train_rows"] = n_train
+    setup["classifier_runtime"] = CLASSIFIER_RUNTIME
+    setup["train_seconds"] = round(time.perf_counter() - t0, 3)
+
+    # Explanation DB over (up to) max_db_rows rows, one row per distinct text
+    # as the explanation store keeps it
+    n_db = min(n_rows, args.max_db_rows)
+    db_norm = normalize_many(descriptions[:n_db])
+    texts_db = np.unique(np.asarray(db_norm, dtype=object))
+    embeddings_db = embedder.encode(list(texts_db))
+    t0 = time.perf_counter()
+    index = get_index(embeddings_db, texts_db)
+    setup["db_rows"] = n_db
+    setup["db_texts"] = int(len(texts_db))
+    setup["index_mode"] = index.mode
+    setup["index_build_seconds"] = round(time.perf_counter() - t0, 3)
+
+    registry = get_registry()
+    registry.set_embedder(embedder)
+    registry.set_classifier(clf, "bench")
+    registry.set_explanation_db(embeddings_db, texts_db)
+
+    rng = np.random.default_rng(0)
+    queries = [descriptions[i] for i in rng.integers(0, n_rows, size=args.queries)]
+    query_norm = [normalize_transaction(q) for q in queries]
+    query_embs = encode_cached(embedder, query_norm)
+
+    latency = {}
+    if "rules" in stages:
+        latency["rules"] = _latency(apply_rules, queries)
+    if "normalize" in stages:
+        _canonicalize_clean.cache_clear()
+        latency["normalize"] = _latency(normalize_transaction, queries)
+    if "embed" in stages:
+        cache.clear()
+        latency["embed"] = _latency(lambda t: encode_cached(embedder, [t]), query_norm)
+    if "predict" in stages:
+        latency["predict"] = _latency(lambda e: predict_category(clf, e), query_embs)
+    if "explain" in stages:
+        latency["explain"] = _latency(lambda e: explain_similarity(e, embeddings_db, texts_db), query_embs)
+    if "decide" in stages:
+        # Starts cold; repeated merchants in the sample then hit the result cache
+        get_decision_cache().clear()
+        latency["decide"] = _latency(lambda d: decide_category(d, embeddings_db, texts_db), queries)
+    if "http" in stages:
+        from fastapi.testclient import TestClient
+        from app.main import app
+        with TestClient(app) as client:
+            latency["http"] = _latency(
+                lambda d: client.post("/api/classify/", json={"description": d}).raise_for_status(),
+                queries,
+            )
+
+    chunks = [descriptions[i:i + args.chunk_size] for i in range(0, n_rows, args.chunk_size)]
+    throughput = {}
+    if "rules" in stages:
+        throughput["rules"] = _throughput(apply_rules_many, chunks)
+    if "normalize" in stages:
+        throughput["normalize"] = _throughput(normalize_many, chunks, reset=_canonicalize_clean.cache_clear)
+    if {"embed", "predict"} & stages:
+        norm_chunks = [normalize_many(c) for c in chunks]
+    if "embed" in stages:
+        throughput["embed"] = _throughput(lambda c: encode_cached(embedder, c), norm_chunks, reset=cache.clear)
+    if "predict" in stages:
+        emb_chunks = [encode_cached(embedder, c) for c in norm_chunks]
+        throughput["predict"] = _throughput(clf.predict_proba, emb_chunks)
+        del emb_chunks
+    if "decide_many" in stages:
+        throughput["decide_many"] = _throughput(decide_many, chunks, reset=get_decision_cache().clear)
+
+    setup["peak_rss_mb"] = _peak_rss_mb()
+    return {"setup": setup, "latency": latency, "throughput": throughput}
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """List of human-readable regressions of results against baseline."""
+    regressions = []
+    for size, current in results["sizes"].items():
+        base = baseline.get("sizes", {}).get(size)
+        if base is None:
+            continue
+        for stage, cur in current["latency"].items():
+            ref = base["latency"].get(stage)
+            if ref and cur["p50_ms"] > ref["p50_ms"] * (1 + tolerance) \
+                    and cur["p50_ms"] - ref["p50_ms"] > MIN_DELTA_MS:
+                regressions.append(f"{size} rows · {stage} latency p50 "
+                                   f"{ref['p50_ms']:.4f} → {cur['p50_ms']:.4f} ms")
+        for stage, cur in current["throughput"].items():
+            ref = base["throughput"].get(stage)
+            if ref and cur["rows_per_sec"] < ref["rows_per_sec"] / (1 + tolerance):
+                regressions.append(f"{size} rows · {stage} throughput "
+                                   f"{ref['rows_per_sec']:.0f} → {cur['rows_per_sec']:.0f} rows/s")
+    return regressions
+
+
+def _print_size(size, result):
+    setup = result["setup"]
+    print(f"\n📊 {size} rows  (db {setup['db_rows']} rows, {setup['index_mode']} index, "
+          f"peak RSS {setup['peak_rss_mb']} MB)")
+    print(f"{'stage':>12} {'p50 ms':>10} {'p99 ms':>10} {'ops/s':>12}")
+    for stage, r in result["latency"].items():
+        print(f"{stage:>12} {r['p50_ms']:>10.4f} {r['p99_ms']:>10.4f} {r['ops_per_sec']:>12.0f}")
+    print(f"{'batch stage':>12} {'rows/s':>12} {'chunk peak MB':>14}")
+    for stage, r in result["throughput"].items():
+        print(f"{stage:>12} {r['rows_per_sec']:>12.0f} {r['chunk_peak_mb']:>14.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark of every pipeline stage.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000],
+                        help="Dataset sizes in rows (up to 10M)")
+    parser.add_argument("--stages", nargs="+", default=sorted(set(LATENCY_STAGES + THROUGHPUT_STAGES)),
+                        choices=sorted(set(LATENCY_STAGES + THROUGHPUT_STAGES)))
+    parser.add_argument("--queries", type=int, default=500, help="Single-item calls per latency stage")
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--max-train-rows", type=int, default=50_000)
+    parser.add_argument("--max-db-rows", type=int, default=250_000,
+                        help="Cap on explanation DB rows (float32 vectors are held in memory)")
+    parser.add_argument("-o", "--output", default=RESULTS_PATH)
+    parser.add_argument("--baseline", help="Fail if results regress against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed relative slowdown before a stage counts as regressed")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help=f"Also write the results to {BASELINE_PATH}")
+    args = parser.parse_args(argv)
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "embedder": "hashing",
+            "args": vars(args),
+        },
+        "sizes": {},
+    }
+    for size in args.sizes:
+        results["sizes"][str(size)] = bench_size(size, args)
+        _print_size(size, results["sizes"][str(size)])
+
+    targets = [args.output] + ([BASELINE_PATH] if args.save_baseline else [])
+    for path in targets:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n✅ Results saved → {path}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} stage(s) regressed more than {args.tolerance:.0%}:")
+            for r in regressions:
+                print(f"  • {r}")
+            sys.exit(1)
+        print(f"\n✅ No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# scripts/bench_rules.py
+"""
+Benchmark the compiled rules engine against the legacy per-pattern re.search loop.
+Generates N synthetic merchant rules and shows that compiled matching time stays
+flat as the rule count grows, while the sequential scan grows linearly.
+
+Usage:
+    python scripts/bench_rules.py --sizes 10 100 1000 10000
+"""
+import sys, os
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import random
+import re
+import string
+import time
+
+from app.core.rules import RULES, RuleEngine, _from_dict, keywords_to_pattern
+
+
+def synthetic_rules(n_rules: int, keywords_per_rule: int = 5, seed: int = 42):
+    """Built-in rules followed by n_rules random merchant keyword rules."""
+    rng = random.Random(seed)
+    rules = _from_dict(RULES)
+    for _ in range(n_rules):
+        keywords = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 10)))
+                    for _ in range(keywords_per_rule)]
+        rules.append((keywords_to_pattern(keywords), "Others", keywords))
+    return rules
+
+
+def legacy_apply(compiled, text):
+    text = text.lower().strip()
+    for rx, category in compiled:
+        if rx.search(text):
+            return category
+    return None
+
+
+def bench(n_rules: int, texts, repeat: int = 3):
+    rules = synthetic_rules(n_rules)
+    legacy = [(re.compile(p), c) for p, c, _ in rules]
+
+    t0 = time.perf_counter()
+    engine = RuleEngine(rules)
+    build_s = time.perf_counter() - t0
+
+    def best_of(fn):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for t in texts:
+                fn(t)
+            times.append(time.perf_counter() - start)
+        return min(times) / len(texts) * 1e6
+
+    compiled_us = best_of(engine.apply)
+    legacy_us = best_of(lambda t: legacy_apply(legacy, t))
+    agree = all((engine.apply(t)[0]) == legacy_apply(legacy, t) for t in texts)
+    return build_s, compiled_us, legacy_us, agree
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the rules engine.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--texts", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(7)
+    merchants = ["swiggy", "amazon", "unknown merchant", "irctc", "transfer", "local kirana store"]
+    texts = [f"{rng.choice(merchants)} payment #{rng.randint(1000, 9999)}" for _ in range(args.texts)]
+
+    print(f"{'rules':>8} {'build (s)':>10} {'compiled (µs/txn)':>18} {'sequential (µs/txn)':>20} {'agree':>6}")
+    for n in args.sizes:
+        build_s, compiled_us, legacy_us, agree = bench(n, texts)
+        print(f"{n + len(RULES):>8} {build_s:>10.3f} {compiled_us:>18.2f} {legacy_us:>20.2f} {str(agree):>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# scripts/check_startup.py
+"""
+Import-time budget check for the API.
+Imports app.main in fresh interpreters and fails (exit 1) if the import takes
+longer than the budget or pulls in a heavy dependency that should only load in
+the prewarm stage. Prints the slowest imports to show where time went.
+
+Usage:
+    python scripts/check_startup.py
+    python scripts/check_startup.py --budget 0.8 --runs 5
+"""
+import sys, os
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+import argparse
+import json
+import subprocess
+
+IMPORT_BUDGET_SECONDS = 1.5
+# Must not be imported by `import app.main`; they belong to the prewarm stage
+HEAVY_MODULES = ["torch", "sentence_transformers", "transformers", "onnxruntime",
+                 "sklearn", "scipy", "pandas", "joblib", "pyarrow"]
+
+PROBE = (
+    "import json, sys, time\n"
+    "start = time.perf_counter()\n"
+    "import app.main\n"
+    "seconds = time.perf_counter() - start\n"
+    "print(json.dumps({'seconds': seconds, 'modules': sorted(sys.modules)}))\n"
+)
+
+
+def probe(importtime: bool = False) -> dict:
+    cmd = [sys.executable] + (["-X", "importtime"] if importtime else []) + ["-c", PROBE]
+    env = dict(os.environ, PYTHONPATH=PROJECT_ROOT)
+    out = subprocess.run(cmd, cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+    result["importtime"] = out.stderr
+    return result
+
+
+def slowest_imports(importtime_log: str, top: int = 10):
+    """(cumulative µs, module) of the slowest top-level-ish imports."""
+    rows = []
+    for line in importtime_log.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        try:
+            rows.append((int(cumulative), name.rstrip()))
+        except ValueError:
+            continue
+    return sorted(rows, reverse=True)[:top]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check `import app.main` against a time budget.")
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_SECONDS, help="Seconds")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh interpreters; the fastest counts")
+    args = parser.parse_args(argv)
+
+    runs = [probe() for _ in range(args.runs)]
+    best = min(r["seconds"] for r in runs)
+    heavy = [m for m in HEAVY_MODULES if m in runs[0]["modules"]]
+
+    print(f"⏱️ import app.main: {best:.3f}s (best of {args.runs}, budget {args.budget:.3f}s)")
+    print("🔹 Slowest imports (cumulative):")
+    for us, name in slowest_imports(probe(importtime=True)["importtime"]):
+        print(f"  {us / 1e6:>8.3f}s {name}")
+
+    failed = False
+    if heavy:
+        print(f"❌ Heavy modules imported at startup: {', '.join(heavy)}")
+        failed = True
+    if best > args.budget:
+        print(f"❌ Import time {best:.3f}s exceeds budget {args.budget:.3f}s")
+        failed = True
+    if failed:
+        sys.exit(1)
+    print("✅ Startup import within budget")
+
+
+if __name__ == "__main__":
+    main()
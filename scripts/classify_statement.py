@@ -0,0 +1,52 @@
+# scripts/classify_statement.py
+"""
+Stream-classify a bank statement export of any size.
+Reads rows in fixed-size chunks and writes results as soon as each chunk is done.
+
+Usage:
+    python scripts/classify_statement.py statement.csv -o categorized.csv
+    python scripts/classify_statement.py statement.ndjson --format ndjson --output-format ndjson
+"""
+import sys, os
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+from app.core.streaming import (
+    DEFAULT_CHUNK_SIZE, StreamProgress, classify_stream, format_chunk, read_rows,
+)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream-classify a statement file.")
+    parser.add_argument("input", help="Input CSV/NDJSON path, or '-' for stdin")
+    parser.add_argument("-o", "--output", default="-", help="Output path, or '-' for stdout")
+    parser.add_argument("--format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--output-format", choices=["csv", "ndjson"], default="csv")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--report-every", type=int, default=50_000)
+    args = parser.parse_args(argv)
+
+    progress = StreamProgress(report_every=args.report_every)
+
+    src = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        first = True
+        rows = read_rows(src, args.format)
+        for results in classify_stream(rows, args.chunk_size, progress):
+            dst.write(format_chunk(results, args.output_format, header=first))
+            dst.flush()
+            first = False
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    progress.report(final=True)
+    return progress.summary()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# scripts/embedding_parity.py
+"""
+Parity check: how far does an embedding backend drift from the reference?
+Encodes the normalized texts of transactions.csv with a reference backend
+(sentence-transformers by default) and a candidate (onnx int8 by default), then
+reports:
+  • cosine agreement   per-text cosine(reference, candidate): mean / p1 / min
+  • classification     a classifier fit on reference embeddings (held-out split),
+                       evaluated on both: label agreement and accuracy of each
+  • speed              single-text p50 latency and batch throughput of each
+
+Usage:
+    python scripts/embedding_parity.py
+    python scripts/embedding_parity.py --candidate onnx --fp32 -o parity.json
+"""
+import sys, os
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import train_test_split
+
+from app.core.embedding_backends import BACKENDS, OnnxBackend, load_backend
+from app.core.preprocessing import normalize_many
+
+CSV_PATH = "data/processed/transactions.csv"
+
+
+def _load(name: str, fp32: bool):
+    if name == "onnx":
+        return OnnxBackend(quantized=not fp32)
+    return load_backend(name)
+
+
+def _speed(backend, texts, batch_size: int = 64, n_single: int = 200) -> dict:
+    backend.encode(texts[:8])   # warm-up
+    single = []
+    for t in texts[:n_single]:
+        start = time.perf_counter()
+        backend.encode([t])
+        single.append((time.perf_counter() - start) * 1000)
+    start = time.perf_counter()
+    backend.encode(texts, batch_size=batch_size)
+    seconds = time.perf_counter() - start
+    return {
+        "single_p50_ms": round(float(np.percentile(single, 50)), 3),
+        "single_p99_ms": round(float(np.percentile(single, 99)), 3),
+        "batch_texts_per_sec": round(len(texts) / seconds, 1),
+    }
+
+
+def parity(reference, candidate, csv_path: str = CSV_PATH) -> dict:
+    df = pd.read_csv(csv_path)
+    texts = normalize_many(df["description"])
+    y = df["category"].astype(str).values
+
+    unique, inverse = np.unique(np.asarray(texts, dtype=object), return_inverse=True)
+    unique = list(unique)
+    ref = reference.encode(unique, batch_size=64)
+    cand = candidate.encode(unique, batch_size=64)
+    cos = np.sum(ref * cand, axis=1) / (np.linalg.norm(ref, axis=1) * np.linalg.norm(cand, axis=1))
+
+    X_ref, X_cand = ref[inverse], cand[inverse]
+    idx_train, idx_test = train_test_split(np.arange(len(y)), test_size=0.2, random_state=42, stratify=y)
+    clf = LogisticRegression(max_iter=1000, class_weight="balanced").fit(X_ref[idx_train], y[idx_train])
+    pred_ref = clf.predict(X_ref[idx_test])
+    pred_cand = clf.predict(X_cand[idx_test])
+
+    return {
+        "rows": int(len(df)),
+        "unique_texts": len(unique),
+        "reference": reference.name,
+        "candidate": candidate.name,
+        "cosine": {
+            "mean": round(float(cos.mean()), 5),
+            "p1": round(float(np.percentile(cos, 1)), 5),
+            "min": round(float(cos.min()), 5),
+        },
+        "classification": {
+            "test_rows": int(len(idx_test)),
+            "agreement": round(float(np.mean(pred_ref == pred_cand)), 5),
+            "reference_accuracy": round(float(np.mean(pred_ref == y[idx_test])), 5),
+            "candidate_accuracy": round(float(np.mean(pred_cand == y[idx_test])), 5),
+        },
+        "speed": {
+            "reference": _speed(reference, unique),
+            "candidate": _speed(candidate, unique),
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare an embedding backend against the reference.")
+    parser.add_argument("--reference", default="sentence-transformers", choices=BACKENDS)
+    parser.add_argument("--candidate", default="onnx", choices=BACKENDS)
+    parser.add_argument("--fp32", action="store_true",
+                        help="Candidate only: use the fp32 ONNX model instead of int8")
+    parser.add_argument("--csv", default=CSV_PATH)
+    parser.add_argument("-o", "--output", help="Also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.csv):
+        print(f"⚠️ {args.csv} not found. Run prepare_data.py first.")
+        sys.exit(1)
+
+    # An onnx reference is always the unquantized model; --fp32 picks the candidate's precision
+    report = parity(_load(args.reference, fp32=True), _load(args.candidate, args.fp32), args.csv)
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report saved → {args.output}")
+
+
+if __name__ == "__main__":
+    main()
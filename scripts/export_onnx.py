@@ -0,0 +1,80 @@
+# scripts/export_onnx.py
+"""
+Export all-MiniLM-L6-v2 to ONNX for the onnx embedding backend.
+Writes into ONNX_MODEL_DIR (default app/models/onnx/all-MiniLM-L6-v2):
+
+    model.onnx         fp32 transformer (token embeddings out)
+    model_int8.onnx    dynamically quantized int8 weights
+    tokenizer.json     fast tokenizer used at inference time
+
+Export needs torch + transformers (installed with sentence-transformers) and
+`pip install onnx onnxruntime`; serving afterwards needs only onnxruntime and
+tokenizers. Check the accuracy cost with scripts/embedding_parity.py.
+
+Usage:
+    python scripts/export_onnx.py
+    python scripts/export_onnx.py --out-dir /tmp/minilm-onnx --no-quantize
+"""
+import sys, os
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+
+from app.core.embedding_backends import MODEL_NAME, ONNX_MODEL_DIR, onnx_model_file
+
+INPUT_NAMES = ["input_ids", "attention_mask", "token_type_ids"]
+
+
+def export(out_dir: str = ONNX_MODEL_DIR, opset: int = 14) -> str:
+    """Export the fp32 model and tokenizer; returns the model path."""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
+    model = AutoModel.from_pretrained(MODEL_NAME).eval()
+    sample = tokenizer(["swiggy payment", "amazon"], padding=True, return_tensors="pt")
+
+    path = os.path.join(out_dir, onnx_model_file(quantized=False))
+    dynamic = {name: {0: "batch", 1: "sequence"} for name in INPUT_NAMES + ["last_hidden_state"]}
+    with torch.no_grad():
+        torch.onnx.export(
+            model, tuple(sample[name] for name in INPUT_NAMES), path,
+            input_names=INPUT_NAMES, output_names=["last_hidden_state"],
+            dynamic_axes=dynamic, opset_version=opset,
+        )
+    tokenizer.save_pretrained(out_dir)
+    print(f"✅ Exported {MODEL_NAME} → {path}")
+    return path
+
+
+def quantize(out_dir: str = ONNX_MODEL_DIR) -> str:
+    """Dynamic int8 quantization of the exported model's weights."""
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    src = os.path.join(out_dir, onnx_model_file(quantized=False))
+    dst = os.path.join(out_dir, onnx_model_file(quantized=True))
+    quantize_dynamic(model_input=src, model_output=dst, weight_type=QuantType.QInt8)
+    print(f"✅ Quantized int8 model → {dst} "
+          f"({os.path.getsize(src) / 1e6:.1f} MB → {os.path.getsize(dst) / 1e6:.1f} MB)")
+    return dst
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export all-MiniLM-L6-v2 to ONNX (+ int8).")
+    parser.add_argument("--out-dir", default=ONNX_MODEL_DIR)
+    parser.add_argument("--opset", type=int, default=14)
+    parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 model")
+    args = parser.parse_args(argv)
+
+    export(args.out_dir, args.opset)
+    if not args.no_quantize:
+        quantize(args.out_dir)
+    print("🔹 Serve it with EMBEDDING_BACKEND=onnx "
+          f"(ONNX_MODEL_DIR={args.out_dir}, ONNX_QUANTIZED={0 if args.no_quantize else 1})")
+
+
+if __name__ == "__main__":
+    main()
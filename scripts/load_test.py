@@ -0,0 +1,304 @@
+# scripts/load_test.py
+"""
+Load test for the FastAPI service.
+Drives POST /api/classify/ and /api/feedback/ with closed-loop clients (one
+requests.Session each) at stepped concurrency levels, and reports per step:
+  • throughput   requests/sec over the step
+  • latency      p50/p90/p99/max, overall and per request kind
+  • errors       count, rate and status codes
+
+Request kinds are mixed by --rule-ratio and --feedback-ratio:
+  • rule       descriptions the rules engine answers inline
+  • model      descriptions that miss every rule (embed + classifier + explain)
+  • feedback   a correction for one of the above
+
+By default a stub server is started in a child process on a free local port:
+the hashing embedding backend (no model download, no network), a classifier
+trained on synthetic data and a temporary feedback store, so nothing under
+data/ is touched. --in-process runs that server on a thread of this process
+instead (clients and server then share the GIL). --url targets a server that
+is already running; its feedback store receives the corrections.
+
+The server's cache and batching settings come from the environment, e.g.
+DECISION_CACHE_SIZE=0 to measure every request uncached.
+
+Usage:
+    python scripts/load_test.py --concurrency 1 4 16 64 --duration 10
+    python scripts/load_test.py --rule-ratio 0 --feedback-ratio 0 -o load_test.json
+    python scripts/load_test.py --url http://127.0.0.1:8000 --concurrency 8 32
+"""
+import sys, os
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+import argparse
+import json
+import random
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from collections import Counter
+
+import numpy as np
+import requests
+
+KINDS = ("rule", "model", "feedback")
+READY_TIMEOUT = 120
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# ---- stub server ----------------------------------------------------------
+
+def _stub_env(feedback_db: str) -> dict:
+    """Environment for a stub server that needs no network and writes nothing under data/."""
+    return {
+        "EMBEDDING_BACKEND": "hashing",
+        "EMBED_CACHE_PATH": "",
+        "FEEDBACK_DB_PATH": feedback_db,
+        "RETRAIN_AFTER_FEEDBACK": "0",
+        "MODEL_POLL_SECONDS": "0",
+        "PREWARM": "off",
+    }
+
+
+def _warm_stub_models(train_rows: int):
+    """Register the hashing embedder, a synthetic-data classifier and explanation DB."""
+    from sklearn.linear_model import LogisticRegression
+    from app.core.classifier import CLASSIFIER_RUNTIME
+    from app.core.embedding_backends import HashingBackend
+    from app.core.linear_model import LinearSoftmax
+    from app.core.preprocessing import normalize_many
+    from app.core.registry import get_registry
+    from scripts.bench_pipeline import synthetic_dataset
+
+    descriptions, categories = synthetic_dataset(train_rows)
+    norm = np.asarray(normalize_many(descriptions), dtype=object)
+    unique, inverse = np.unique(norm, return_inverse=True)
+    embedder = HashingBackend()
+    X = embedder.encode(list(unique))[inverse]
+    clf = LogisticRegression(max_iter=300).fit(X, categories)
+    if CLASSIFIER_RUNTIME == "numpy":
+        clf = LinearSoftmax.from_sklearn(clf)
+
+    registry = get_registry()
+    registry.set_embedder(embedder)
+    registry.set_classifier(clf, "loadtest")
+    # One row per distinct text, like the explanation store
+    registry.set_explanation_db(embedder.encode(list(unique)), unique)
+    registry.warm()
+
+
+def serve(port: int, train_rows: int):
+    """Run the stub server in this process until it is killed (--serve)."""
+    import uvicorn
+    _warm_stub_models(train_rows)
+    from app.main import app
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+class StubServer:
+    """The stub server in a child process, or on a daemon thread with in_process=True."""
+
+    def __init__(self, train_rows: int, in_process: bool = False):
+        self.port = _free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._tmp = tempfile.TemporaryDirectory()
+        env = _stub_env(os.path.join(self._tmp.name, "feedback.sqlite"))
+        self._proc = None
+        if in_process:
+            # Must be set before the app modules read their configuration
+            os.environ.update(env)
+            threading.Thread(target=serve, args=(self.port, train_rows), daemon=True).start()
+        else:
+            self._proc = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "--serve", str(self.port),
+                 "--train-rows", str(train_rows)],
+                env={**os.environ, **env}, cwd=PROJECT_ROOT,
+            )
+
+    def wait_ready(self, timeout: float = READY_TIMEOUT):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self._proc is not None and self._proc.poll() is not None:
+                raise RuntimeError(f"Stub server exited with status {self._proc.returncode}")
+            try:
+                if requests.get(f"{self.url}/health/ready", timeout=1).status_code == 200:
+                    return
+            except requests.ConnectionError:
+                pass
+            time.sleep(0.2)
+        raise TimeoutError(f"Stub server not ready after {timeout}s")
+
+    def stop(self):
+        if self._proc is not None:
+            self._proc.terminate()
+            try:
+                self._proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+        self._tmp.cleanup()
+
+
+# ---- workload -------------------------------------------------------------
+
+def build_workload(n: int = 2000, seed: int = 0):
+    """(rule-hit descriptions, model-path descriptions, categories) to draw requests from."""
+    from app.core.rules import apply_rules
+    from scripts.bench_pipeline import synthetic_dataset
+
+    descriptions, categories = synthetic_dataset(n, seed=seed)
+    rule, model = [], []
+    for d in descriptions:
+        (rule if apply_rules(d)[0] else model).append(d)
+    # Made-up merchants, so the model path is exercised beyond the synthetic templates
+    rng = random.Random(seed)
+    while len(model) < len(rule):
+        name = "".join(rng.choice("bcdfgklmnprstvz") + rng.choice("aeiou") for _ in range(rng.randint(2, 4)))
+        text = f"{name} {rng.choice(('payment', 'purchase', 'upi', 'pos'))} #{rng.randint(1000, 9999)}"
+        if not apply_rules(text)[0]:
+            model.append(text)
+    return rule, model, sorted(set(categories))
+
+
+def _request(rng, workload, rule_ratio: float, feedback_ratio: float):
+    """(kind, path, payload) for one request of the configured mix."""
+    rule, model, categories, rule_set = workload
+    description = rng.choice(rule) if rng.random() < rule_ratio else rng.choice(model)
+    if rng.random() < feedback_ratio:
+        return "feedback", "/api/feedback/", {
+            "description": description,
+            "predicted_category": rng.choice(categories),
+            "corrected_category": rng.choice(categories),
+            "method": "load_test",
+            "confidence": round(rng.random(), 3),
+        }
+    return ("rule" if description in rule_set else "model"), "/api/classify/", {"description": description}
+
+
+def _worker(url, workload, args, seed, stop_at, warm_until, samples):
+    rng = random.Random(seed)
+    session = requests.Session()
+    while True:
+        kind, path, payload = _request(rng, workload, args.rule_ratio, args.feedback_ratio)
+        start = time.perf_counter()
+        if start >= stop_at:
+            break
+        try:
+            status = session.post(url + path, json=payload, timeout=args.timeout).status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        end = time.perf_counter()
+        if start >= warm_until:
+            samples.append((kind, end - start, status, end))
+    session.close()
+
+
+def _latency(seconds) -> dict:
+    ms = np.asarray(seconds) * 1000
+    if not len(ms):
+        return {"n": 0}
+    return {
+        "n": int(len(ms)),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p90_ms": round(float(np.percentile(ms, 90)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+def run_step(url: str, workload, concurrency: int, args) -> dict:
+    """Run `concurrency` closed-loop clients for warmup + duration seconds."""
+    samples = []   # list.append is atomic, so the workers share one list
+    now = time.perf_counter()
+    warm_until, stop_at = now + args.warmup, now + args.warmup + args.duration
+    threads = [threading.Thread(target=_worker, daemon=True,
+                                args=(url, workload, args, args.seed * 1000 + i, stop_at, warm_until, samples))
+               for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Requests finishing after the step ended still count, over the longer window
+    elapsed = max([args.duration] + [s[3] - warm_until for s in samples])
+    errors = [s for s in samples if s[2] != 200]
+    return {
+        "concurrency": concurrency,
+        "requests": len(samples),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(samples) / elapsed, 1),
+        "errors": len(errors),
+        "error_rate": round(len(errors) / len(samples), 4) if samples else 0.0,
+        "status_codes": {str(k): v for k, v in Counter(s[2] for s in samples).items()},
+        "latency": _latency([s[1] for s in samples]),
+        "by_kind": {kind: _latency([s[1] for s in samples if s[0] == kind])
+                    for kind in KINDS if any(s[0] == kind for s in samples)},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test /api/classify/ and /api/feedback/.")
+    parser.add_argument("--url", help="Target a running server instead of starting the stub server")
+    parser.add_argument("--in-process", action="store_true", help="Run the stub server on a thread of this process")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--duration", type=float, default=10.0, help="Measured seconds per step")
+    parser.add_argument("--warmup", type=float, default=2.0, help="Unmeasured seconds before each step")
+    parser.add_argument("--rule-ratio", type=float, default=0.5, help="Share of rule-hit descriptions")
+    parser.add_argument("--feedback-ratio", type=float, default=0.05, help="Share of requests sent as feedback")
+    parser.add_argument("--train-rows", type=int, default=5000, help="Synthetic rows for the stub classifier")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    parser.add_argument("-o", "--output", help="Also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        return serve(args.serve, args.train_rows)
+
+    server = None
+    if args.url:
+        url = args.url.rstrip("/")
+    else:
+        print(f"🔹 Starting stub server ({'in-process' if args.in_process else 'child process'})...")
+        server = StubServer(args.train_rows, in_process=args.in_process)
+        url = server.url
+    try:
+        if server:
+            server.wait_ready()
+        rule, model, categories = build_workload(seed=args.seed)
+        workload = (rule, model, categories, set(rule))
+        report = {
+            "url": url,
+            "server": "external" if args.url else ("in-process" if args.in_process else "child process"),
+            "mix": {"rule_ratio": args.rule_ratio, "feedback_ratio": args.feedback_ratio},
+            "duration_seconds": args.duration,
+            "steps": [],
+        }
+        print(f"{'clients':>8} {'req/s':>9} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'errors':>7}")
+        for concurrency in args.concurrency:
+            step = run_step(url, workload, concurrency, args)
+            report["steps"].append(step)
+            lat = step["latency"]
+            print(f"{concurrency:>8} {step['throughput_rps']:>9.1f} {lat.get('p50_ms', 0):>8.2f} "
+                  f"{lat.get('p90_ms', 0):>8.2f} {lat.get('p99_ms', 0):>8.2f} {step['error_rate']:>7.2%}")
+    finally:
+        if server:
+            server.stop()
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report saved → {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -2,85 +2,219 @@
 """
 Step 10 — Active Retraining Script for Transactly
 Merges user feedback, regenerates embeddings, and retrains the classifier.
+Retraining is incremental: embeddings are reused from the persistent cache
+(keyed by model + normalized text), only unseen texts are encoded, and the
+classifier is warm-started from the current model. The merged rows and their
+embeddings are written together as a new version of the retrained dataset.
+
+The report estimates what incrementality saved per stage against a cold
+baseline (a from-scratch fit and the uncached encode cost per text). The
+baseline is measured on the first run, again when the dataset size drifts
+by more than BASELINE_MAX_DRIFT, or on demand with --cold-baseline, and is
+kept in the report between runs.
 """
 
 import os
-import numpy as np
+import argparse
+import json
+import time
 import pandas as pd
-from sentence_transformers import SentenceTransformer
-from app.core.preprocessing import normalize_transaction
-from app.core.classifier import train_classifier
+from app.core.preprocessing import normalize_many
+from app.core.classifier import cold_fit_seconds, current_version, train_classifier
+from app.core.registry import get_registry
+from app.core.dataset import DATASET_PATH, RETRAINED_DATASET_PATH, SOURCE_COLUMNS, read_columns
+from app.core.embeddings import EMBED_CACHE_PATH, DEFAULT_EMBED_CACHE_PATH, build_dataset
+from app.core.parallel_embed import EMBED_WORKERS, resolve_workers
+from app.core.store import write_store
+from app.core.feedback_store import get_feedback_store, merged_checkpoint, write_checkpoint
 
 # Paths
-DATA_PATH = "data/processed/transactions.csv"
-FEEDBACK_PATH = "data/feedback.csv"
-NEW_DATA_PATH = "data/processed/transactions_retrained.csv"
-EMB_PATH = "data/processed/embeddings.npy"
+DATA_PATH = DATASET_PATH
+NEW_DATA_PATH = RETRAINED_DATASET_PATH
+REPORT_PATH = "data/processed/retrain_report.json"
+# Re-measure the cold baseline when the row count changed by more than this
+BASELINE_MAX_DRIFT = 0.25
+# Distinct texts timed to measure the uncached encode cost
+ENCODE_SAMPLE = 256
 
-MODEL_NAME = "sentence-transformers/all-MiniLM-L6-v2"
 
 def merge_feedback():
-    """Merge feedback corrections into the main dataset."""
+    """
+    Merge feedback corrections into the main dataset.
+    Only feedback rows newer than the checkpoint are read; they are appended
+    to the previously merged dataset instead of rebuilding it from scratch.
+    Returns (merged rows, id of the last merged feedback row or None); the
+    checkpoint is advanced by retrain_model once the dataset is written.
+    """
     if not os.path.exists(DATA_PATH):
-        raise FileNotFoundError("Main dataset not found. Run prepare_data.py first.")
-    
-    df_main = pd.read_csv(DATA_PATH)
-
-    if os.path.exists(FEEDBACK_PATH):
-        df_fb = pd.read_csv(FEEDBACK_PATH)
-        if len(df_fb) > 0:
-            print(f"🔹 Found {len(df_fb)} feedback samples. Merging...")
-
-            # Normalize feedback texts
-            df_fb["description"] = df_fb["description"].apply(normalize_transaction)
-            df_fb.rename(columns={"corrected_category": "category"}, inplace=True)
-
-            # Append to main dataset
-            df_new = pd.concat(
-                [df_main, df_fb[["description", "category"]]],
-                ignore_index=True
-            )
-
-            # Drop duplicates
-            df_new.drop_duplicates(subset=["description"], inplace=True)
-            df_new.to_csv(NEW_DATA_PATH, index=False)
-            print(f"✅ Merged dataset saved: {NEW_DATA_PATH} ({len(df_new)} rows)")
-            return df_new
-    else:
-        print("⚠️ No feedback.csv found. Using original dataset.")
-        return df_main
-
-
-def regenerate_embeddings(df):
-    """Generate fresh embeddings for the merged dataset."""
-    print("🔹 Loading embedding model...")
-    model = SentenceTransformer(MODEL_NAME)
-
+        raise FileNotFoundError("Main dataset not found. Run prepare_data.py and "
+                                "`python -m app.core.embeddings` first.")
+
+    last_id = merged_checkpoint()
+    base_path = NEW_DATA_PATH if last_id > 0 else DATA_PATH
+    # Source columns only: the old embeddings are re-read from the cache
+    df_main = read_columns(SOURCE_COLUMNS, base_path)
+
+    df_fb = get_feedback_store().read_since(last_id)
+    if len(df_fb) == 0:
+        print(f"⚠️ No new feedback since checkpoint #{last_id}. Using {base_path}.")
+        return df_main, None
+
+    print(f"🔹 Found {len(df_fb)} new feedback samples (after #{last_id}). Merging...")
+
+    # Normalize feedback texts
+    new_last_id = int(df_fb["id"].max())
+    df_fb["description"] = normalize_many(df_fb["description"])
+    df_fb.rename(columns={"corrected_category": "category"}, inplace=True)
+
+    # Drop duplicates (against the existing dataset and within the new batch)
+    df_fb = df_fb[~df_fb["description"].isin(df_main["description"])]
+    df_fb = df_fb.drop_duplicates(subset=["description"])
+    df_fb = df_fb.reindex(columns=df_main.columns)
+
+    df_new = pd.concat([df_main, df_fb], ignore_index=True)
+    print(f"✅ Merged dataset: {len(df_new)} rows (+{len(df_fb)} from {base_path})")
+    return df_new, new_last_id
+
+
+def regenerate_embeddings(df, stats: dict = None, workers: int = EMBED_WORKERS):
+    """
+    Embeddings for the merged dataset, encoding only texts not seen before.
+    Shards are normalized and encoded on `workers` processes (0 = auto); the
+    rows and their embeddings are written together to NEW_DATA_PATH.
+    Fills `stats` with how many texts were reused vs encoded and the dataset version.
+    """
     print("🔹 Normalizing and encoding texts...")
-    df["normalized_text"] = df["description"].apply(normalize_transaction)
-    embeddings = model.encode(df["normalized_text"].tolist(), batch_size=32, show_progress_bar=True)
-
-    np.save(EMB_PATH, embeddings)
-    print(f"✅ Saved new embeddings → {EMB_PATH}")
+    embed_stats = {}
+    # EMBED_WORKERS=0 (auto) still runs small datasets in-process
+    workers = resolve_workers(len(df), workers)
+    embeddings, meta = build_dataset(
+        df, NEW_DATA_PATH, workers=workers,
+        # Always persist retrain embeddings, even if the API runs without a disk tier
+        cache_path=EMBED_CACHE_PATH or DEFAULT_EMBED_CACHE_PATH,
+        # A single worker reuses the already-loaded model
+        model=get_registry().embedder if workers == 1 else None,
+        stats=embed_stats, source="retrain",
+    )
+    if stats is not None:
+        stats.update({"unique_texts": int(df["normalized_text"].nunique()), **embed_stats,
+                      "dataset_version": meta["version"]})
+        print(f"🔹 Reused {stats['reused']} cached embeddings, encoded {stats['encoded']} new texts")
+
+    # Keep the explanation store aligned with the merged dataset (and tagged like it)
+    write_store(embeddings, df["normalized_text"].tolist(), labels=df["category"].tolist(),
+                model_name=meta["embedding_model"])
     return embeddings
 
 
-def retrain_model():
-    """Full retraining pipeline."""
-    df = merge_feedback()
-    embeddings = regenerate_embeddings(df)
+def _load_report() -> dict:
+    if os.path.exists(REPORT_PATH):
+        with open(REPORT_PATH) as f:
+            return json.load(f)
+    return {}
+
+
+def _encode_seconds_per_text(texts, sample: int = ENCODE_SAMPLE) -> float:
+    """Uncached encode cost per text, timed on a sample of distinct texts."""
+    embedder = get_registry().embedder
+    sample = list(dict.fromkeys(texts))[:sample]
+    embedder.encode(sample[:8])   # warm-up
+    start = time.perf_counter()
+    embedder.encode(sample)
+    return (time.perf_counter() - start) / len(sample)
+
+
+def measure_baseline(X, y, texts, fit_seconds: float = None) -> dict:
+    """
+    Cold-run costs to compare incremental retrains against. fit_seconds is
+    reused when this run already trained from scratch.
+    """
+    print("🔹 Measuring cold baseline (from-scratch fit, uncached encoding)...")
+    return {
+        "rows": int(len(y)),
+        "cold_fit_seconds": round(fit_seconds if fit_seconds is not None else cold_fit_seconds(X, y), 4),
+        "encode_seconds_per_text": _encode_seconds_per_text(texts),
+        "measured_at": time.time(),
+    }
+
+
+def _baseline_stale(baseline: dict, rows: int) -> bool:
+    return not baseline or abs(rows - baseline["rows"]) > BASELINE_MAX_DRIFT * baseline["rows"]
+
+
+def retrain_model(warm_start: bool = True, cold_baseline: bool = False):
+    """Incremental retraining pipeline with per-stage timings."""
+    previous = _load_report()
+    timings = {}
+
+    start = time.perf_counter()
+    df, merged_id = merge_feedback()
+    timings["merge_feedback"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    embed_stats = {}
+    embeddings = regenerate_embeddings(df, embed_stats)
+    timings["embeddings"] = time.perf_counter() - start
+    if merged_id is not None:
+        # Only now is the feedback durably part of NEW_DATA_PATH
+        write_checkpoint(merged_id)
 
     # Align shapes
     X = embeddings
     y = df["category"].astype(str).values
+    texts = df["normalized_text"].tolist()
 
     # Retrain classifier
     print("🔹 Retraining Logistic Regression model...")
-    from app.core.classifier import train_classifier
-    model = train_classifier(X, y)
-
-    print("🎯 Retraining complete. New model saved to app/models/classifier.pkl")
+    init_model = None
+    if warm_start:
+        try:
+            init_model = get_registry().classifier
+        except FileNotFoundError:
+            print("⚠️ No existing model to warm-start from; training from scratch.")
+    start = time.perf_counter()
+    train_stats = {}
+    model = train_classifier(X, y, init_model=init_model, texts=texts, stats=train_stats)
+    timings["train"] = time.perf_counter() - start
+    get_registry().set_classifier(model, current_version())
+
+    # Savings are estimated against the cold baseline: a from-scratch fit
+    # (scaled to the current row count) and encoding every reused text
+    baseline = previous.get("baseline")
+    if cold_baseline or _baseline_stale(baseline, len(y)):
+        baseline = measure_baseline(
+            X, y, texts, fit_seconds=None if train_stats["warm_start"] else train_stats["fit_seconds"])
+    cold_fit = baseline["cold_fit_seconds"] * len(y) / baseline["rows"]
+    report = {
+        "model_version": current_version(),
+        "rows": int(len(df)),
+        "dataset_version": embed_stats.get("dataset_version"),
+        "stages_seconds": {k: round(v, 3) for k, v in timings.items()},
+        "embeddings": embed_stats,
+        "training": train_stats,
+        "baseline": baseline,
+        "estimated_seconds_saved": {
+            "embeddings": round(baseline["encode_seconds_per_text"] * embed_stats["reused"], 3),
+            "train": round(max(cold_fit - train_stats["fit_seconds"], 0.0), 3),
+        },
+    }
+    with open(REPORT_PATH, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print("⏱️ Stage timings: " + ", ".join(f"{k} {v:.2f}s" for k, v in timings.items()))
+    print(f"⏱️ Estimated time saved: {report['estimated_seconds_saved']}")
+    print(f"🎯 Retraining complete. New model version {current_version()} published.")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge feedback and retrain the classifier.")
+    parser.add_argument("--cold-start", action="store_true", help="Train from scratch instead of warm-starting")
+    parser.add_argument("--cold-baseline", action="store_true",
+                        help="Re-measure the cold baseline the savings are estimated against")
+    args = parser.parse_args(argv)
+    return retrain_model(warm_start=not args.cold_start, cold_baseline=args.cold_baseline)
 
 
 if __name__ == "__main__":
-    retrain_model()
\ No newline at end of file
+    main()
@@ -2,18 +2,94 @@
 """
 Step 8b — Streamlit Frontend for Transactly
 Provides an interactive demo for AI-based transaction categorization.
+Single mode classifies one description; batch mode uploads a statement CSV,
+classifies it in chunks through /api/bulk/ and submits many corrections in
+one /api/feedback/bulk request. All calls share one pooled HTTP session.
 """
 
 import os
 import streamlit as st
 import requests
 import pandas as pd
+from requests.adapters import HTTPAdapter
 
 # API_URL = "http://127.0.0.1:8000/api/classify/"
 BACKEND_URL = os.getenv("BACKEND_URL", "http://127.0.0.1:8000")
 
 API_URL = f"{BACKEND_URL.rstrip('/')}/api/classify/"
+BULK_URL = f"{BACKEND_URL.rstrip('/')}/api/bulk/"
 FEEDBACK_URL = f"{BACKEND_URL.rstrip('/')}/api/feedback/"
+BULK_FEEDBACK_URL = f"{FEEDBACK_URL}bulk"
+MODELS_URL = f"{BACKEND_URL.rstrip('/')}/models"
+
+CATEGORIES = [
+    "Food & Dining",
+    "Shopping",
+    "Fuel",
+    "Travel & Transport",
+    "Utilities",
+    "Health & Fitness",
+    "Entertainment",
+    "Bills & Subscriptions",
+    "Groceries",
+    "Others",
+]
+BATCH_CHUNK_SIZE = 500
+REQUEST_TIMEOUT = 120
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """One keep-alive connection pool per Streamlit server, shared by every rerun."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=2)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def classify_chunks(session, descriptions, chunk_size: int = BATCH_CHUNK_SIZE):
+    """Yield (rows done, results of the chunk) as each /api/bulk/ call returns."""
+    for start in range(0, len(descriptions), chunk_size):
+        chunk = descriptions[start:start + chunk_size]
+        response = session.post(BULK_URL, json={"descriptions": chunk}, timeout=REQUEST_TIMEOUT)
+        response.raise_for_status()
+        yield start + len(chunk), response.json()["results"]
+
+
+def results_frame(results) -> pd.DataFrame:
+    return pd.DataFrame({
+        "description": [r["description"] for r in results],
+        "final_category": [r["final_category"] for r in results],
+        "method": [r["method"] for r in results],
+        "confidence": [r["confidence"] for r in results],
+    })
+
+
+def category_totals(df: pd.DataFrame) -> pd.DataFrame:
+    """Transactions (and amount, when the statement has one) per predicted category."""
+    aggregations = {"transactions": ("final_category", "size")}
+    if "amount" in df.columns:
+        aggregations["amount"] = ("amount", "sum")
+    return (df.groupby("final_category").agg(**aggregations)
+            .sort_values("transactions", ascending=False))
+
+
+def feedback_items(df: pd.DataFrame) -> list:
+    """Feedback payloads for the rows whose corrected category differs from the prediction."""
+    changed = df[df["corrected_category"].fillna("").ne("")
+                 & df["corrected_category"].ne(df["final_category"])]
+    return [
+        {
+            "description": row.description,
+            "predicted_category": row.final_category,
+            "corrected_category": row.corrected_category,
+            "method": row.method,
+            "confidence": float(row.confidence),
+        }
+        for row in changed.itertuples(index=False)
+    ]
+
 
 st.set_page_config(
     page_title="Transactly — Explainable Transaction Intelligence",
@@ -24,81 +100,165 @@ st.set_page_config(
 st.title("💳 Transactly — Privacy-First Explainable AI")
 st.caption("Smart, Offline, and Transparent Transaction Categorisation")
 
-# --- Input section ---
-description = st.text_input(
-    "Enter a transaction description",
-    placeholder="e.g., IRCTC Train Booking #7382 or Swiggy Order 8392",
-)
+session = get_session()
+
+# --- Backend model status (models are loaded once by the API process) ---
+with st.sidebar:
+    st.markdown("### ⚙️ Backend Models")
+    try:
+        status = session.get(MODELS_URL, timeout=5).json()
+        st.write(f"**Embedder:** {'warm ✅' if status['embedder_loaded'] else 'cold'}")
+        st.write(f"**Classifier:** {'warm ✅' if status['classifier_loaded'] else 'cold'}")
+        st.write(f"**Explanation DB rows:** {status['explanation_db_rows']}")
+        st.write(f"**Backend RSS:** {status['rss_mb']:.0f} MB")
+    except Exception as e:
+        st.caption(f"Model status unavailable: {e}")
+
+mode = st.radio("Mode", ["Single transaction", "Batch (CSV upload)"], horizontal=True)
 
-if st.button("🔍 Classify Transaction"):
-    if not description.strip():
-        st.warning("Please enter a transaction description.")
-    else:
-        with st.spinner("Analysing..."):
+if mode == "Single transaction":
+    # --- Input section ---
+    description = st.text_input(
+        "Enter a transaction description",
+        placeholder="e.g., IRCTC Train Booking #7382 or Swiggy Order 8392",
+    )
+
+    if st.button("🔍 Classify Transaction"):
+        if not description.strip():
+            st.warning("Please enter a transaction description.")
+        else:
+            with st.spinner("Analysing..."):
+                try:
+                    response = session.post(API_URL, json={"description": description}, timeout=REQUEST_TIMEOUT)
+                    if response.status_code == 200:
+                        # Kept across reruns, so the feedback button below still sees it
+                        st.session_state["single_result"] = response.json()
+                    else:
+                        st.session_state.pop("single_result", None)
+                        st.error(f"API Error: {response.status_code}")
+                except Exception as e:
+                    st.session_state.pop("single_result", None)
+                    st.error(f"⚠️ Connection failed: {e}")
+
+    result = st.session_state.get("single_result")
+    if result:
+        st.success("Classification complete ✅")
+
+        # --- Display main prediction ---
+        st.markdown("### 🧠 Prediction")
+        st.write(f"**Category:** {result['final_category']}")
+        st.write(f"**Method:** {result['method'].capitalize()}")
+        st.write(f"**Confidence:** {result['confidence']*100:.2f}%")
+        st.info(result.get("explanation", ""))
+
+        # --- Feedback section ---
+        st.markdown("### 📝 Provide Feedback")
+        corrected_category = st.selectbox(
+            "If the prediction is wrong, select the correct category:",
+            [""] + CATEGORIES
+        )
+
+        if st.button("Submit Feedback"):
+            if corrected_category and corrected_category != result['final_category']:
+                feedback_payload = {
+                    "description": result["description"],
+                    "predicted_category": result["final_category"],
+                    "corrected_category": corrected_category,
+                    "method": result["method"],
+                    "confidence": result["confidence"]
+                }
+
+                try:
+                    feedback_response = session.post(FEEDBACK_URL, json=feedback_payload, timeout=REQUEST_TIMEOUT)
+                    if feedback_response.status_code == 200:
+                        st.success("✅ Feedback submitted! This will help Transactly improve over time.")
+                    else:
+                        st.error(f"⚠️ Failed to submit feedback (Status: {feedback_response.status_code}).")
+                except Exception as e:
+                    st.error(f"⚠️ Could not send feedback: {e}")
+            else:
+                st.info("Select a correct category that differs from the prediction before submitting.")
+
+        # --- Show similar examples if available ---
+        similar = result.get("similar_examples", [])
+        if similar:
+            st.markdown("### 🔍 Most Similar Transactions")
+            df = pd.DataFrame(similar, columns=["Example", "Similarity"])
+            df["Similarity"] = (df["Similarity"] * 100).round(2).astype(str) + "%"
+            st.dataframe(df, use_container_width=True)
+
+else:
+    # --- Batch mode: a whole statement at once ---
+    uploaded = st.file_uploader("Upload a statement CSV", type="csv")
+    if uploaded is not None:
+        statement = pd.read_csv(uploaded)
+        columns = list(statement.columns)
+        column = st.selectbox(
+            "Description column", columns,
+            index=columns.index("description") if "description" in columns else 0,
+        )
+        chunk_size = st.number_input("Rows per request", min_value=50, max_value=5000,
+                                     value=BATCH_CHUNK_SIZE, step=50)
+
+        if st.button(f"🔍 Classify {len(statement)} Transactions"):
+            descriptions = statement[column].fillna("").astype(str).tolist()
+            progress = st.progress(0.0, text="Classifying...")
+            totals_area, rows_area = st.empty(), st.empty()
+            frames, totals = [], None
             try:
-                response = requests.post(API_URL, json={"description": description})
+                for done, chunk_results in classify_chunks(session, descriptions, int(chunk_size)):
+                    frame = results_frame(chunk_results)
+                    if "amount" in statement.columns:
+                        frame["amount"] = statement["amount"].iloc[done - len(frame):done].to_numpy()
+                    frames.append(frame)
+                    # Running totals, updated with each chunk instead of recomputed
+                    chunk_totals = category_totals(frame)
+                    totals = chunk_totals if totals is None else \
+                        totals.add(chunk_totals, fill_value=0).astype({"transactions": "int64"})
+                    progress.progress(done / len(descriptions), text=f"Classified {done} / {len(descriptions)}")
+                    totals_area.dataframe(totals.sort_values("transactions", ascending=False),
+                                          use_container_width=True)
+                    rows_area.dataframe(frame, use_container_width=True, hide_index=True)
+            except Exception as e:
+                st.error(f"⚠️ Stopped after {sum(len(f) for f in frames)} rows: {e}")
+            totals_area.empty()
+            rows_area.empty()
+            if frames:
+                batch = pd.concat(frames, ignore_index=True)
+                batch["corrected_category"] = ""
+                st.session_state["batch_results"] = batch
+
+    batch = st.session_state.get("batch_results")
+    if batch is not None:
+        st.markdown("### 📊 Per-Category Totals")
+        st.dataframe(category_totals(batch), use_container_width=True)
+
+        # --- Bulk corrections ---
+        st.markdown("### 📝 Review & Correct")
+        edited = st.data_editor(
+            batch,
+            column_config={
+                "corrected_category": st.column_config.SelectboxColumn(
+                    "Corrected category", options=[""] + CATEGORIES),
+            },
+            disabled=[c for c in batch.columns if c != "corrected_category"],
+            hide_index=True,
+            use_container_width=True,
+            key="batch_editor",
+        )
+        items = feedback_items(edited)
+        if st.button(f"Submit {len(items)} Corrections", disabled=not items):
+            try:
+                response = session.post(BULK_FEEDBACK_URL, json={"items": items}, timeout=REQUEST_TIMEOUT)
                 if response.status_code == 200:
-                    result = response.json()
-                    st.success("Classification complete ✅")
-
-                    # --- Display main prediction ---
-                    st.markdown("### 🧠 Prediction")
-                    st.write(f"**Category:** {result['final_category']}")
-                    st.write(f"**Method:** {result['method'].capitalize()}")
-                    st.write(f"**Confidence:** {result['confidence']*100:.2f}%")
-                    st.info(result.get("explanation", ""))
-                    
-                    # --- Feedback section ---
-                    st.markdown("### 📝 Provide Feedback")
-                    corrected_category = st.selectbox(
-                        "If the prediction is wrong, select the correct category:",
-                        [
-                            "",
-                            "Food & Dining",
-                            "Shopping",
-                            "Fuel",
-                            "Travel & Transport",
-                            "Utilities",
-                            "Health & Fitness",
-                            "Entertainment",
-                            "Bills & Subscriptions",
-                            "Groceries",
-                            "Others"
-                        ]
-                    )
-                    
-                    if st.button("Submit Feedback"):
-                        if corrected_category and corrected_category != result['final_category']:
-                            feedback_payload = {
-                                "description": result["description"],
-                                "predicted_category": result["final_category"],
-                                "corrected_category": corrected_category,
-                                "method": result["method"],
-                                "confidence": result["confidence"]
-                            }
-                    
-                            try:
-                                feedback_response = requests.post("http://127.0.0.1:8000/api/feedback/", json=feedback_payload)
-                                if feedback_response.status_code == 200:
-                                    st.success("✅ Feedback submitted! This will help Transactly improve over time.")
-                                else:
-                                    st.error(f"⚠️ Failed to submit feedback (Status: {feedback_response.status_code}).")
-                            except Exception as e:
-                                st.error(f"⚠️ Could not send feedback: {e}")
-                        else:
-                            st.info("Select a correct category that differs from the prediction before submitting.")
-
-                    # --- Show similar examples if available ---
-                    similar = result.get("similar_examples", [])
-                    if similar:
-                        st.markdown("### 🔍 Most Similar Transactions")
-                        df = pd.DataFrame(similar, columns=["Example", "Similarity"])
-                        df["Similarity"] = (df["Similarity"] * 100).round(2).astype(str) + "%"
-                        st.dataframe(df, use_container_width=True)
+                    st.success(f"✅ {response.json()['count']} corrections submitted!")
                 else:
-                    st.error(f"API Error: {response.status_code}")
+                    st.error(f"⚠️ Failed to submit feedback (Status: {response.status_code}).")
             except Exception as e:
-                st.error(f"⚠️ Connection failed: {e}")
+                st.error(f"⚠️ Could not send feedback: {e}")
+
+        st.download_button("⬇️ Download Results", edited.to_csv(index=False),
+                           file_name="transactly_results.csv", mime="text/csv")
 
 st.markdown("---")
-st.caption("Built with ❤️ by Manoj & Mercy for GHCI 25 Hackathon")
\ No newline at end of file
+st.caption("Built with ❤️ by Manoj & Mercy for GHCI 25 Hackathon")